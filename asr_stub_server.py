@@ -0,0 +1,317 @@
+"""本地ASR模拟服务器
+
+模拟腾讯云语音识别API的 CreateRecTask / DescribeTaskStatus / SentenceRecognition 接口，
+用于在不访问真实服务的情况下进行性能测试和回归测试。可以配置排队延迟、识别速度、
+错误率和每个接口的频率限制。
+
+用法:
+    python asr_stub_server.py --port 8000 --queue-delay 1 --processing-rate 0.1
+    TENCENTCLOUD_ASR_ENDPOINT=http://127.0.0.1:8000 python main.py example.wav
+"""
+import json
+import time
+import uuid
+import base64
+import random
+import struct
+import argparse
+import heapq
+import itertools
+import threading
+import urllib.request
+from urllib.parse import urlencode
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+def estimate_audio_duration(audio_bytes):
+    """估算音频时长（秒）：WAV读取头部信息，其他格式按128kbps估算"""
+    if audio_bytes[:4] == b'RIFF' and audio_bytes[8:12] == b'WAVE':
+        offset = 12
+        byte_rate = 0
+        while offset + 8 <= len(audio_bytes):
+            chunk_id = audio_bytes[offset:offset + 4]
+            chunk_size = struct.unpack('<I', audio_bytes[offset + 4:offset + 8])[0]
+            if chunk_id == b'fmt ' and chunk_size >= 16:
+                byte_rate = struct.unpack('<I', audio_bytes[offset + 16:offset + 20])[0]
+            elif chunk_id == b'data' and byte_rate:
+                data_size = min(chunk_size, len(audio_bytes) - offset - 8)
+                return data_size / byte_rate
+            offset += 8 + chunk_size + (chunk_size & 1)
+    return len(audio_bytes) / 16000
+
+class RateLimiter:
+    """简单的按秒计数频率限制"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.window = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if not self.limit:
+            return True
+        with self.lock:
+            window = int(time.time())
+            if window != self.window:
+                self.window = window
+                self.count = 0
+            self.count += 1
+            return self.count <= self.limit
+
+class CallbackDispatcher:
+    """在任务完成时间到达后向CallbackUrl发送识别结果回调"""
+
+    def __init__(self, on_sent=None):
+        self.on_sent = on_sent
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self, due, url, fields):
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._counter), url, fields))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                _, _, url, fields = heapq.heappop(self._heap)
+            threading.Thread(target=self._send, args=(url, fields), daemon=True).start()
+
+    def _send(self, url, fields):
+        try:
+            data = urlencode(fields).encode('utf-8')
+            request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+            urllib.request.urlopen(request, timeout=10).read()
+            if self.on_sent:
+                self.on_sent()
+        except Exception as e:
+            print(f"发送回调失败 {url}: {str(e)}")
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认的监听队列长度为5，大量并发连接时会被重置
+    request_queue_size = 1024
+
+class StubAsrServer:
+    """ASR模拟服务器
+
+    任务状态根据创建时间惰性计算：排队queue_delay秒（Status=0），
+    然后识别 音频时长 x processing_rate 秒（Status=1），之后完成（Status=2）。
+    创建任务时指定了CallbackUrl的，会在完成时向该地址发送回调。
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, queue_delay=1.0, processing_rate=0.1,
+                 error_rate=0.0, task_failure_rate=0.0, rate_limits=None):
+        """
+        Args:
+            queue_delay: 任务排队时间（秒）
+            processing_rate: 识别耗时与音频时长之比
+            error_rate: 请求直接返回InternalError的概率
+            task_failure_rate: 任务识别失败（Status=3）的概率
+            rate_limits: 各接口每秒请求数上限，例如 {"CreateRecTask": 20}
+        """
+        self.queue_delay = queue_delay
+        self.processing_rate = processing_rate
+        self.error_rate = error_rate
+        self.task_failure_rate = task_failure_rate
+        self.limiters = {action: RateLimiter(limit) for action, limit in (rate_limits or {}).items()}
+
+        self.tasks = {}
+        self.task_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.callbacks = CallbackDispatcher(on_sent=lambda: self.count("Callback"))
+
+        handler = type('Handler', (_StubRequestHandler,), {'stub': self})
+        self.httpd = _StubHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def handle(self, action, params):
+        """处理一次API调用，返回Response字典"""
+        self.count(action)
+        limiter = self.limiters.get(action)
+        if limiter and not limiter.allow():
+            self.count("RequestLimitExceeded")
+            return self.error("RequestLimitExceeded", "请求的次数超过了频率限制")
+        if self.error_rate and random.random() < self.error_rate:
+            self.count("InternalError")
+            return self.error("InternalError", "内部错误")
+
+        handler = getattr(self, f"action_{action}", None)
+        if handler is None:
+            return self.error("InvalidAction", f"接口不存在: {action}")
+        return handler(params)
+
+    def error(self, code, message):
+        return {"Error": {"Code": code, "Message": message}, "RequestId": str(uuid.uuid4())}
+
+    def decode_audio(self, params):
+        try:
+            return base64.b64decode(params.get("Data") or "")
+        except ValueError:
+            return b""
+
+    def make_result(self, duration, task_id):
+        minutes, seconds = divmod(duration, 60)
+        return f"[0:0.000,{int(minutes)}:{seconds:.3f}]  模拟识别结果 {task_id}\n"
+
+    def action_CreateRecTask(self, params):
+        audio = self.decode_audio(params)
+        duration = estimate_audio_duration(audio)
+        task_id = next(self.task_ids)
+        task = {
+            "created": time.monotonic(),
+            "duration": duration,
+            "processing": duration * self.processing_rate,
+            "failed": bool(self.task_failure_rate and random.random() < self.task_failure_rate)
+        }
+        with self.lock:
+            self.tasks[task_id] = task
+        callback_url = params.get("CallbackUrl")
+        if callback_url:
+            self.schedule_callback(task_id, task, callback_url)
+        return {"Data": {"TaskId": task_id}, "RequestId": str(uuid.uuid4())}
+
+    def schedule_callback(self, task_id, task, callback_url):
+        """按录音文件识别回调的格式，在任务完成时发送结果"""
+        due = task["created"] + self.queue_delay + task["processing"]
+        if task["failed"]:
+            fields = {"code": 10000, "message": "模拟识别失败", "text": ""}
+        else:
+            fields = {"code": 0, "message": "成功", "text": self.make_result(task["duration"], task_id)}
+        fields.update(requestId=task_id, appid=0, projectid=0, audioUrl="",
+                      resultDetail="", audioTime=round(task["duration"], 3))
+        self.callbacks.schedule(due, callback_url, fields)
+
+    def task_status(self, task_id, task):
+        """根据经过的时间计算任务状态"""
+        elapsed = time.monotonic() - task["created"]
+        data = {"TaskId": task_id, "Status": 0, "StatusStr": "waiting", "Result": "",
+                "ErrorMsg": "", "ResultDetail": None, "AudioDuration": round(task["duration"], 3)}
+        if elapsed < self.queue_delay:
+            return data
+        if elapsed < self.queue_delay + task["processing"]:
+            data.update(Status=1, StatusStr="doing")
+        elif task["failed"]:
+            data.update(Status=3, StatusStr="failed", ErrorMsg="模拟识别失败")
+        else:
+            data.update(Status=2, StatusStr="success", Result=self.make_result(task["duration"], task_id))
+        return data
+
+    def action_DescribeTaskStatus(self, params):
+        task_id = params.get("TaskId")
+        with self.lock:
+            task = self.tasks.get(task_id)
+        if task is None:
+            return self.error("InvalidParameterValue", f"任务不存在: {task_id}")
+        return {"Data": self.task_status(task_id, task), "RequestId": str(uuid.uuid4())}
+
+    def action_SentenceRecognition(self, params):
+        if not params.get("EngSerViceType") or not params.get("VoiceFormat"):
+            return self.error("InvalidParameter", "缺少EngSerViceType或VoiceFormat参数")
+        audio = self.decode_audio(params)
+        duration = estimate_audio_duration(audio)
+        time.sleep(duration * self.processing_rate)
+        text = f"模拟识别结果 {duration:.1f}s"
+        word_list = None
+        if params.get("WordInfo"):
+            # 词级时间戳：各词平均分布在整段音频中
+            words = text.split()
+            step = int(duration * 1000) // len(words)
+            word_list = [{"Word": word, "StartTime": i * step, "EndTime": (i + 1) * step} for i, word in enumerate(words)]
+        return {"Result": text, "AudioDuration": int(duration * 1000),
+                "WordSize": len(word_list or []), "WordList": word_list, "RequestId": str(uuid.uuid4())}
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stub = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        action = self.headers.get('X-TC-Action', '')
+        try:
+            params = json.loads(body or b'{}')
+        except ValueError:
+            response = self.stub.error("InvalidParameter", "请求体不是合法的JSON")
+        else:
+            response = self.stub.handle(action, params)
+        self.send_json({"Response": response})
+
+    def do_GET(self):
+        # GET /stats 返回各接口的调用次数
+        if self.path.rstrip('/') == '/stats':
+            with self.stub.lock:
+                stats = dict(self.stub.stats)
+            self.send_json(stats)
+        else:
+            self.send_error(404)
+
+    def send_json(self, data):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def parse_rate_limits(values):
+    """解析 Action=QPS 形式的频率限制参数"""
+    limits = {}
+    for value in values or []:
+        action, _, limit = value.partition('=')
+        limits[action] = int(limit)
+    return limits
+
+def main():
+    parser = argparse.ArgumentParser(description='本地ASR模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（默认: 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口（默认: 8000）')
+    parser.add_argument('--queue-delay', type=float, default=1.0, help='任务排队时间（秒，默认: 1）')
+    parser.add_argument('--processing-rate', type=float, default=0.1, help='识别耗时与音频时长之比（默认: 0.1）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='请求返回InternalError的概率（默认: 0）')
+    parser.add_argument('--task-failure-rate', type=float, default=0.0, help='任务识别失败的概率（默认: 0）')
+    parser.add_argument('--rate-limit', action='append', metavar='ACTION=QPS',
+                        help='接口频率限制，例如 --rate-limit CreateRecTask=20（可重复指定）')
+    args = parser.parse_args()
+
+    server = StubAsrServer(args.host, args.port, args.queue_delay, args.processing_rate,
+                           args.error_rate, args.task_failure_rate, parse_rate_limits(args.rate_limit))
+    print(f"ASR模拟服务器已启动: {server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
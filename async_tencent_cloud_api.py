@@ -0,0 +1,364 @@
+import os
+import ssl
+import json
+import random
+import asyncio
+import hashlib
+from tencentcloud.common.exception.tencent_cloud_sdk_exception import TencentCloudSDKException
+from audio_processor import AudioProcessor
+from streaming_upload import Base64JsonBody, build_tc3_headers
+from task_poller import TaskPoller
+from tencent_cloud_api import TencentCloudAPI, load_env
+from transcript_utils import extract_result_text, save_result, lookup_cache, sentence_result_response
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class _AsyncConnectionPool:
+    """基于asyncio流的HTTP/1.1 keep-alive连接池
+
+    只实现调用腾讯云API所需的部分：POST请求、Content-Length或分块传输的响应。
+    """
+
+    def __init__(self, host, port, use_ssl, max_connections, timeout=300):
+        self.host = host
+        self.port = port
+        # 建立连接、发送请求并读取响应的超时时间（秒）
+        self.timeout = timeout
+        self.ssl_context = ssl.create_default_context() if use_ssl else None
+        self._idle = []
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self.connections_opened = 0
+
+    async def _open(self):
+        self.connections_opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl_context), self.timeout)
+
+    async def request(self, headers, body):
+        """发送POST请求，body为字节串或可重复迭代的字节块序列，返回(状态码, 响应体)
+
+        超过timeout秒未完成时抛出asyncio.TimeoutError。
+        """
+        async with self._semaphore:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._open()
+            keep_alive = False
+            try:
+                try:
+                    status, keep_alive, data = await asyncio.wait_for(self._send(conn, headers, body), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if not reused:
+                        raise
+                    # 复用的连接可能已被服务端关闭，换新连接重试一次
+                    conn[1].close()
+                    conn = await self._open()
+                    status, keep_alive, data = await asyncio.wait_for(self._send(conn, headers, body), self.timeout)
+            finally:
+                # 只有完整读取了响应的keep-alive连接才放回空闲列表，出错、超时或被取消时关闭连接
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+            return status, data
+
+    async def _send(self, conn, headers, body):
+        reader, writer = conn
+        head = "POST / HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        writer.write(head.encode('latin-1'))
+        if isinstance(body, bytes):
+            writer.write(body)
+        else:
+            # 读取音频和base64编码在线程池中进行，避免大文件上传时阻塞事件循环
+            loop = asyncio.get_running_loop()
+            chunks = iter(body)
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("连接已关闭")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        keep_alive = response_headers.get('connection', '').lower() != 'close'
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    # 读取trailer直到空行
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b''.join(parts)
+        elif 'content-length' in response_headers:
+            data = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return status, keep_alive, data
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+class AsyncTencentCloudAPI:
+    """基于asyncio的腾讯云语音识别客户端
+
+    直接使用asyncio流发送签名后的HTTP请求，不依赖阻塞的SDK调用，
+    单个事件循环即可同时维持数百个识别任务。
+    """
+
+    SERVICE = "asr"
+    VERSION = "2019-06-14"
+
+    def __init__(self, tenant_id=None, secret_id=None, secret_key=None, app_id=None, endpoint=None, max_connections=32, timeout=300):
+        load_env()
+        self.tenant_id = tenant_id or os.getenv('TENCENTCLOUD_TENANT_ID')
+        self.secret_id = secret_id or os.getenv('TENCENTCLOUD_SECRET_ID')
+        self.secret_key = secret_key or os.getenv('TENCENTCLOUD_SECRET_KEY')
+        self.app_id = app_id or os.getenv('TENCENTCLOUD_APP_ID')
+        self.region = "ap-guangzhou"
+
+        if not self.secret_id or not self.secret_key or not self.app_id:
+            raise ValueError("请配置腾讯云API密钥信息（AppID、SecretID和SecretKey为必填项）")
+
+        endpoint = endpoint or os.getenv('TENCENTCLOUD_ASR_ENDPOINT') or TencentCloudAPI.DEFAULT_ENDPOINT
+        scheme, _, host = endpoint.rpartition('://')
+        self.scheme = scheme or "https"
+        self.host = host.rstrip('/')
+        hostname, _, port = self.host.partition(':')
+        port = int(port) if port else (443 if self.scheme == "https" else 80)
+        self._pool = _AsyncConnectionPool(hostname, port, self.scheme == "https", max_connections, timeout)
+        # 不超过该时长的短音频使用一句话识别，0表示总是创建录音文件识别任务
+        self.sentence_max_duration = TencentCloudAPI.SENTENCE_MAX_DURATION
+
+    def cache_settings(self):
+        """返回影响识别结果的客户端设置，与TencentCloudAPI.cache_settings一致"""
+        return {"endpoint": f"{self.scheme}://{self.host}", "normalize": None}
+
+    async def close(self):
+        self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _call(self, action, params=None, audio_file_path=None):
+        """调用API，audio_file_path不为空时以流的方式写入Data字段
+
+        Returns:
+            dict: 响应中Response部分的内容
+        """
+        if audio_file_path:
+            body = Base64JsonBody(audio_file_path, params or {})
+            payload_hash = None
+            content_length = len(body)
+        else:
+            payload = json.dumps(params or {}).encode('utf-8')
+            body = payload
+            payload_hash = hashlib.sha256(payload).hexdigest()
+            content_length = len(payload)
+
+        headers = build_tc3_headers(self.secret_id, self.secret_key, self.host, action, self.VERSION,
+                                    self.region, self.SERVICE, payload_hash)
+        headers["Content-Length"] = str(content_length)
+        headers["Connection"] = "keep-alive"
+
+        status, data = await self._pool.request(headers, body)
+        try:
+            response = json.loads(data).get("Response", {})
+        except ValueError:
+            raise TencentCloudSDKException("ClientNetworkError", f"无效的响应 (HTTP {status})")
+        error = response.get("Error")
+        if error:
+            raise TencentCloudSDKException(error.get("Code"), error.get("Message"), response.get("RequestId"))
+        return response
+
+    async def create_task(self, audio_file_path, engine_model_type="16k_zh", callback_url=""):
+        """上传音频并创建识别任务，返回任务ID"""
+        params = {
+            "EngineModelType": engine_model_type,
+            "ChannelNum": 1,
+            "ResTextFormat": 0,
+            "SourceType": 1,
+            "DataLen": os.path.getsize(audio_file_path)
+        }
+        if callback_url:
+            params["CallbackUrl"] = callback_url
+        response = await self._call("CreateRecTask", params, audio_file_path)
+        return response.get("Data", {}).get("TaskId")
+
+    async def recognize_sentence(self, audio_file_path, engine_model_type="16k_zh", voice_format="wav"):
+        """一句话识别：上传短音频并在同一次请求中返回识别结果"""
+        params = {
+            "EngSerViceType": engine_model_type,
+            "SourceType": 1,
+            "VoiceFormat": voice_format,
+            "WordInfo": 1,
+            "DataLen": os.path.getsize(audio_file_path)
+        }
+        return await self._call("SentenceRecognition", params, audio_file_path)
+
+    async def get_status(self, task_id):
+        """查询任务状态，返回Data部分（Status等字段在顶层）"""
+        response = await self._call("DescribeTaskStatus", {"TaskId": task_id})
+        result_data = response.get("Data", response)
+        result_data.setdefault("Status", 0)
+        return result_data
+
+    async def wait(self, task_id, audio_duration=None, timeout=None):
+        """按与TaskPoller相同的策略自适应轮询，直到任务完成
+
+        Raises:
+            Exception: 任务失败或超时
+        """
+        loop = asyncio.get_running_loop()
+        duration = audio_duration or 0
+        now = loop.time()
+        deadline = now + (timeout or TaskPoller.MIN_TIMEOUT + duration * TaskPoller.TIMEOUT_FACTOR)
+        expected_finish = now + TaskPoller.MIN_INTERVAL + duration * TaskPoller.REAL_TIME_FACTOR
+        interval = TaskPoller.MIN_INTERVAL
+        last_status = None
+        errors = 0
+
+        while True:
+            now = loop.time()
+            if now < expected_finish:
+                delay = (expected_finish - now) / 2
+            else:
+                delay = interval
+                interval = min(TaskPoller.MAX_INTERVAL, interval * TaskPoller.BACKOFF)
+            delay *= random.uniform(1 - TaskPoller.JITTER, 1 + TaskPoller.JITTER)
+            await asyncio.sleep(max(TaskPoller.MIN_INTERVAL, min(TaskPoller.MAX_INTERVAL, delay)))
+
+            try:
+                result = await self.get_status(task_id)
+            except (TencentCloudSDKException, OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                # 与TaskPoller一致：网络错误、超时和接口错误都按连续失败次数重试
+                errors += 1
+                if errors >= TaskPoller.MAX_ERRORS:
+                    raise
+                continue
+            errors = 0
+
+            status = result.get("Status", 0)
+            if status == 2:
+                return result
+            if status == 3:
+                raise Exception(f"语音识别任务失败: {result.get('ErrorMsg', '未知错误')}")
+            if loop.time() >= deadline:
+                raise Exception(f"语音识别任务超时，任务ID: {task_id}")
+            if status == 1 and last_status != 1:
+                # 刚进入识别状态，重新估算完成时间
+                expected_finish = loop.time() + duration * TaskPoller.REAL_TIME_FACTOR
+                interval = TaskPoller.MIN_INTERVAL
+            last_status = status
+
+    async def transcribe(self, audio_file_path, engine_model_type="16k_zh", remove_timestamp=True, audio_duration=None):
+        """上传、等待并提取识别结果，短音频使用一句话识别
+
+        Returns:
+            dict: 与process_single_audio相同结构的结果
+        """
+        voice_format = TencentCloudAPI.get_sentence_voice_format(audio_file_path, engine_model_type, self.sentence_max_duration)
+        if voice_format is not None:
+            try:
+                result_response = sentence_result_response(await self.recognize_sentence(audio_file_path, engine_model_type, voice_format))
+                return {
+                    "task_id": None,
+                    "text": extract_result_text(result_response, remove_timestamp),
+                    "full_result": result_response
+                }
+            except Exception as e:
+                logger.warning("一句话识别失败，改用录音文件识别: %s", e)
+        if audio_duration is None:
+            audio_duration = AudioProcessor.get_audio_info(audio_file_path).get('duration')
+        task_id = await self.create_task(audio_file_path, engine_model_type)
+        if task_id is None:
+            raise Exception("创建识别任务失败")
+        result_response = await self.wait(task_id, audio_duration)
+        return {
+            "task_id": task_id,
+            "text": extract_result_text(result_response, remove_timestamp),
+            "full_result": result_response
+        }
+
+async def process_audio_to_text_async(audio_file_path, output_file=None, engine_model_type="16k_zh", remove_timestamp=True, api=None, concurrency=16, cache=None, **api_kwargs):
+    """process_audio_to_text的asyncio版本
+
+    长音频分割后的所有片段在同一个事件循环中并发上传和轮询，并发数由concurrency限制。
+
+    Args:
+        api: AsyncTencentCloudAPI实例，None则根据api_kwargs创建并在结束时关闭
+        concurrency: 同时进行的片段数
+        cache: TranscriptCache实例，None表示不使用缓存
+    """
+    if not os.path.exists(audio_file_path):
+        logger.error("文件不存在 - %s", audio_file_path)
+        return False
+    if not AudioProcessor.is_supported_format(audio_file_path):
+        logger.error("不支持的音频格式 - %s", audio_file_path)
+        return False
+
+    loop = asyncio.get_running_loop()
+    is_valid, message = AudioProcessor.validate_for_asr(audio_file_path)
+    if is_valid:
+        segments = [audio_file_path]
+    elif "时长超过限制" in message or "文件大小超过限制" in message:
+        logger.info("尝试分割大音频文件...")
+        segments = await loop.run_in_executor(None, AudioProcessor.split_large_audio, audio_file_path)
+        if not segments:
+            return False
+    else:
+        logger.warning("%s", message)
+        return False
+
+    own_api = api is None
+    if own_api:
+        api = AsyncTencentCloudAPI(**api_kwargs)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_segment(path):
+        async with semaphore:
+            cache_key, cached = await loop.run_in_executor(None, lambda: lookup_cache(cache, path, engine_model_type, remove_timestamp, api=api))
+            if cached:
+                return cached
+            try:
+                result = await api.transcribe(path, engine_model_type, remove_timestamp)
+            except Exception as e:
+                logger.error("处理文件失败 %s: %s", path, e)
+                return None
+            if cache_key:
+                await loop.run_in_executor(None, cache.put, cache_key, result)
+            return result
+
+    try:
+        results = await asyncio.gather(*(run_segment(path) for path in segments))
+    finally:
+        if own_api:
+            await api.close()
+        if segments[0] != audio_file_path:
+            AudioProcessor.remove_segments(segments)
+
+    all_results = [r for r in results if r]
+    if not all_results:
+        return False
+    merged_text = "\n".join(r['text'] for r in all_results)
+    await loop.run_in_executor(None, save_result, merged_text, all_results, audio_file_path, output_file)
+    return True
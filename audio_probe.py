@@ -0,0 +1,349 @@
+"""音频文件头解析
+
+不解码音频数据，只读取容器或帧头信息获取时长、采样率和声道数，
+每个文件只读取头部、尾部和少量索引结构，用于在上传前判断是否需要分割。
+
+支持的格式:
+    WAV: RIFF的fmt/data块
+    MP3: Xing/Info或VBRI头（VBR），否则按首帧比特率计算（CBR）
+    FLAC: STREAMINFO块中的总采样数
+    OGG: 首页的Vorbis/Opus/FLAC/Speex标识头 + 最后一页的granule position
+    M4A/MP4: moov/mvhd中的时长，trak/stsd中的声道数和采样率
+    AAC(ADTS): 根据文件开头若干帧的平均帧长估算帧数（ADTS没有总长度信息）
+"""
+import os
+import struct
+
+HEAD_SIZE = 64 * 1024  # 读取文件开头的字节数
+TAIL_SIZE = 64 * 1024  # 读取文件末尾的字节数（大于Ogg页的最大长度）
+MAX_SYNC_SEARCH = 64 * 1024  # 搜索MPEG/ADTS帧同步字的范围
+ADTS_SCAN_FRAMES = 256  # 估算ADTS时长时读取的帧数
+
+# MPEG音频比特率表（kbps），按层索引
+_MPEG1_BITRATES = {
+    1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+}
+_MPEG2_BITRATES = {
+    1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# 版本位 -> 采样率表（版本位1为保留值）
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG1
+    2: (22050, 24000, 16000),  # MPEG2
+    0: (11025, 12000, 8000),  # MPEG2.5
+}
+_ADTS_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+
+def probe_audio(file_path):
+    """解析音频文件头，获取时长、采样率和声道数
+
+    格式根据文件内容判断，不依赖扩展名。
+
+    Returns:
+        dict: duration（秒）、sample_rate、channels、codec、exact（时长是否为精确值）；
+            无法识别或文件损坏时返回None
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            head = f.read(HEAD_SIZE)
+            if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+                return _probe_wav(f, file_size)
+            if head[4:8] == b'ftyp':
+                return _probe_mp4(f, file_size)
+            if head[:4] == b'OggS':
+                return _probe_ogg(f, head, file_size)
+
+            # 跳过ID3v2标签（可能出现在MP3、FLAC和AAC文件开头）
+            offset = _id3v2_size(head)
+            if offset:
+                f.seek(offset)
+                head = f.read(HEAD_SIZE)
+            if head[:4] == b'fLaC':
+                return _probe_flac(head)
+            return _probe_mpeg_or_adts(f, head, offset, file_size)
+    except (OSError, struct.error, ValueError, IndexError, ZeroDivisionError):
+        return None
+
+def _result(duration, sample_rate, channels, codec, exact=True):
+    return {
+        'duration': duration,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'codec': codec,
+        'exact': exact
+    }
+
+def _id3v2_size(head):
+    """返回ID3v2标签的总长度，没有标签时返回0"""
+    if head[:3] != b'ID3' or len(head) < 10:
+        return 0
+    size = (head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _probe_wav(f, file_size):
+    # 依次读取块头，fmt前可能有很大的LIST等块，按长度跳过
+    offset = 12
+    byte_rate = sample_rate = channels = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'fmt ':
+            channels, sample_rate, byte_rate = struct.unpack('<HII', f.read(16)[2:12])
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            # 流式写入的WAV可能没有填写data块长度
+            data_size = min(chunk_size, file_size - offset - 8)
+            return _result(data_size / byte_rate, sample_rate, channels, 'pcm')
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+def _probe_flac(head):
+    # STREAMINFO必须是第一个元数据块，固定34字节
+    if len(head) < 42 or head[4] & 0x7F != 0:
+        return None
+    return _parse_streaminfo(head[8:42])
+
+def _parse_streaminfo(info):
+    # 第10~17字节: 采样率(20位) 声道数-1(3位) 位深-1(5位) 总采样数(36位)
+    packed = int.from_bytes(info[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate:
+        return None
+    # 总采样数为0表示编码器未写入
+    return _result(total_samples / sample_rate, sample_rate, channels, 'flac', exact=bool(total_samples))
+
+def _probe_ogg(f, head, file_size):
+    if len(head) < 28:
+        return None
+    serial = head[14:18]
+    segments = head[26]
+    packet = head[27 + segments:]
+
+    if packet[:7] == b'\x01vorbis':
+        channels = packet[11]
+        sample_rate = struct.unpack_from('<I', packet, 12)[0]
+        granule_rate, pre_skip, codec = sample_rate, 0, 'vorbis'
+    elif packet[:8] == b'OpusHead':
+        channels = packet[9]
+        pre_skip = struct.unpack_from('<H', packet, 10)[0]
+        sample_rate = struct.unpack_from('<I', packet, 12)[0] or 48000
+        # Opus的granule position固定以48kHz计
+        granule_rate, codec = 48000, 'opus'
+    elif packet[:5] == b'\x7fFLAC' and packet[9:13] == b'fLaC':
+        info = _parse_streaminfo(packet[17:51])
+        if info is None:
+            return None
+        channels, sample_rate = info['channels'], info['sample_rate']
+        granule_rate, pre_skip, codec = sample_rate, 0, 'flac'
+    elif packet[:8] == b'Speex   ':
+        sample_rate = struct.unpack_from('<I', packet, 36)[0]
+        channels = struct.unpack_from('<I', packet, 48)[0]
+        granule_rate, pre_skip, codec = sample_rate, 0, 'speex'
+    else:
+        return None
+    if not granule_rate:
+        return None
+
+    # 从文件末尾向前找同一逻辑流中最后一个带有效granule position的页
+    tail_start = max(0, file_size - TAIL_SIZE)
+    f.seek(tail_start)
+    tail = f.read(TAIL_SIZE)
+    pos = tail.rfind(b'OggS', 0, len(tail) - 26)
+    while pos >= 0:
+        granule = struct.unpack_from('<q', tail, pos + 6)[0]
+        if tail[pos + 14:pos + 18] == serial and granule >= 0:
+            return _result(max(0, granule - pre_skip) / granule_rate, sample_rate, channels, codec)
+        pos = tail.rfind(b'OggS', 0, pos)
+    return None
+
+def _iter_boxes(f, start, end):
+    """遍历[start, end)范围内的MP4 box，返回(类型, 内容起始位置, 内容结束位置)"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            # 延续到文件末尾
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+def _find_box(f, start, end, box_type):
+    for found_type, payload_start, payload_end in _iter_boxes(f, start, end):
+        if found_type == box_type:
+            return payload_start, payload_end
+    return None
+
+def _probe_mp4(f, file_size):
+    # moov可能在mdat之后，按box长度跳过，不读取媒体数据
+    moov = _find_box(f, 0, file_size, b'moov')
+    if moov is None:
+        return None
+    mvhd = _find_box(f, moov[0], moov[1], b'mvhd')
+    if mvhd is None:
+        return None
+    f.seek(mvhd[0])
+    data = f.read(32)
+    if data[0] == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', data, 12)
+    if not timescale:
+        return None
+
+    sample_rate = channels = 0
+    codec = 'mp4'
+    for box_type, trak_start, trak_end in _iter_boxes(f, moov[0], moov[1]):
+        if box_type != b'trak':
+            continue
+        mdia = _find_box(f, trak_start, trak_end, b'mdia')
+        if mdia is None:
+            continue
+        hdlr = _find_box(f, mdia[0], mdia[1], b'hdlr')
+        if hdlr is None:
+            continue
+        f.seek(hdlr[0] + 8)
+        if f.read(4) != b'soun':
+            continue
+        # 音频轨道: mdia/minf/stbl/stsd 的第一个采样描述
+        minf = _find_box(f, mdia[0], mdia[1], b'minf')
+        stbl = minf and _find_box(f, minf[0], minf[1], b'stbl')
+        stsd = stbl and _find_box(f, stbl[0], stbl[1], b'stsd')
+        if stsd:
+            f.seek(stsd[0] + 8)
+            entry = f.read(36)
+            if len(entry) >= 36:
+                codec = entry[4:8].decode('latin-1').strip()
+                channels = struct.unpack_from('>H', entry, 24)[0]
+                sample_rate = struct.unpack_from('>I', entry, 32)[0] >> 16
+        break
+    return _result(duration / timescale, sample_rate, channels, codec)
+
+def _parse_mpeg_header(data, pos):
+    """解析MPEG音频帧头，返回(帧长, 每帧采样数, 采样率, 声道数, 比特率kbps, 版本位, 层)，无效时返回None"""
+    h = struct.unpack_from('>I', data, pos)[0]
+    if h >> 21 != 0x7FF:
+        return None
+    version = (h >> 19) & 3
+    layer = 4 - ((h >> 17) & 3)
+    bitrate_index = (h >> 12) & 0xF
+    rate_index = (h >> 10) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (h >> 9) & 1
+    channels = 1 if (h >> 6) & 3 == 3 else 2
+    sample_rate = _MPEG_SAMPLE_RATES[version][rate_index]
+    bitrate = (_MPEG1_BITRATES if version == 3 else _MPEG2_BITRATES)[layer][bitrate_index]
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 3 else 576
+        frame_length = samples // 8 * bitrate * 1000 // sample_rate + padding
+    return frame_length, samples, sample_rate, channels, bitrate, version, layer
+
+def _parse_adts_header(data, pos):
+    """解析ADTS帧头，返回(帧长, 每帧采样数, 采样率, 声道数)，无效时返回None"""
+    if data[pos] != 0xFF or data[pos + 1] & 0xF6 != 0xF0:
+        return None
+    rate_index = (data[pos + 2] >> 2) & 0xF
+    if rate_index >= len(_ADTS_SAMPLE_RATES):
+        return None
+    channels = (data[pos + 2] & 1) << 2 | data[pos + 3] >> 6
+    frame_length = (data[pos + 3] & 3) << 11 | data[pos + 4] << 3 | data[pos + 5] >> 5
+    if frame_length < 7:
+        return None
+    blocks = (data[pos + 6] & 3) + 1
+    return frame_length, 1024 * blocks, _ADTS_SAMPLE_RATES[rate_index], channels
+
+def _probe_mpeg_or_adts(f, head, offset, file_size):
+    limit = min(len(head) - 7, MAX_SYNC_SEARCH)
+    pos = head.find(b'\xff')
+    while 0 <= pos < limit:
+        if head[pos + 1] & 0xE0 == 0xE0:
+            if head[pos + 1] & 0x06 == 0:
+                frame = _parse_adts_header(head, pos)
+                if frame and _confirm_next(head, pos + frame[0], _parse_adts_header):
+                    return _probe_adts(head, pos, offset, file_size)
+            else:
+                frame = _parse_mpeg_header(head, pos)
+                if frame and _confirm_next(head, pos + frame[0], _parse_mpeg_header):
+                    return _probe_mp3(f, head, pos, frame, offset, file_size)
+        pos = head.find(b'\xff', pos + 1)
+    return None
+
+def _confirm_next(head, next_pos, parser):
+    """检查下一帧的帧头，避免把数据中偶然出现的同步字当作帧头"""
+    if next_pos + 7 > len(head):
+        return True
+    return parser(head, next_pos) is not None
+
+def _probe_mp3(f, head, pos, frame, offset, file_size):
+    frame_length, samples, sample_rate, channels, bitrate, version, layer = frame
+
+    # VBR文件的第一帧是Xing/Info或VBRI头，记录了总帧数
+    frames = None
+    if layer == 3:
+        if version == 3:
+            side_info = 17 if channels == 1 else 32
+        else:
+            side_info = 9 if channels == 1 else 17
+        xing = pos + 4 + side_info
+        if head[xing:xing + 4] in (b'Xing', b'Info') and len(head) >= xing + 12:
+            flags = struct.unpack_from('>I', head, xing + 4)[0]
+            if flags & 1:
+                frames = struct.unpack_from('>I', head, xing + 8)[0]
+        elif head[pos + 36:pos + 40] == b'VBRI' and len(head) >= pos + 54:
+            frames = struct.unpack_from('>I', head, pos + 50)[0]
+    if frames:
+        return _result(frames * samples / sample_rate, sample_rate, channels, 'mp3')
+
+    # CBR: 按比特率计算，去掉末尾的ID3v1标签
+    audio_bytes = file_size - offset - pos
+    if file_size >= 128:
+        f.seek(file_size - 128)
+        if f.read(3) == b'TAG':
+            audio_bytes -= 128
+    return _result(audio_bytes * 8 / (bitrate * 1000), sample_rate, channels, 'mp3')
+
+def _probe_adts(head, pos, offset, file_size):
+    # ADTS没有记录总帧数，用开头若干帧的平均帧长估算
+    first = _parse_adts_header(head, pos)
+    sample_rate, channels = first[2], first[3]
+    start = pos
+    total_samples = frames = 0
+    while pos + 7 <= len(head) and frames < ADTS_SCAN_FRAMES:
+        if head[pos] != 0xFF or head[pos + 1] & 0xF6 != 0xF0:
+            break
+        frame_length = (head[pos + 3] & 3) << 11 | head[pos + 4] << 3 | head[pos + 5] >> 5
+        if frame_length < 7:
+            break
+        total_samples += 1024 * ((head[pos + 6] & 3) + 1)
+        frames += 1
+        pos += frame_length
+    scanned = pos - start
+    audio_bytes = file_size - offset - start
+    exact = scanned >= audio_bytes
+    if not exact:
+        total_samples = total_samples * audio_bytes / scanned
+    return _result(total_samples / sample_rate, sample_rate, channels, 'aac', exact=exact)
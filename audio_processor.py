@@ -2,6 +2,24 @@ import os
 import wave
 import struct
 import math
+import array
+import time
+import bisect
+import shutil
+import tempfile
+
+import warnings
+from audio_probe import probe_audio
+from logger import get_logger
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        import audioop
+except ImportError:  # Python 3.13移除了audioop
+    audioop = None
+
+logger = get_logger(__name__)
 
 class AudioProcessor:
     """音频处理类，用于处理音频文件的验证、转换和分割"""
@@ -12,6 +30,29 @@ class AudioProcessor:
     # ASR服务限制
     MAX_AUDIO_DURATION = 300  # 5分钟，根据腾讯云API限制
     
+    # 分割参数
+    SPLIT_CHUNK_FRAMES = 65536  # 分割时每次读取的帧数
+    CUT_SEARCH_WINDOW = 2.0  # 在分割边界前寻找低能量切点的范围（秒）
+    CUT_ENERGY_WINDOW = 0.02  # 计算能量的窗口长度（秒）
+    
+    # 静音裁剪参数
+    VAD_FRAME = 0.03  # 计算能量的帧长（秒）
+    VAD_MIN_SILENCE = 1.0  # 短于该时长的静音视为语音内的停顿，不裁剪（秒）
+    VAD_PADDING = 0.2  # 裁剪后在每段语音前后保留的静音（秒）
+    VAD_NOISE_PERCENTILE = 0.1  # 按帧能量的该分位数估计底噪
+    VAD_THRESHOLD_RATIO = 3.0  # 语音能量阈值与底噪之比
+    VAD_MIN_THRESHOLD = 200  # 能量阈值下限（按16位采样计）
+    VAD_MIN_REDUCTION = 0.05  # 可裁剪的静音少于该比例时不裁剪
+    
+    # 上传前预处理参数
+    DEFAULT_ENGINE_SAMPLE_RATE = 16000  # 无法从引擎模型类型识别采样率时使用
+    # 压缩编码: (文件扩展名, pydub导出格式, 导出参数)，均为腾讯云录音文件识别支持的格式
+    NORMALIZE_CODECS = {
+        'wav': ('.wav', 'wav', {}),
+        'mp3': ('.mp3', 'mp3', {'bitrate': '32k'}),
+        'ogg-opus': ('.ogg', 'ogg', {'codec': 'libopus', 'bitrate': '24k'}),
+    }
+    
     @staticmethod
     def is_supported_format(file_path):
         """检查文件格式是否支持"""
@@ -38,9 +79,18 @@ class AudioProcessor:
                         'file_size': os.path.getsize(file_path) / (1024 * 1024)  # MB
                     }
             else:
-                # 对于其他格式，只返回文件大小和估计的时长
-                # 注意：这里无法准确获取非WAV格式的时长，需要用户确认
+                # 其他格式解析文件头获取准确信息，不需要解码
                 file_size = os.path.getsize(file_path) / (1024 * 1024)  # MB
+                probed = probe_audio(file_path)
+                if probed:
+                    return {
+                        'duration': probed['duration'],
+                        'sample_rate': probed['sample_rate'],
+                        'channels': probed['channels'],
+                        'file_size': file_size
+                    }
+                
+                # 无法解析文件头时只返回文件大小和估计的时长
                 # 简单估计：假设1分钟约5MB（这只是一个粗略的估计）
                 estimated_duration = min(file_size * 12, 3600)  # 最多估计1小时
                 
@@ -51,7 +101,16 @@ class AudioProcessor:
                     'file_size': file_size
                 }
         except Exception as e:
-            print(f"获取音频信息失败: {str(e)}")
+            # wave模块不支持的WAV（如浮点或WAVE_FORMAT_EXTENSIBLE）尝试直接解析文件头
+            probed = probe_audio(file_path)
+            if probed:
+                return {
+                    'duration': probed['duration'],
+                    'sample_rate': probed['sample_rate'],
+                    'channels': probed['channels'],
+                    'file_size': os.path.getsize(file_path) / (1024 * 1024)  # MB
+                }
+            logger.warning("获取音频信息失败: %s", e)
             # 返回基本信息，只包含文件大小
             return {
                 'duration': 0,  # 未知
@@ -74,12 +133,16 @@ class AudioProcessor:
         if file_size > 100:
             return False, f"文件大小超过限制（当前: {file_size:.2f}MB，限制: 100MB）"
         
-        # 注意：由于没有音频库，无法准确验证时长
-        # 这里简化处理，假设文件可能过长，需要分割
-        # 对于非WAV文件，建议用户自行确保时长合适
+        # 非WAV文件解析文件头获取时长，避免超长音频上传完才被服务端拒绝
         file_ext = os.path.splitext(file_path)[1].lower()
         if file_ext != '.wav':
-            return True, "已验证文件格式和大小，但无法准确验证时长，建议音频时长不超过5分钟"
+            probed = probe_audio(file_path)
+            if not probed:
+                return True, "已验证文件格式和大小，但无法准确验证时长，建议音频时长不超过5分钟"
+            duration = probed['duration']
+            if duration > AudioProcessor.MAX_AUDIO_DURATION:
+                return False, f"音频时长超过限制（当前: {duration:.2f}秒，限制: {AudioProcessor.MAX_AUDIO_DURATION}秒）"
+            return True, "验证通过"
         
         # 尝试获取WAV文件时长
         try:
@@ -97,11 +160,521 @@ class AudioProcessor:
         return True, "验证通过"
     
     @staticmethod
-    def split_large_audio(file_path):
-        """简化版分割功能提示
+    def _frame_energy(data, sampwidth):
+        """计算一段PCM数据的均方根能量"""
+        if not data:
+            return 0
+        if audioop is not None:
+            if sampwidth == 1:
+                # 8位WAV为无符号数据，先去掉直流偏置
+                data = audioop.bias(data, 1, -128)
+            return audioop.rms(data, sampwidth)
+        # 无audioop时（Python 3.13+）退化为array计算
+        if sampwidth == 1:
+            samples = [b - 128 for b in data]
+        elif sampwidth == 2:
+            samples = array.array('h', data)
+        elif sampwidth == 4:
+            samples = array.array('i', data)
+        else:
+            samples = [int.from_bytes(data[i:i + sampwidth], 'little', signed=True)
+                       for i in range(0, len(data) - sampwidth + 1, sampwidth)]
+        if not samples:
+            return 0
+        return int(math.sqrt(sum(x * x for x in samples) / len(samples)))
+    
+    @staticmethod
+    def _find_quiet_cut(window_data, frame_size, sampwidth, rate):
+        """在搜索窗口中寻找能量最低的位置，返回切点（以帧为单位）"""
+        total_frames = len(window_data) // frame_size
+        step = max(1, int(rate * AudioProcessor.CUT_ENERGY_WINDOW))
+        if total_frames <= step:
+            return total_frames
+        
+        best_cut = total_frames
+        best_energy = None
+        # 从后往前搜索，能量相同时优先选择靠后的切点，使片段尽量接近最大时长
+        for start in range(total_frames - step, -1, -step):
+            chunk = window_data[start * frame_size:(start + step) * frame_size]
+            energy = AudioProcessor._frame_energy(chunk, sampwidth)
+            if best_energy is None or energy < best_energy:
+                best_energy = energy
+                best_cut = start + step // 2
+        return best_cut
+    
+    @staticmethod
+    def split_large_audio(file_path, max_duration=None, output_dir=None, smart_cut=True, search_window=None):
+        """流式分割WAV文件
+        
+        按块读取音频帧并写入不超过max_duration秒的片段文件，内存占用与文件大小无关。
+        smart_cut为True时，会在每个分割边界之前的search_window秒内寻找能量最低的位置作为切点，
+        避免把一个字切成两半。
+        
+        Args:
+            file_path: 音频文件路径（仅支持WAV格式）
+            max_duration: 每个片段的最大时长（秒），默认为MAX_AUDIO_DURATION
+            output_dir: 片段输出目录，默认在系统临时目录中新建"<文件名>_segments_*"目录，
+                调用方处理完成后负责删除（见remove_segments）
+            smart_cut: 是否在低能量位置切分
+            search_window: 切点搜索范围（秒），默认为CUT_SEARCH_WINDOW
+        
+        Returns:
+            list: 片段文件路径列表（按时间顺序），失败时返回空列表
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext != '.wav':
+            logger.warning("提示: 目前仅支持自动分割WAV文件。请手动将'%s'分割为不超过5分钟的片段。", file_path)
+            return []
+        
+        max_duration = max_duration or AudioProcessor.MAX_AUDIO_DURATION
+        if search_window is None:
+            search_window = AudioProcessor.CUT_SEARCH_WINDOW
+        # 搜索范围不超过片段时长的四分之一，保证每个片段都有足够长度
+        search_window = min(search_window, max_duration / 4)
+        
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        if output_dir is None:
+            # 不写在源文件旁，避免片段残留在用户目录中并被批量处理或监控目录再次当作输入
+            output_dir = tempfile.mkdtemp(prefix=f"{base_name}_segments_")
+            created_dir = True
+        else:
+            created_dir = False
+        
+        segments = []
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            with wave.open(file_path, 'rb') as reader:
+                params = reader.getparams()
+                rate = params.framerate
+                sampwidth = params.sampwidth
+                frame_size = params.nchannels * sampwidth
+                total_frames = params.nframes
+                if rate <= 0 or frame_size <= 0:
+                    logger.error("无效的WAV参数: %s", file_path)
+                    return []
+                
+                max_frames = int(max_duration * rate)
+                search_frames = int(search_window * rate) if smart_cut else 0
+                chunk_frames = AudioProcessor.SPLIT_CHUNK_FRAMES
+                
+                consumed = 0  # 已从源文件读取的帧数
+                carry = b''  # 上一个片段切点之后剩余的数据，属于下一个片段的开头
+                index = 0
+                while consumed < total_frames or carry:
+                    index += 1
+                    segment_path = os.path.join(output_dir, f"{base_name}_part{index:03d}.wav")
+                    with wave.open(segment_path, 'wb') as writer:
+                        writer.setparams(params._replace(nframes=0))
+                        writer.writeframesraw(carry)
+                        written = len(carry) // frame_size
+                        carry = b''
+                        
+                        remaining = total_frames - consumed
+                        if written + remaining <= max_frames:
+                            # 最后一个片段，直接写完剩余数据
+                            body_frames = remaining
+                            search_frames_here = 0
+                        else:
+                            body_frames = max_frames - written - search_frames
+                            search_frames_here = search_frames
+                        
+                        # 按块复制片段主体
+                        while body_frames > 0:
+                            data = reader.readframes(min(chunk_frames, body_frames))
+                            if not data:
+                                # 数据比文件头声明的短（文件被截断），读到的数据即为全部
+                                total_frames = consumed
+                                break
+                            n = len(data) // frame_size
+                            writer.writeframesraw(data)
+                            consumed += n
+                            written += n
+                            body_frames -= n
+                        
+                        # 在边界附近寻找低能量切点
+                        if search_frames_here > 0 and consumed < total_frames:
+                            window = reader.readframes(search_frames_here)
+                            window_frames = len(window) // frame_size
+                            consumed += window_frames
+                            if window_frames < search_frames_here:
+                                # 文件被截断，剩余数据全部写入当前片段
+                                total_frames = consumed
+                                cut = window_frames
+                            else:
+                                cut = AudioProcessor._find_quiet_cut(window, frame_size, sampwidth, rate)
+                            writer.writeframesraw(window[:cut * frame_size])
+                            written += cut
+                            carry = window[cut * frame_size:]
+                        # wave会在关闭时根据实际写入帧数修正头部
+                    
+                    if written == 0:
+                        # 截断的文件恰好在片段边界结束，不保留空片段
+                        os.remove(segment_path)
+                        break
+                    segments.append(segment_path)
+                    if not carry and consumed >= total_frames:
+                        break
+            
+            logger.info("音频已分割为 %s 个片段，保存在: %s", len(segments), output_dir)
+            return segments
+        except Exception as e:
+            logger.error("分割音频文件失败: %s", e)
+            if created_dir:
+                shutil.rmtree(output_dir, ignore_errors=True)
+            return []
+    
+    @staticmethod
+    def _deinterleave(data, nchannels, sampwidth):
+        """把交错存储的PCM数据拆分为各声道的数据
+        
+        每个声道的每个采样字节位置用一次步长切片整体复制，不逐个采样循环。
+        """
+        frame_size = nchannels * sampwidth
+        length = len(data) // frame_size * frame_size
+        channels = []
+        for channel in range(nchannels):
+            out = bytearray(length // nchannels)
+            for byte in range(sampwidth):
+                out[byte::sampwidth] = data[channel * sampwidth + byte:length:frame_size]
+            channels.append(bytes(out))
+        return channels
+    
+    @staticmethod
+    def split_channels(file_path, output_dir=None):
+        """把多声道WAV按声道拆分为单声道文件
+        
+        按块读取音频帧并拆分到各声道文件，内存占用与文件大小无关。采样率和位深保持不变，
+        各声道文件的时间轴与原始音频一致。
         
-        注意：由于没有音频处理库，无法实际分割文件
-        这里返回提示信息，建议用户手动分割
+        Args:
+            file_path: 音频文件路径（仅支持WAV格式）
+            output_dir: 声道文件目录，默认为系统临时目录
+        
+        Returns:
+            list: 各声道文件路径（按声道顺序），不是多声道WAV或拆分失败时返回空列表；
+                调用方负责删除声道文件
         """
-        print(f"提示: 由于环境限制，无法自动分割大文件。请手动将'{file_path}'分割为不超过5分钟的片段。")
-        return []
\ No newline at end of file
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext != '.wav':
+            logger.warning("提示: 目前仅支持按声道拆分WAV文件: %s", file_path)
+            return []
+        
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        paths = []
+        writers = []
+        try:
+            with wave.open(file_path, 'rb') as reader:
+                params = reader.getparams()
+                if params.nchannels < 2:
+                    return []
+                for channel in range(params.nchannels):
+                    fd, path = tempfile.mkstemp(suffix='.wav', prefix=f"{base_name}_ch{channel + 1}_", dir=output_dir)
+                    os.close(fd)
+                    paths.append(path)
+                    writer = wave.open(path, 'wb')
+                    writers.append(writer)
+                    writer.setparams(params._replace(nchannels=1, nframes=0))
+                while True:
+                    data = reader.readframes(AudioProcessor.SPLIT_CHUNK_FRAMES)
+                    if not data:
+                        break
+                    for writer, channel_data in zip(writers, AudioProcessor._deinterleave(data, params.nchannels, params.sampwidth)):
+                        writer.writeframesraw(channel_data)
+            # wave会在关闭时根据实际写入帧数修正头部
+            for writer in writers:
+                writer.close()
+        except Exception as e:
+            for writer in writers:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            logger.error("按声道拆分音频失败: %s", e)
+            return []
+        
+        logger.info("音频已按声道拆分为 %s 个文件", len(paths))
+        return paths
+    
+    @staticmethod
+    def remove_segments(segments):
+        """删除split_large_audio生成的片段文件及其所在目录"""
+        if not segments:
+            return
+        segment_dir = os.path.dirname(segments[0])
+        for path in segments:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        try:
+            os.rmdir(segment_dir)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def get_engine_sample_rate(engine_model_type):
+        """根据引擎模型类型（如16k_zh、8k_en）返回引擎使用的采样率"""
+        prefix = (engine_model_type or '').split('_', 1)[0].lower()
+        if prefix.endswith('k') and prefix[:-1].isdigit():
+            return int(prefix[:-1]) * 1000
+        return AudioProcessor.DEFAULT_ENGINE_SAMPLE_RATE
+    
+    @staticmethod
+    def normalize_for_asr(file_path, engine_model_type="16k_zh", codec=None, output_dir=None):
+        """上传前将音频转换为引擎原生格式
+        
+        重采样到引擎采样率（只降不升）、混为单声道、16位采样，codec不为空时再压缩编码，
+        以减少上传的数据量。WAV且不压缩时用audioop流式转换，内存占用与文件大小无关；
+        其他情况使用pydub（压缩编码需要ffmpeg）。已经符合要求、无法转换或转换后
+        不比原文件小时直接使用原文件。
+        
+        Args:
+            file_path: 音频文件路径
+            engine_model_type: 引擎模型类型，决定目标采样率
+            codec: 压缩编码，NORMALIZE_CODECS中的键，None表示输出WAV
+            output_dir: 转换结果目录，默认为系统临时目录
+        
+        Returns:
+            tuple: (待上传的文件路径, 统计信息)。统计信息包含original_bytes、output_bytes、
+                bytes_saved、encode_time和converted；converted为True时调用方负责删除转换结果
+        """
+        if codec is not None and codec not in AudioProcessor.NORMALIZE_CODECS:
+            raise ValueError(f"不支持的压缩编码: {codec}（可选: {', '.join(AudioProcessor.NORMALIZE_CODECS)}）")
+        
+        original_bytes = os.path.getsize(file_path)
+        stats = {
+            'original_bytes': original_bytes,
+            'output_bytes': original_bytes,
+            'bytes_saved': 0,
+            'encode_time': 0.0,
+            'converted': False
+        }
+        target_rate = AudioProcessor.get_engine_sample_rate(engine_model_type)
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        wav_params = None
+        if file_ext == '.wav':
+            try:
+                with wave.open(file_path, 'rb') as wf:
+                    wav_params = wf.getparams()
+            except Exception:
+                wav_params = None
+        if codec in (None, 'wav'):
+            if wav_params is None:
+                # 已压缩的格式解码成WAV只会变大
+                return file_path, stats
+            if wav_params.nchannels == 1 and wav_params.sampwidth == 2 and wav_params.framerate <= target_rate:
+                return file_path, stats
+        
+        extension = AudioProcessor.NORMALIZE_CODECS[codec or 'wav'][0]
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        fd, output_path = tempfile.mkstemp(suffix=extension, prefix=f"{base_name}_", dir=output_dir)
+        os.close(fd)
+        
+        start = time.perf_counter()
+        try:
+            if (codec in (None, 'wav') and audioop is not None and wav_params is not None
+                    and wav_params.nchannels in (1, 2)):
+                AudioProcessor._normalize_wav(file_path, output_path, target_rate)
+            else:
+                AudioProcessor._normalize_with_pydub(file_path, output_path, target_rate, codec or 'wav')
+        except Exception as e:
+            os.remove(output_path)
+            logger.warning("音频预处理失败，将上传原文件: %s", e)
+            return file_path, stats
+        encode_time = time.perf_counter() - start
+        
+        output_bytes = os.path.getsize(output_path)
+        if output_bytes >= original_bytes:
+            os.remove(output_path)
+            stats['encode_time'] = encode_time
+            return file_path, stats
+        
+        stats.update(output_bytes=output_bytes, bytes_saved=original_bytes - output_bytes,
+                     encode_time=encode_time, converted=True)
+        logger.info("音频预处理完成: %d -> %d 字节（节省 %.1f%%），耗时 %.2f秒",
+                    original_bytes, output_bytes, stats['bytes_saved'] / original_bytes * 100, encode_time)
+        return output_path, stats
+    
+    @staticmethod
+    def _normalize_wav(file_path, output_path, target_rate):
+        """用audioop按块转换WAV：16位、单声道、不高于target_rate的采样率"""
+        with wave.open(file_path, 'rb') as reader:
+            params = reader.getparams()
+            rate = params.framerate
+            sampwidth = params.sampwidth
+            out_rate = min(rate, target_rate)
+            with wave.open(output_path, 'wb') as writer:
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(out_rate)
+                state = None
+                while True:
+                    data = reader.readframes(AudioProcessor.SPLIT_CHUNK_FRAMES)
+                    if not data:
+                        break
+                    if sampwidth == 1:
+                        # 8位WAV为无符号数据
+                        data = audioop.bias(data, 1, -128)
+                    if sampwidth != 2:
+                        data = audioop.lin2lin(data, sampwidth, 2)
+                    if params.nchannels == 2:
+                        data = audioop.tomono(data, 2, 0.5, 0.5)
+                    if out_rate != rate:
+                        # ratecv在块之间保留滤波状态，分块转换与整体转换结果一致
+                        data, state = audioop.ratecv(data, 2, 1, rate, out_rate, state)
+                    writer.writeframesraw(data)
+    
+    @staticmethod
+    def _normalize_with_pydub(file_path, output_path, target_rate, codec):
+        """使用pydub解码并转换音频，按codec导出"""
+        try:
+            from pydub import AudioSegment
+        except ImportError:
+            raise Exception("未安装pydub，请执行 pip install pydub 并安装ffmpeg")
+        audio = AudioSegment.from_file(file_path)
+        audio = audio.set_channels(1).set_sample_width(2)
+        if audio.frame_rate > target_rate:
+            audio = audio.set_frame_rate(target_rate)
+        _, export_format, export_args = AudioProcessor.NORMALIZE_CODECS[codec]
+        audio.export(output_path, format=export_format, **export_args)
+    
+    @staticmethod
+    def _frame_energies(reader, params, window):
+        """按window帧为一组计算整个WAV的能量序列，能量统一换算到16位采样的量级"""
+        frame_size = params.nchannels * params.sampwidth
+        # 能量按位深换算，使阈值与采样位数无关
+        scale = 2.0 ** (8 * params.sampwidth - 16)
+        chunk_windows = max(1, AudioProcessor.SPLIT_CHUNK_FRAMES // window)
+        energies = []
+        reader.rewind()
+        while True:
+            data = reader.readframes(chunk_windows * window)
+            if not data:
+                break
+            step = window * frame_size
+            for start in range(0, len(data), step):
+                energies.append(AudioProcessor._frame_energy(data[start:start + step], params.sampwidth) / scale)
+        return energies
+    
+    @staticmethod
+    def _speech_ranges(energies, threshold, min_silence_windows, padding_windows):
+        """根据帧能量计算需要保留的范围（以能量帧为单位），长静音只保留两端padding"""
+        count = len(energies)
+        ranges = []
+        i = 0
+        while i < count:
+            is_speech = energies[i] >= threshold
+            j = i
+            while j < count and (energies[j] >= threshold) == is_speech:
+                j += 1
+            if is_speech or j - i < min_silence_windows:
+                ranges.append((i, j))
+            else:
+                # 长静音：开头和结尾的静音不保留外侧padding
+                if i > 0:
+                    ranges.append((i, min(j, i + padding_windows)))
+                if j < count:
+                    ranges.append((max(i, j - padding_windows), j))
+            i = j
+        
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    @staticmethod
+    def trim_silence(file_path, output_dir=None, min_silence=None, padding=None, threshold=None):
+        """裁剪WAV中的长静音，减少上传和识别的数据量
+        
+        按VAD_FRAME计算每帧能量，底噪按能量分位数估计，低于阈值且持续超过min_silence秒的
+        区域压缩为前后各padding秒。返回的时间偏移映射用于把识别结果中的时间戳换算回原始音频。
+        
+        Args:
+            file_path: 音频文件路径（仅支持WAV格式）
+            output_dir: 裁剪结果目录，默认为系统临时目录
+            min_silence: 最短裁剪静音时长（秒），默认为VAD_MIN_SILENCE
+            padding: 每段语音前后保留的静音（秒），默认为VAD_PADDING
+            threshold: 能量阈值（按16位采样计），默认根据底噪自动估计
+        
+        Returns:
+            tuple: (待上传的文件路径, 时间偏移映射, 统计信息)。时间偏移映射为
+                [(裁剪后起始秒, 原始起始秒, 时长秒), ...]，未裁剪时为None，此时路径为原文件
+        """
+        stats = {'original_duration': 0.0, 'trimmed_duration': 0.0, 'removed_ratio': 0.0}
+        if os.path.splitext(file_path)[1].lower() != '.wav':
+            return file_path, None, stats
+        min_silence = AudioProcessor.VAD_MIN_SILENCE if min_silence is None else min_silence
+        padding = AudioProcessor.VAD_PADDING if padding is None else padding
+        
+        output_path = None
+        try:
+            with wave.open(file_path, 'rb') as reader:
+                params = reader.getparams()
+                rate = params.framerate
+                if rate <= 0 or params.nframes == 0:
+                    return file_path, None, stats
+                stats['original_duration'] = stats['trimmed_duration'] = params.nframes / rate
+                window = max(1, int(rate * AudioProcessor.VAD_FRAME))
+                
+                energies = AudioProcessor._frame_energies(reader, params, window)
+                if threshold is None:
+                    ordered = sorted(energies)
+                    noise = ordered[int(len(ordered) * AudioProcessor.VAD_NOISE_PERCENTILE)]
+                    threshold = max(AudioProcessor.VAD_MIN_THRESHOLD, noise * AudioProcessor.VAD_THRESHOLD_RATIO)
+                ranges = AudioProcessor._speech_ranges(
+                    energies, threshold,
+                    max(1, int(round(min_silence / AudioProcessor.VAD_FRAME))),
+                    int(round(padding / AudioProcessor.VAD_FRAME)))
+                
+                # 换算为采样帧
+                frame_ranges = [(start * window, min(end * window, params.nframes)) for start, end in ranges]
+                kept_frames = sum(end - start for start, end in frame_ranges)
+                if not kept_frames or kept_frames > params.nframes * (1 - AudioProcessor.VAD_MIN_REDUCTION):
+                    # 全部为静音时交给服务端处理，静音很少时不值得裁剪
+                    return file_path, None, stats
+                
+                base_name = os.path.splitext(os.path.basename(file_path))[0]
+                fd, output_path = tempfile.mkstemp(suffix='.wav', prefix=f"{base_name}_trimmed_", dir=output_dir)
+                os.close(fd)
+                offset_map = []
+                written = 0
+                with wave.open(output_path, 'wb') as writer:
+                    writer.setparams(params._replace(nframes=0))
+                    for start, end in frame_ranges:
+                        offset_map.append((written / rate, start / rate, (end - start) / rate))
+                        reader.setpos(start)
+                        remaining = end - start
+                        while remaining > 0:
+                            data = reader.readframes(min(AudioProcessor.SPLIT_CHUNK_FRAMES, remaining))
+                            if not data:
+                                break
+                            writer.writeframesraw(data)
+                            remaining -= len(data) // (params.nchannels * params.sampwidth)
+                        written += end - start
+        except Exception as e:
+            if output_path and os.path.exists(output_path):
+                os.remove(output_path)
+            logger.warning("裁剪静音失败，将上传原文件: %s", e)
+            return file_path, None, stats
+        
+        stats['trimmed_duration'] = written / rate
+        stats['removed_ratio'] = 1 - written / params.nframes
+        logger.info("静音裁剪完成: %.1f秒 -> %.1f秒（去除 %.1f%%）",
+                    stats['original_duration'], stats['trimmed_duration'], stats['removed_ratio'] * 100)
+        return output_path, offset_map, stats
+    
+    @staticmethod
+    def map_trimmed_time(offset_map, seconds):
+        """把裁剪后音频上的时间（秒）换算为原始音频上的时间"""
+        if not offset_map:
+            return seconds
+        index = bisect.bisect_right([entry[0] for entry in offset_map], seconds) - 1
+        trimmed_start, original_start, duration = offset_map[max(0, index)]
+        return original_start + min(max(0.0, seconds - trimmed_start), duration)
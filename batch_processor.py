@@ -0,0 +1,211 @@
+import os
+import glob
+import json
+import time
+import queue
+import threading
+from audio_processor import AudioProcessor
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+def collect_input_files(inputs, manifest=None):
+    """收集批量处理的输入文件
+    
+    Args:
+        inputs: 路径列表，可以是文件、目录（递归查找支持的音频文件）或通配符模式
+        manifest: 清单文件路径，每行一个音频文件路径，#开头的行为注释
+    
+    Returns:
+        list: 去重后的音频文件路径列表，保持输入顺序
+    """
+    candidates = []
+    for item in inputs or []:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                stems = {os.path.splitext(name)[0] for name in files}
+                for name in dirs:
+                    if name.endswith("_segments") and name[:-len("_segments")] in stems:
+                        logger.warning("目录 %s 可能是旧版本遗留的分割片段，其中的文件也会被转写",
+                                       os.path.join(root, name))
+                for name in sorted(files):
+                    candidates.append(os.path.join(root, name))
+        elif glob.has_magic(item):
+            candidates.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            candidates.append(item)
+    
+    if manifest:
+        manifest_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                # 清单中的相对路径以清单文件所在目录为基准
+                if not os.path.isabs(line):
+                    line = os.path.join(manifest_dir, line)
+                candidates.append(line)
+    
+    files = []
+    seen = set()
+    for path in candidates:
+        if not os.path.isfile(path) or not AudioProcessor.is_supported_format(path):
+            continue
+        key = os.path.abspath(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        files.append(path)
+    return files
+
+class BatchProcessor:
+    """批量转写处理器
+    
+    在同一进程内通过一个工作队列和多个工作线程处理大量音频文件，
+    避免每个文件重复启动解释器、导入SDK和初始化客户端。
+    """
+    
+    SUMMARY_FILE_NAME = "batch_summary.json"
+    
+    def __init__(self, workers=4, output_dir=None, engine_model_type="16k_zh", remove_timestamp=True, jobs=1, process_func=None, cache=None, trim_silence=False, resume=False, split_channels=False, **api_kwargs):
+        """
+        Args:
+            workers: 同时处理的文件数
+            output_dir: 结果输出目录，None则将结果保存在每个音频文件旁
+            engine_model_type: 引擎模型类型
+            remove_timestamp: 是否移除时间戳
+            jobs: 单个长音频分割后片段的并发数
+            process_func: 处理单个文件的函数，默认使用main.process_audio_to_text
+            cache: TranscriptCache实例，所有工作线程共享
+            trim_silence: 上传前是否裁剪长静音
+            resume: 是否从每个输出文件旁的任务日志恢复
+            split_channels: 多声道WAV是否按声道分别识别
+            api_kwargs: 传给process_func的腾讯云API密钥参数
+        """
+        self.workers = max(1, workers)
+        self.output_dir = output_dir
+        self.engine_model_type = engine_model_type
+        self.remove_timestamp = remove_timestamp
+        self.jobs = jobs
+        self.cache = cache
+        self.trim_silence = trim_silence
+        self.resume = resume
+        self.split_channels = split_channels
+        self.api_kwargs = api_kwargs
+        if process_func is None:
+            from main import process_audio_to_text
+            process_func = process_audio_to_text
+        self.process_func = process_func
+        
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._records = []
+    
+    def get_output_path(self, audio_file_path, base_dir=None):
+        """计算输出文件路径，指定输出目录时保留相对于输入根目录的子目录结构"""
+        if self.output_dir is None:
+            return f"{os.path.splitext(audio_file_path)[0]}_transcript.txt"
+        if base_dir:
+            relative = os.path.relpath(os.path.abspath(audio_file_path), base_dir)
+        else:
+            relative = os.path.basename(audio_file_path)
+        return os.path.join(self.output_dir, f"{os.path.splitext(relative)[0]}_transcript.txt")
+    
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            index, audio_file_path, output_file = item
+            start = time.time()
+            error = None
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+                success = self.process_func(audio_file_path, output_file,
+                                            engine_model_type=self.engine_model_type,
+                                            remove_timestamp=self.remove_timestamp,
+                                            jobs=self.jobs, cache=self.cache,
+                                            trim_silence=self.trim_silence, resume=self.resume,
+                                            split_channels=self.split_channels,
+                                            **self.api_kwargs)
+            except Exception as e:
+                success = False
+                error = str(e)
+            elapsed = time.time() - start
+            
+            record = {
+                "index": index,
+                "input": audio_file_path,
+                "output": output_file if success else None,
+                "success": bool(success),
+                "elapsed": round(elapsed, 3),
+                "error": error
+            }
+            with self._lock:
+                self._records.append(record)
+                done = len(self._records)
+            logger.info("[%d] %s: %s (%.1fs)", done, '成功' if success else '失败', audio_file_path, elapsed,
+                        extra={"file": audio_file_path, "success": success, "elapsed": elapsed})
+            self._queue.task_done()
+    
+    def run(self, files):
+        """处理所有文件并返回汇总信息"""
+        self._records = []
+        if not files:
+            logger.warning("没有找到可处理的音频文件")
+            return self._build_summary(0, 0.0)
+        
+        base_dir = None
+        if self.output_dir is not None:
+            base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+        
+        logger.info("批量处理 %s 个文件，工作线程数: %s", len(files), self.workers)
+        start = time.time()
+        
+        threads = []
+        for _ in range(min(self.workers, len(files))):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            threads.append(thread)
+        
+        for index, audio_file_path in enumerate(files):
+            self._queue.put((index, audio_file_path, self.get_output_path(audio_file_path, base_dir)))
+        for _ in threads:
+            self._queue.put(None)
+        
+        self._queue.join()
+        for thread in threads:
+            thread.join()
+        
+        summary = self._build_summary(len(files), time.time() - start)
+        self.save_summary(summary)
+        return summary
+    
+    def _build_summary(self, total, elapsed):
+        records = sorted(self._records, key=lambda r: r["index"])
+        succeeded = sum(1 for r in records if r["success"])
+        return {
+            "total": total,
+            "succeeded": succeeded,
+            "failed": total - succeeded,
+            "elapsed": round(elapsed, 3),
+            "files_per_minute": round(total / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "workers": self.workers,
+            "engine_model_type": self.engine_model_type,
+            "files": records
+        }
+    
+    def save_summary(self, summary):
+        """保存汇总信息，指定输出目录时保存到该目录，否则保存到当前目录"""
+        summary_path = os.path.join(self.output_dir or os.getcwd(), self.SUMMARY_FILE_NAME)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            logger.info("批量处理汇总已保存到: %s", summary_path)
+        except Exception as e:
+            logger.error("保存汇总信息时出错: %s", e)
+        return summary_path
@@ -0,0 +1,135 @@
+"""asyncio与线程池路径对比基准测试
+
+在本地ASR模拟服务器上同时处理大量短音频，比较：
+- threaded: BatchProcessor，每个在途文件占用一个工作线程
+- asyncio: 单个事件循环中并发执行 process_audio_to_text_async
+
+每种模式在独立子进程中运行，报告耗时、峰值RSS和峰值线程数。
+
+用法:
+    python benchmarks/bench_async.py --files 500 --concurrency 500
+"""
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from asr_stub_server import StubAsrServer
+
+RESULT_MARKER = "BENCH_RESULT "
+
+
+class ThreadCounter:
+    """后台采样峰值线程数"""
+    
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            self._stop.wait(0.05)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_mode(mode, workdir, concurrency):
+    from batch_processor import BatchProcessor, collect_input_files
+    from async_tencent_cloud_api import AsyncTencentCloudAPI, process_audio_to_text_async
+    
+    files = collect_input_files([os.path.join(workdir, 'in')])
+    out_dir = os.path.join(workdir, 'out', mode)
+    os.makedirs(out_dir, exist_ok=True)
+    
+    def output_path(path):
+        return os.path.join(out_dir, os.path.basename(path) + '.txt')
+    
+    start = time.perf_counter()
+    with ThreadCounter() as counter:
+        if mode == 'threaded':
+            summary = BatchProcessor(workers=concurrency, output_dir=out_dir).run(files)
+            succeeded = summary['succeeded']
+        else:
+            async def run_all():
+                async with AsyncTencentCloudAPI(max_connections=64) as api:
+                    semaphore = asyncio.Semaphore(concurrency)
+                    
+                    async def one(path):
+                        async with semaphore:
+                            return await process_audio_to_text_async(path, output_path(path), api=api)
+                    return await asyncio.gather(*(one(path) for path in files))
+            succeeded = sum(1 for ok in asyncio.run(run_all()) if ok)
+    elapsed = time.perf_counter() - start
+    
+    print(RESULT_MARKER + json.dumps({
+        "mode": mode,
+        "files": succeeded,
+        "elapsed": elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_threads": counter.peak
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='asyncio与线程池路径对比基准测试')
+    parser.add_argument('--files', type=int, default=500, help='音频文件数量（默认500）')
+    parser.add_argument('--seconds', type=float, default=5, help='每个音频的时长（秒）')
+    parser.add_argument('--concurrency', type=int, default=500, help='同时在途的文件数（默认500）')
+    parser.add_argument('--modes', default='threaded,asyncio', help='测试模式，逗号分隔')
+    parser.add_argument('--queue-delay', type=float, default=2.0, help='模拟服务器排队时间（秒）')
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_mode:
+        run_mode(args.run_mode, args.workdir, args.concurrency)
+        return
+    
+    stub = StubAsrServer(queue_delay=args.queue_delay, processing_rate=0.05).start()
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_async_')
+    env = dict(os.environ, TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+               TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    try:
+        os.makedirs(os.path.join(workdir, 'in'))
+        for i in range(args.files):
+            with wave.open(os.path.join(workdir, 'in', f'clip{i:05d}.wav'), 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(16000)
+                wf.writeframes(b'\x00\x10' * int(16000 * args.seconds))
+        
+        for mode in args.modes.split(','):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run-mode', mode, '--workdir', workdir,
+                 '--concurrency', str(args.concurrency)],
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            line = [l for l in output.splitlines() if l.startswith(RESULT_MARKER)][-1]
+            result = json.loads(line[len(RESULT_MARKER):])
+            print(f"{mode:>9}: {result['files']} 文件, 耗时 {result['elapsed']:.2f}s, "
+                  f"峰值RSS {result['peak_rss_mb']:.0f}MB, 峰值线程数 {result['peak_threads']}")
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
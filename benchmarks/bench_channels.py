@@ -0,0 +1,105 @@
+"""多声道按声道识别基准测试
+
+- 声道拆分：分别用逐个采样循环和步长切片拆分交错的PCM数据，报告吞吐量（MB/s）
+- 端到端：启动本地ASR模拟服务器，处理一个双声道录音（默认10分钟），对比整体识别
+  （超过5分钟时按时长分割）和按声道拆分后并行识别的耗时和识别任务数
+
+用法:
+    python benchmarks/bench_channels.py --minutes 10 --channels 2
+"""
+import os
+import sys
+import time
+import wave
+import array
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_stub_server import StubAsrServer
+from audio_processor import AudioProcessor
+
+
+def write_wav(path, seconds, channels, rate=16000):
+    frame = array.array('h', [1000 * (c + 1) for c in range(channels)]).tobytes()
+    chunk = frame * rate
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        for _ in range(int(seconds)):
+            wf.writeframesraw(chunk)
+
+
+def deinterleave_loop(data, nchannels, sampwidth):
+    """逐个采样拆分，作为对比"""
+    frame_size = nchannels * sampwidth
+    channels = [bytearray() for _ in range(nchannels)]
+    for pos in range(0, len(data) - frame_size + 1, frame_size):
+        for channel in range(nchannels):
+            start = pos + channel * sampwidth
+            channels[channel] += data[start:start + sampwidth]
+    return [bytes(channel) for channel in channels]
+
+
+def measure_deinterleave(channels, seconds=5, rate=16000):
+    data = array.array('h', range(channels)).tobytes() * (rate * seconds)
+    rows = []
+    for name, func in (("逐个采样", deinterleave_loop), ("步长切片", AudioProcessor._deinterleave)):
+        start = time.perf_counter()
+        func(data, channels, 2)
+        elapsed = time.perf_counter() - start
+        rows.append((name, len(data) / elapsed / 1024 / 1024))
+    return rows
+
+
+def run_mode(path, split_channels, jobs):
+    from main import process_audio_to_text
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        success = process_audio_to_text(path, path + '.txt', jobs=jobs, split_channels=split_channels)
+    return time.perf_counter() - start, success
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多声道按声道识别基准测试')
+    parser.add_argument('--minutes', type=float, default=10, help='录音时长（分钟，默认10）')
+    parser.add_argument('--channels', type=int, default=2, help='声道数（默认2）')
+    parser.add_argument('--queue-delay', type=float, default=0.5, help='模拟服务器中识别任务的排队时间（秒，默认0.5）')
+    parser.add_argument('--processing-rate', type=float, default=0.02, help='模拟服务器识别耗时与音频时长之比（默认0.02）')
+    args = parser.parse_args()
+
+    for name, throughput in measure_deinterleave(args.channels):
+        print(f"声道拆分 {name}: {throughput:>8.1f} MB/s")
+
+    stub = StubAsrServer(queue_delay=args.queue_delay, processing_rate=args.processing_rate).start()
+    os.environ.update(TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+                      TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_channels_')
+    path = os.path.join(workdir, 'call.wav')
+    write_wav(path, args.minutes * 60, args.channels)
+    try:
+        rows = []
+        for name, split_channels in (("整体识别", False), ("按声道识别", True)):
+            before = stub.stats.get("CreateRecTask", 0)
+            elapsed, success = run_mode(path, split_channels, args.channels)
+            tasks = stub.stats.get("CreateRecTask", 0) - before
+            rows.append((name, elapsed, success, tasks))
+    finally:
+        stub.stop()
+        for root, dirs, files in os.walk(workdir, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+        os.rmdir(workdir)
+
+    print(f"{args.minutes:g} 分钟 {args.channels} 声道录音（模拟排队 {args.queue_delay:g} 秒）")
+    for name, elapsed, success, tasks in rows:
+        print(f"{name:<6} 耗时 {elapsed:>6.2f}s  识别任务 {tasks} 个{'' if success else '  （失败）'}")
+
+
+if __name__ == '__main__':
+    main()
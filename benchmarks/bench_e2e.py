@@ -0,0 +1,151 @@
+"""端到端吞吐量基准测试
+
+启动本地ASR模拟服务器，并把 TENCENTCLOUD_ASR_ENDPOINT 指向它，测量三类工作负载：
+- single: 逐个处理多个短音频文件
+- segmented: 处理一个需要分割的长音频文件（并发提交片段）
+- batch: 批量模式处理大量短音频文件
+
+每类工作负载在独立子进程中运行，报告 文件/分钟、p50/p99延迟和峰值RSS。
+
+用法:
+    python benchmarks/bench_e2e.py --workloads single,segmented,batch --files 200 --workers 16
+"""
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from asr_stub_server import StubAsrServer
+
+RESULT_MARKER = "BENCH_RESULT "
+
+
+def write_wav(path, seconds, rate=16000):
+    """生成指定时长的单声道16位WAV"""
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        block = b'\x00\x10' * rate
+        for _ in range(int(seconds)):
+            wf.writeframesraw(block)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_workload(name, workdir, args):
+    """在子进程中执行一种工作负载，输出结果JSON"""
+    from main import process_audio_to_text
+    from batch_processor import BatchProcessor, collect_input_files
+    
+    latencies = []
+    files = 0
+    first_text = []
+    start = time.perf_counter()
+    if name == 'single':
+        for path in collect_input_files([os.path.join(workdir, 'short')])[:args.single_files]:
+            t0 = time.perf_counter()
+            process_audio_to_text(path, os.path.join(workdir, 'out', os.path.basename(path) + '.txt'))
+            latencies.append(time.perf_counter() - t0)
+            files += 1
+    elif name == 'segmented':
+        path = os.path.join(workdir, 'long', 'long.wav')
+        t0 = time.perf_counter()
+        # 记录首段文本输出的时间（time-to-first-text）
+        on_text = lambda index, text, total: first_text or first_text.append(time.perf_counter() - t0)
+        process_audio_to_text(path, os.path.join(workdir, 'out', 'long.txt'), jobs=args.jobs, on_text=on_text)
+        latencies.append(time.perf_counter() - t0)
+        files = 1
+    elif name == 'batch':
+        inputs = collect_input_files([os.path.join(workdir, 'short')])
+        processor = BatchProcessor(workers=args.workers, output_dir=os.path.join(workdir, 'out', 'batch'))
+        summary = processor.run(inputs)
+        latencies = [record['elapsed'] for record in summary['files']]
+        files = summary['succeeded']
+    elapsed = time.perf_counter() - start
+    
+    result = {
+        "workload": name,
+        "files": files,
+        "elapsed": elapsed,
+        "files_per_minute": files / elapsed * 60 if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "time_to_first_text": first_text[0] if first_text else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+    print(RESULT_MARKER + json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端吞吐量基准测试')
+    parser.add_argument('--workloads', default='single,segmented,batch', help='工作负载，逗号分隔')
+    parser.add_argument('--files', type=int, default=100, help='短音频文件数量（默认100）')
+    parser.add_argument('--single-files', type=int, default=10, help='single负载处理的文件数（默认10）')
+    parser.add_argument('--short-seconds', type=float, default=10, help='短音频时长（秒）')
+    parser.add_argument('--long-seconds', type=float, default=1800, help='长音频时长（秒）')
+    parser.add_argument('--workers', type=int, default=16, help='批量模式工作线程数')
+    parser.add_argument('--jobs', type=int, default=8, help='长音频片段并发数')
+    parser.add_argument('--queue-delay', type=float, default=0.5, help='模拟服务器排队时间（秒）')
+    parser.add_argument('--processing-rate', type=float, default=0.02, help='模拟服务器识别耗时与音频时长之比')
+    parser.add_argument('--json', help='将结果保存为JSON文件')
+    # 子进程内部使用的参数
+    parser.add_argument('--run-workload', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_workload:
+        run_workload(args.run_workload, args.workdir, args)
+        return
+    
+    stub = StubAsrServer(queue_delay=args.queue_delay, processing_rate=args.processing_rate).start()
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_e2e_')
+    env = dict(os.environ, TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+               TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    
+    try:
+        os.makedirs(os.path.join(workdir, 'short'))
+        os.makedirs(os.path.join(workdir, 'long'))
+        os.makedirs(os.path.join(workdir, 'out'))
+        for i in range(args.files):
+            write_wav(os.path.join(workdir, 'short', f'call{i:05d}.wav'), args.short_seconds)
+        write_wav(os.path.join(workdir, 'long', 'long.wav'), args.long_seconds)
+        
+        results = []
+        for name in args.workloads.split(','):
+            command = [sys.executable, os.path.abspath(__file__), '--run-workload', name, '--workdir', workdir]
+            for option in ('single_files', 'workers', 'jobs'):
+                command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+            output = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            line = [l for l in output.splitlines() if l.startswith(RESULT_MARKER)][-1]
+            result = json.loads(line[len(RESULT_MARKER):])
+            results.append(result)
+            print(f"{name:>10}: {result['files']} 文件, {result['files_per_minute']:.1f} 文件/分钟, "
+                  f"p50 {result['p50']:.2f}s, p99 {result['p99']:.2f}s, 峰值RSS {result['peak_rss_mb']:.0f}MB"
+                  + (f", 首段文本 {result['time_to_first_text']:.2f}s" if result['time_to_first_text'] is not None else ""))
+        
+        print(f"模拟服务器调用统计: {stub.stats}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({"results": results, "stub_stats": stub.stats}, f, ensure_ascii=False, indent=2)
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""阶段耗时统计开销基准测试
+
+测量 metrics.stage() 计时上下文在未启用和启用统计时每次调用的开销（纳秒），
+以及对模拟服务器上一次完整识别（单个短音频）的耗时影响。
+
+用法:
+    python benchmarks/bench_metrics.py --calls 1000000
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from asr_stub_server import StubAsrServer
+
+
+def time_stage_calls(calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        with metrics.stage("read"):
+            pass
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def time_e2e(wav_path, files):
+    from main import process_audio_to_text
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(files):
+            process_audio_to_text(wav_path, wav_path + '.txt')
+    return (time.perf_counter() - start) / files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='阶段耗时统计开销基准测试')
+    parser.add_argument('--calls', type=int, default=1000000, help='计时上下文调用次数（默认1000000）')
+    parser.add_argument('--files', type=int, default=20, help='端到端识别次数（默认20）')
+    args = parser.parse_args()
+
+    disabled = time_stage_calls(args.calls)
+    stub = StubAsrServer(queue_delay=0, processing_rate=0).start()
+    os.environ.update(TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+                      TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_metrics_')
+    wav_path = os.path.join(workdir, 'short.wav')
+    with wave.open(wav_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b'\x00\x10' * 16000 * 5)
+    try:
+        e2e_disabled = time_e2e(wav_path, args.files)
+        metrics.enable_metrics()
+        enabled = time_stage_calls(args.calls)
+        e2e_enabled = time_e2e(wav_path, args.files)
+    finally:
+        stub.stop()
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    print(f"metrics.stage() 每次调用: 未启用 {disabled:.0f}ns，启用 {enabled:.0f}ns")
+    print(f"单个5秒音频端到端耗时: 未启用 {e2e_disabled * 1000:.1f}ms，启用 {e2e_enabled * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""音频文件头解析基准测试
+
+生成一个包含各种支持格式的合成语料（WAV、CBR/VBR MP3、FLAC、Ogg Vorbis/Opus、M4A、AAC ADTS），
+每个文件的时长随机且已知，分别测量：
+- probe_audio 每个文件的耗时（平均、p50、p99，微秒）
+- 解析得到的时长与真实时长的最大误差
+- 旧的按文件大小估算方法（文件大小MB x 12）的误差，作为对比
+
+除ADTS外，合成文件只写入头部和尾部，中间为稀疏空洞，几百个文件也只占用很少的磁盘空间。
+也可以用 --corpus 指定一个真实音频目录，只测量耗时。
+
+用法:
+    python benchmarks/bench_probe.py --files-per-format 200
+    python benchmarks/bench_probe.py --corpus ~/Music
+"""
+import os
+import sys
+import time
+import wave
+import random
+import shutil
+import struct
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_probe import probe_audio
+from audio_processor import AudioProcessor
+
+
+def sparse_extend(f, size):
+    """把文件扩展到指定大小，未写入的部分为稀疏空洞"""
+    f.truncate(size)
+
+
+def gen_wav(path, duration, rng):
+    rate = rng.choice([8000, 16000, 44100])
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.setnframes(int(duration * rate))
+        wf.writeframesraw(b'')
+    data_size = int(duration * rate) * 2
+    with open(path, 'r+b') as f:
+        # wave只在关闭时按实际写入帧数修正头部，这里直接写入data块长度
+        f.seek(4)
+        f.write(struct.pack('<I', 36 + data_size))
+        f.seek(40)
+        f.write(struct.pack('<I', data_size))
+        sparse_extend(f, 44 + data_size)
+    return int(duration * rate) / rate
+
+
+def mpeg_frame_header(bitrate_index, rate_index, version_bits=3, mono=True):
+    """MPEG Layer III帧头"""
+    h = 0x7FF << 21 | version_bits << 19 | 1 << 17 | 1 << 16 | bitrate_index << 12 | rate_index << 10
+    h |= (3 if mono else 0) << 6
+    return struct.pack('>I', h)
+
+
+def gen_mp3_cbr(path, duration, rng):
+    # MPEG1 Layer III, 44.1kHz, 64kbps
+    header = mpeg_frame_header(5, 0)
+    frame_length = 144 * 64000 // 44100
+    frames = int(duration * 44100 / 1152)
+    with open(path, 'wb') as f:
+        if rng.random() < 0.5:
+            # 一半文件带ID3v2标签
+            tag = b'\x00' * 300
+            f.write(b'ID3\x03\x00\x00' + bytes([0, 0, len(tag) >> 7, len(tag) & 0x7F]) + tag)
+        start = f.tell()
+        f.write((header + b'\x00' * (frame_length - 4)) * 2)
+        sparse_extend(f, start + frames * frame_length)
+    return frames * frame_length * 8 / 64000
+
+
+def gen_mp3_vbr(path, duration, rng):
+    # MPEG2 Layer III, 16kHz 单声道，第一帧为Xing头
+    header = mpeg_frame_header(8, 2, version_bits=2)
+    frame_length = 72 * 64000 // 16000
+    frames = int(duration * 16000 / 576)
+    xing = b'Xing' + struct.pack('>II', 1, frames)
+    first = header + b'\x00' * 9 + xing
+    with open(path, 'wb') as f:
+        f.write(first + b'\x00' * (frame_length - len(first)))
+        f.write(header + b'\x00' * (frame_length - 4))
+        # 真实VBR文件的平均比特率与首帧不同，按较小的平均帧长生成
+        sparse_extend(f, frames * frame_length // 2)
+    return frames * 576 / 16000
+
+
+def gen_flac(path, duration, rng):
+    rate = rng.choice([16000, 44100, 48000])
+    total = int(duration * rate)
+    packed = rate << 44 | (2 - 1) << 41 | (16 - 1) << 36 | total
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + packed.to_bytes(8, 'big') + b'\x00' * 16
+    with open(path, 'wb') as f:
+        f.write(b'fLaC' + bytes([0x80, 0, 0, 34]) + streaminfo)
+        sparse_extend(f, int(duration * rate * 2))
+    return total / rate
+
+
+def ogg_page(serial, granule, packet, header_type=0):
+    segments = []
+    remaining = len(packet)
+    while remaining >= 255:
+        segments.append(255)
+        remaining -= 255
+    segments.append(remaining)
+    return (b'OggS' + struct.pack('<BBqIII', 0, header_type, granule, serial, 0, 0)
+            + bytes([len(segments)]) + bytes(segments) + packet)
+
+
+def gen_ogg(path, duration, rng):
+    serial = rng.randrange(1 << 32)
+    if rng.random() < 0.5:
+        rate = 44100
+        ident = b'\x01vorbis' + struct.pack('<IBIiii', 0, 2, rate, 0, 128000, 0) + b'\xb8\x01'
+        granule_rate, pre_skip = rate, 0
+    else:
+        pre_skip = 312
+        ident = b'OpusHead' + struct.pack('<BBHIhB', 1, 1, pre_skip, 16000, 0, 0)
+        granule_rate = 48000
+    granule = int(duration * granule_rate) + pre_skip
+    with open(path, 'wb') as f:
+        f.write(ogg_page(serial, 0, ident, header_type=2))
+        sparse_extend(f, int(duration * 4000))
+        f.seek(0, os.SEEK_END)
+        f.write(ogg_page(serial, granule, b'\x00' * 200, header_type=4))
+    return (granule - pre_skip) / granule_rate
+
+
+def mp4_box(box_type, payload):
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+
+def gen_m4a(path, duration, rng):
+    timescale = 44100
+    ticks = int(duration * timescale)
+    mvhd = mp4_box(b'mvhd', struct.pack('>IIIII', 0, 0, 0, timescale, ticks) + b'\x00' * 80)
+    hdlr = mp4_box(b'hdlr', struct.pack('>II', 0, 0) + b'soun' + b'\x00' * 13)
+    mp4a = mp4_box(b'mp4a', b'\x00' * 6 + struct.pack('>HHHIHHHHI', 1, 0, 0, 0, 2, 16, 0, 0, timescale << 16))
+    stsd = mp4_box(b'stsd', struct.pack('>II', 0, 1) + mp4a)
+    trak = mp4_box(b'trak', mp4_box(b'mdia', hdlr + mp4_box(b'minf', mp4_box(b'stbl', stsd))))
+    moov = mp4_box(b'moov', mvhd + trak)
+    mdat_size = int(duration * 16000)
+    with open(path, 'wb') as f:
+        f.write(mp4_box(b'ftyp', b'M4A \x00\x00\x00\x00M4A mp42isom'))
+        # moov放在mdat之后，解析时需要跳过媒体数据
+        f.write(struct.pack('>I', 8 + mdat_size) + b'mdat')
+        sparse_extend(f, f.tell() + mdat_size)
+        f.seek(0, os.SEEK_END)
+        f.write(moov)
+    return ticks / timescale
+
+
+def gen_aac(path, duration, rng):
+    # ADTS没有总长度信息，写入完整的帧序列，帧长随机变化以模拟VBR
+    rate_index = 8  # 16kHz
+    frames = int(duration * 16000 / 1024)
+    parts = []
+    for _ in range(frames):
+        length = rng.randint(40, 90)
+        header = bytes([
+            0xFF, 0xF1,
+            (1 << 6) | (rate_index << 2),
+            (1 << 6) | (length >> 11),
+            (length >> 3) & 0xFF,
+            ((length & 7) << 5) | 0x1F,
+            0xFC
+        ])
+        parts.append(header + b'\x00' * (length - 7))
+    with open(path, 'wb') as f:
+        f.write(b''.join(parts))
+    return frames * 1024 / 16000
+
+
+GENERATORS = {
+    'wav': ('.wav', gen_wav),
+    'mp3-cbr': ('.mp3', gen_mp3_cbr),
+    'mp3-vbr': ('.mp3', gen_mp3_vbr),
+    'flac': ('.flac', gen_flac),
+    'ogg': ('.ogg', gen_ogg),
+    'm4a': ('.m4a', gen_m4a),
+    'aac': ('.aac', gen_aac),
+}
+
+
+def old_estimate(path):
+    """旧版get_audio_info对非WAV文件的时长估算"""
+    return min(os.path.getsize(path) / (1024 * 1024) * 12, 3600)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def time_probe(path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        info = probe_audio(path)
+    return (time.perf_counter() - start) / repeat, info
+
+
+def bench_synthetic(workdir, files_per_format, repeat, seed):
+    rng = random.Random(seed)
+    print(f"{'格式':<8} {'文件数':>6} {'平均(us)':>9} {'p50(us)':>8} {'p99(us)':>8} {'最大误差(s)':>11} {'旧估算最大误差(s)':>16}")
+    for name, (extension, generator) in GENERATORS.items():
+        times, errors, old_errors = [], [], []
+        for i in range(files_per_format):
+            path = os.path.join(workdir, f"{name}_{i:04d}{extension}")
+            duration = generator(path, rng.uniform(10, 900), rng)
+            elapsed, info = time_probe(path, repeat)
+            times.append(elapsed * 1e6)
+            errors.append(abs(info['duration'] - duration) if info else float('inf'))
+            old_errors.append(abs(old_estimate(path) - duration))
+        print(f"{name:<8} {files_per_format:>6} {sum(times) / len(times):>9.1f} {percentile(times, 0.5):>8.1f} "
+              f"{percentile(times, 0.99):>8.1f} {max(errors):>11.3f} {max(old_errors):>16.1f}")
+
+
+def bench_corpus(corpus, repeat):
+    paths = []
+    for root, _, files in os.walk(corpus):
+        for name in files:
+            path = os.path.join(root, name)
+            if AudioProcessor.is_supported_format(path):
+                paths.append(path)
+    if not paths:
+        print(f"目录中没有支持的音频文件: {corpus}")
+        return
+    times = []
+    failed = 0
+    for path in paths:
+        elapsed, info = time_probe(path, repeat)
+        times.append(elapsed * 1e6)
+        if info is None:
+            failed += 1
+            print(f"无法解析: {path}")
+    print(f"{len(paths)} 个文件: 平均 {sum(times) / len(times):.1f}us, p50 {percentile(times, 0.5):.1f}us, "
+          f"p99 {percentile(times, 0.99):.1f}us, 无法解析 {failed} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='音频文件头解析基准测试')
+    parser.add_argument('--files-per-format', type=int, default=100, help='每种格式生成的文件数（默认100）')
+    parser.add_argument('--repeat', type=int, default=20, help='每个文件重复解析的次数（默认20）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--corpus', help='使用真实音频目录代替合成语料，只测量耗时')
+    parser.add_argument('--workdir', help='合成语料目录（默认使用临时目录）')
+    parser.add_argument('--keep', action='store_true', help='保留生成的文件')
+    args = parser.parse_args()
+
+    if args.corpus:
+        bench_corpus(args.corpus, args.repeat)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='v2t_bench_probe_')
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        bench_synthetic(workdir, args.files_per_format, args.repeat, args.seed)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
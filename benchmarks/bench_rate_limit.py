@@ -0,0 +1,111 @@
+"""客户端频率限制基准测试
+
+启动带频率限制的本地ASR模拟服务器，用多个线程同时调用 CreateRecTask 和 DescribeTaskStatus，
+分别在关闭和开启客户端令牌桶限流时测量：
+- 每个接口实际达到的请求速率（次/秒）与配额之比
+- 服务端返回的 RequestLimitExceeded 次数和最终失败的调用数
+- 等待令牌的峰值队列深度和平均等待时间
+
+用法:
+    python benchmarks/bench_rate_limit.py --requests 300 --threads 32 --create-limit 20 --describe-limit 50
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_stub_server import StubAsrServer
+from tencent_cloud_api import TencentCloudAPI
+
+
+def write_wav(path, seconds=1, rate=16000):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x10' * int(rate * seconds))
+
+
+def run_action(api, action, func, requests, threads):
+    """并发调用requests次，返回(耗时, 失败次数)"""
+    failures = 0
+
+    def one(_):
+        try:
+            func()
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for ok in executor.map(one, range(requests)):
+            failures += 0 if ok else 1
+    return time.perf_counter() - start, failures
+
+
+def run_mode(limited, stub, wav_path, args):
+    api = TencentCloudAPI(secret_id='bench', secret_key='bench', app_id='1', endpoint=stub.endpoint,
+                          rate_limits={"CreateRecTask": args.create_limit, "DescribeTaskStatus": args.describe_limit})
+    if not limited:
+        # 不限流：收到频率限制错误直接失败
+        api.rate_limiter.set_limit("CreateRecTask", None)
+        api.rate_limiter.set_limit("DescribeTaskStatus", None)
+        api.rate_limiter.MAX_RETRIES = 0
+    before = dict(stub.stats)
+    rows = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        elapsed, failures = run_action(api, "CreateRecTask", lambda: api.recognize_audio_directly(wav_path),
+                                       args.requests, args.threads)
+        rows.append(("CreateRecTask", args.create_limit, elapsed, failures))
+        # 等待服务端频率计数窗口切换，避免两个接口的测量互相影响
+        time.sleep(1)
+        elapsed, failures = run_action(api, "DescribeTaskStatus", lambda: api.get_recognition_result(1),
+                                       args.requests, args.threads)
+        rows.append(("DescribeTaskStatus", args.describe_limit, elapsed, failures))
+    throttled = stub.stats.get("RequestLimitExceeded", 0) - before.get("RequestLimitExceeded", 0)
+    metrics = api.rate_limiter.get_metrics()
+
+    print(f"\n客户端限流: {'开启' if limited else '关闭'}（服务端RequestLimitExceeded共 {throttled} 次）")
+    print(f"{'接口':<20} {'配额':>6} {'成功速率':>9} {'配额占比':>8} {'失败':>6} {'峰值队列':>8} {'平均等待(ms)':>12}")
+    for action, limit, elapsed, failures in rows:
+        rate = (args.requests - failures) / elapsed
+        entry = metrics.get(action, {})
+        print(f"{action:<20} {limit:>6} {rate:>9.1f} {rate / limit:>8.0%} {failures:>6} "
+              f"{entry.get('max_waiting', 0):>8} {entry.get('avg_wait', 0) * 1000:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='客户端频率限制基准测试')
+    parser.add_argument('--requests', type=int, default=300, help='每个接口的调用次数（默认300）')
+    parser.add_argument('--threads', type=int, default=32, help='并发线程数（默认32）')
+    parser.add_argument('--create-limit', type=int, default=20, help='CreateRecTask每秒请求上限（默认20）')
+    parser.add_argument('--describe-limit', type=int, default=50, help='DescribeTaskStatus每秒请求上限（默认50）')
+    parser.add_argument('--mode', choices=['both', 'off', 'on'], default='both', help='测量的模式')
+    args = parser.parse_args()
+
+    stub = StubAsrServer(queue_delay=0.1, processing_rate=0.01,
+                         rate_limits={"CreateRecTask": args.create_limit,
+                                      "DescribeTaskStatus": args.describe_limit}).start()
+    wav_path = os.path.join(tempfile.mkdtemp(prefix='v2t_bench_rate_'), 'one.wav')
+    write_wav(wav_path)
+    try:
+        if args.mode in ('both', 'off'):
+            run_mode(False, stub, wav_path, args)
+            time.sleep(1)
+        if args.mode in ('both', 'on'):
+            run_mode(True, stub, wav_path, args)
+    finally:
+        stub.stop()
+        os.remove(wav_path)
+        os.rmdir(os.path.dirname(wav_path))
+
+
+if __name__ == '__main__':
+    main()
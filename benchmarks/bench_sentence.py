@@ -0,0 +1,84 @@
+"""短音频一句话识别基准测试
+
+启动本地ASR模拟服务器，逐个处理多个短音频（默认5秒），分别测量：
+- 录音文件识别：CreateRecTask创建任务后轮询DescribeTaskStatus
+- 一句话识别：SentenceRecognition一次请求返回结果
+报告每个文件的延迟中位数、p95和各接口的调用次数。
+
+用法:
+    python benchmarks/bench_sentence.py --files 20 --seconds 5 --queue-delay 1
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_stub_server import StubAsrServer
+
+
+def write_wav(path, seconds, rate=16000):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x10' * int(rate * seconds))
+
+
+def run_mode(paths, sentence_max_duration):
+    from main import process_audio_to_text
+    from tencent_cloud_api import get_shared_api
+    get_shared_api().set_sentence_max_duration(sentence_max_duration)
+    latencies = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for path in paths:
+            start = time.perf_counter()
+            process_audio_to_text(path, path + '.txt')
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='短音频一句话识别基准测试')
+    parser.add_argument('--files', type=int, default=20, help='音频文件数（默认20）')
+    parser.add_argument('--seconds', type=float, default=5, help='每个音频的时长（秒，默认5）')
+    parser.add_argument('--queue-delay', type=float, default=1, help='模拟服务器中录音文件识别任务的排队时间（秒，默认1）')
+    parser.add_argument('--processing-rate', type=float, default=0.05, help='模拟服务器识别耗时与音频时长之比（默认0.05）')
+    args = parser.parse_args()
+
+    stub = StubAsrServer(queue_delay=args.queue_delay, processing_rate=args.processing_rate).start()
+    os.environ.update(TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+                      TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_sentence_')
+    paths = []
+    for i in range(args.files):
+        path = os.path.join(workdir, f'clip_{i}.wav')
+        write_wav(path, args.seconds)
+        paths.append(path)
+    try:
+        rows = []
+        for name, max_duration in (("录音文件识别", 0), ("一句话识别", 60)):
+            before = dict(stub.stats)
+            p50, p95 = run_mode(paths, max_duration)
+            calls = {action: stub.stats.get(action, 0) - before.get(action, 0)
+                     for action in ("CreateRecTask", "DescribeTaskStatus", "SentenceRecognition")}
+            rows.append((name, p50, p95, calls))
+    finally:
+        stub.stop()
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    print(f"{args.files} 个 {args.seconds:g} 秒音频（模拟排队 {args.queue_delay:g} 秒）")
+    for name, p50, p95, calls in rows:
+        print(f"{name:<8} 延迟中位数 {p50 * 1000:>7.0f}ms  p95 {p95 * 1000:>7.0f}ms  "
+              + "  ".join(f"{action} {count}" for action, count in calls.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""本地转写服务压力测试
+
+启动本地ASR模拟服务器和TranscriptionService，由多个并发客户端通过HTTP上传音频、等待任务结束并获取结果。
+部分客户端提交相同的音频（--duplicates），用于观察共享结果缓存的效果。报告：
+- 吞吐量（文件/分钟）和每个请求从提交到取得结果的延迟中位数、p95
+- 各ASR接口的调用次数和平均每个识别任务的状态查询次数（所有调用方共用一个轮询调度器）
+- 缓存命中次数
+
+用法:
+    python benchmarks/bench_server.py --clients 16 --files-per-client 5 --seconds 90
+"""
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_stub_server import StubAsrServer
+
+
+def make_wav(seconds, level, rate=16000):
+    path = tempfile.mktemp(suffix='.wav')
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(level.to_bytes(2, 'little') * int(rate * seconds))
+    with open(path, 'rb') as f:
+        data = f.read()
+    os.remove(path)
+    return data
+
+
+def request(method, url, data=None, headers=None):
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode('utf-8') or "{}")
+
+
+def run_client(base_url, payloads, latencies, errors):
+    for data in payloads:
+        start = time.perf_counter()
+        status, job = request("POST", f"{base_url}/jobs?filename=call.wav", data,
+                              {"Content-Type": "audio/wav"})
+        if status != 202:
+            errors.append(job.get("error"))
+            continue
+        while job.get("state") not in ("done", "failed", "cancelled"):
+            status, job = request("GET", f"{base_url}/jobs/{job['job_id']}?wait=30")
+        status, result = request("GET", f"{base_url}/jobs/{job['job_id']}/result")
+        if status != 200:
+            errors.append(result.get("error"))
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地转写服务压力测试')
+    parser.add_argument('--clients', type=int, default=16, help='并发客户端数（默认16）')
+    parser.add_argument('--files-per-client', type=int, default=5, help='每个客户端提交的文件数（默认5）')
+    parser.add_argument('--seconds', type=float, default=90, help='每个音频的时长（秒，默认90，超过60秒时使用录音文件识别）')
+    parser.add_argument('--duplicates', type=float, default=0.25, help='提交与其他客户端相同音频的比例（默认0.25）')
+    parser.add_argument('--workers', type=int, default=8, help='服务同时处理的文件数（默认8）')
+    parser.add_argument('--queue-delay', type=float, default=1.0, help='模拟服务器中识别任务的排队时间（秒，默认1）')
+    args = parser.parse_args()
+
+    stub = StubAsrServer(queue_delay=args.queue_delay, processing_rate=0.02).start()
+    os.environ.update(TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+                      TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_server_')
+
+    from transcript_cache import TranscriptCache
+    from transcribe_server import TranscriptionService
+    cache = TranscriptCache(os.path.join(workdir, 'cache'))
+    total = args.clients * args.files_per_client
+    duplicate_every = int(1 / args.duplicates) if args.duplicates > 0 else 0
+    # 每隔duplicate_every个请求提交一次同一份音频，其余音频内容各不相同
+    shared = make_wav(args.seconds, 1)
+    payloads = [[shared if duplicate_every and (c * args.files_per_client + i) % duplicate_every == 0
+                 else make_wav(args.seconds, 2 + c * args.files_per_client + i)
+                 for i in range(args.files_per_client)] for c in range(args.clients)]
+
+    latencies, errors = [], []
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            service = TranscriptionService(port=0, workers=args.workers, work_dir=os.path.join(workdir, 'service'),
+                                           cache=cache).start()
+            start = time.perf_counter()
+            clients = [threading.Thread(target=run_client, args=(service.url, payload, latencies, errors))
+                       for payload in payloads]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+            stats = service.get_stats()
+            service.stop()
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies.sort()
+    tasks = stub.stats.get("CreateRecTask", 0)
+    print(f"{args.clients} 个客户端 x {args.files_per_client} 个 {args.seconds:g} 秒音频，服务同时处理 {args.workers} 个文件")
+    print(f"成功 {len(latencies)}/{total}，失败 {len(errors)}，耗时 {elapsed:.1f}s，"
+          f"吞吐量 {len(latencies) / elapsed * 60:.1f} 文件/分钟")
+    if latencies:
+        print(f"请求延迟 中位数 {latencies[len(latencies) // 2]:.2f}s  "
+              f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.2f}s")
+    print("ASR接口调用: " + "  ".join(f"{action} {count}" for action, count in sorted(stub.stats.items())))
+    if tasks:
+        print(f"平均每个识别任务的状态查询: {stub.stats.get('DescribeTaskStatus', 0) / tasks:.2f} 次")
+    cache_stats = stats.get("cache", {})
+    print(f"缓存命中 {cache_stats.get('hits', 0)}，未命中 {cache_stats.get('misses', 0)}")
+    if errors:
+        print(f"错误示例: {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""流式WAV分割基准测试
+
+生成一个指定大小的合成WAV文件（默认2GB），分别测量：
+- 纯磁盘复制的吞吐量（作为磁盘速度参考）
+- split_large_audio 的吞吐量
+- 分割过程中的常驻内存（RSS）峰值及其变化
+
+用法:
+    python benchmarks/bench_split.py --size-mb 2048 --workdir /tmp/v2t_bench
+"""
+import os
+import sys
+import time
+import math
+import wave
+import shutil
+import struct
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_processor import AudioProcessor
+
+
+def current_rss_mb():
+    """读取当前进程的常驻内存（MB），仅支持Linux的/proc"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+class RssSampler:
+    """后台线程定期采样RSS，记录峰值"""
+    
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            rss = current_rss_mb()
+            self.samples.append(rss)
+            self.peak = max(self.peak, rss)
+            self._stop.wait(self.interval)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def generate_wav(path, size_mb, rate=16000, channels=1):
+    """按块生成合成WAV：2.5秒正弦波 + 0.5秒静音循环"""
+    frame_size = 2 * channels
+    total_frames = int(size_mb * 1024 * 1024) // frame_size
+    period = int(rate * 3)
+    
+    pattern = bytearray()
+    for i in range(period):
+        t = i / rate
+        value = int(8000 * math.sin(2 * math.pi * 440 * t)) if i < rate * 2.5 else 0
+        pattern += struct.pack('<h', value) * channels
+    pattern = bytes(pattern)
+    
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        written = 0
+        while written < total_frames:
+            n = min(period, total_frames - written)
+            wf.writeframesraw(pattern[:n * frame_size])
+            written += n
+    return os.path.getsize(path)
+
+
+def bench_copy(src, dst_dir):
+    """测量按块复制文件的吞吐量，作为磁盘速度参考"""
+    dst = os.path.join(dst_dir, 'copy.wav')
+    start = time.perf_counter()
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+    elapsed = time.perf_counter() - start
+    os.remove(dst)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式WAV分割基准测试')
+    parser.add_argument('--size-mb', type=float, default=2048, help='合成输入文件大小（MB，默认2048）')
+    parser.add_argument('--workdir', help='工作目录（默认使用临时目录）')
+    parser.add_argument('--max-duration', type=float, default=AudioProcessor.MAX_AUDIO_DURATION, help='片段最大时长（秒）')
+    parser.add_argument('--no-smart-cut', action='store_true', help='关闭低能量切点搜索')
+    parser.add_argument('--keep', action='store_true', help='保留生成的文件')
+    args = parser.parse_args()
+    
+    workdir = args.workdir or tempfile.mkdtemp(prefix='v2t_bench_split_')
+    os.makedirs(workdir, exist_ok=True)
+    src = os.path.join(workdir, 'input.wav')
+    
+    try:
+        print(f"生成 {args.size_mb:.0f}MB 合成WAV: {src}")
+        size = generate_wav(src, args.size_mb)
+        size_mb = size / (1024 * 1024)
+        
+        copy_time = bench_copy(src, workdir)
+        print(f"磁盘复制: {copy_time:.2f}s, {size_mb / copy_time:.1f} MB/s")
+        
+        segment_dir = os.path.join(workdir, 'segments')
+        baseline_rss = current_rss_mb()
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            segments = AudioProcessor.split_large_audio(
+                src, max_duration=args.max_duration, output_dir=segment_dir,
+                smart_cut=not args.no_smart_cut)
+            elapsed = time.perf_counter() - start
+        
+        print(f"分割: {len(segments)} 个片段, {elapsed:.2f}s, {size_mb / elapsed:.1f} MB/s "
+              f"(磁盘速度的 {copy_time / elapsed * 100:.0f}%)")
+        print(f"RSS: 基线 {baseline_rss:.1f}MB, 峰值 {sampler.peak:.1f}MB, "
+              f"增量 {sampler.peak - baseline_rss:.1f}MB (输入 {size_mb:.0f}MB)")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""启动耗时基准测试
+
+在新进程中测量冷启动耗时（每次都启动新的解释器）：
+- main: `python main.py --help` 的总耗时
+- sdk: 单独导入腾讯云SDK、dotenv和requests的耗时（转换开始前由后台预加载，作为对比）
+- gui: 从启动进程到图形界面完成第一次绘制的耗时，以及后台预加载SDK完成的时间（需要图形显示环境）
+
+用法:
+    python benchmarks/bench_startup.py --runs 10
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESULT_MARKER = "BENCH_RESULT "
+
+
+def gui_probe(launched_at):
+    """子进程中执行：创建主窗口并完成第一次绘制，随后等待后台预加载结束"""
+    sys.path.insert(0, ROOT)
+    import threading
+    import tkinter as tk
+    import gui
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"{RESULT_MARKER}skip {e}")
+        return
+    gui.VoiceToTextGUI(root)
+    root.update()
+    painted = time.time()
+    warm_up = threading.Thread(target=gui.warm_up_client)
+    warm_up.start()
+    warm_up.join()
+    warmed = time.time()
+    root.destroy()
+    print(f"{RESULT_MARKER}{painted - launched_at:.4f} {warmed - launched_at:.4f}")
+
+
+def run(cmd):
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def summarize(name, values):
+    values = sorted(values)
+    print(f"{name:<28} 最小 {values[0] * 1000:>7.1f}ms  中位数 {values[len(values) // 2] * 1000:>7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=10, help='每项测量的次数（默认10）')
+    parser.add_argument('--gui-probe', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.gui_probe is not None:
+        gui_probe(args.gui_probe)
+        return
+
+    baseline = [run([sys.executable, '-c', 'pass']) for _ in range(args.runs)]
+    summarize("python -c pass", baseline)
+    summarize("python main.py --help", [run([sys.executable, 'main.py', '--help']) for _ in range(args.runs)])
+    summarize("导入SDK+dotenv+requests", [run([sys.executable, '-c', 'import dotenv, requests, tencentcloud.asr.v20190614.asr_client'])
+                                        for _ in range(args.runs)])
+
+    painted, warmed = [], []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--gui-probe', repr(time.time())],
+                                cwd=ROOT, capture_output=True, text=True).stdout
+        line = next((l for l in output.splitlines() if l.startswith(RESULT_MARKER)), None)
+        if line is None or line[len(RESULT_MARKER):].startswith('skip'):
+            print(f"图形界面首次绘制: 跳过（{line[len(RESULT_MARKER) + 5:] if line else '子进程没有输出结果'}）")
+            return
+        values = line[len(RESULT_MARKER):].split()
+        painted.append(float(values[0]))
+        warmed.append(float(values[1]))
+    summarize("图形界面首次绘制", painted)
+    summarize("后台预加载SDK完成", warmed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""识别结果区域渲染基准测试
+
+生成一份较大的识别结果（默认约5MB，按5分钟一个片段切分），分别测量：
+- 一次性插入：旧实现在界面线程中一次insert全部文本，期间窗口无法响应
+- 增量渲染：TranscriptView分块插入可见部分，记录事件循环的最长停顿和首屏出现的耗时
+停顿通过每隔1ms的定时回调之间的最大间隔测量。需要图形显示环境，没有时跳过。
+
+用法:
+    python benchmarks/bench_transcript_view.py --size-mb 5
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+from gui import TranscriptView
+
+
+def make_segments(size_mb, segment_chars=20000):
+    line = "[0:1.020,0:3.500] 这是一段用于测试界面渲染的识别结果文本，包含时间戳和标点。\n"
+    segment = line * max(1, segment_chars // len(line))
+    count = max(1, int(size_mb * 1024 * 1024 / len(segment.encode('utf-8'))))
+    return [segment] * count
+
+
+class StallMeter:
+    """用1ms定时回调测量事件循环的最长停顿"""
+
+    def __init__(self, root):
+        self.root = root
+        self.max_gap = 0.0
+        self.last = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.last = time.perf_counter()
+        self.root.after(1, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.max_gap = max(self.max_gap, now - self.last)
+        self.last = now
+        if self.running:
+            self.root.after(1, self._tick)
+
+
+def run_until(root, condition, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        root.update()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='识别结果区域渲染基准测试')
+    parser.add_argument('--size-mb', type=float, default=5, help='识别结果大小（MB，默认5）')
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"跳过: 没有图形显示环境（{e}）")
+        return
+    root.geometry("800x600")
+    text = tk.Text(root, wrap=tk.WORD)
+    text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar = tk.Scrollbar(root, command=text.yview)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    root.update()
+    segments = make_segments(args.size_mb)
+    total_chars = sum(len(segment) for segment in segments)
+
+    # 一次性插入
+    meter = StallMeter(root)
+    meter.start()
+    root.update()
+    start = time.perf_counter()
+    text.insert(tk.END, "\n".join(segments))
+    root.update()
+    bulk_time = time.perf_counter() - start
+    run_until(root, lambda: time.perf_counter() - start > bulk_time + 0.05)
+    bulk_stall = meter.max_gap
+    meter.running = False
+    text.delete(1.0, tk.END)
+    root.update()
+
+    # 增量渲染
+    view = TranscriptView(root, text, scrollbar)
+    meter = StallMeter(root)
+    meter.start()
+    root.update()
+    start = time.perf_counter()
+    view.show(segments)
+    run_until(root, lambda: view._scheduled is None)
+    first_screen = time.perf_counter() - start
+    inserted = len(text.get(1.0, tk.END))
+    view_stall = meter.max_gap
+    meter.running = False
+    root.destroy()
+
+    print(f"识别结果: {len(segments)} 个片段，{total_chars} 个字符")
+    print(f"一次性插入: 耗时 {bulk_time * 1000:.0f}ms，事件循环最长停顿 {bulk_stall * 1000:.0f}ms")
+    print(f"增量渲染:   首屏 {first_screen * 1000:.0f}ms，事件循环最长停顿 {view_stall * 1000:.0f}ms，"
+          f"已插入 {inserted} 个字符（其余滚动到时再插入）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""上传路径内存基准测试
+
+启动本地接收服务器，用多个线程并发上传同一个大文件，比较两种请求体构造方式的峰值内存：
+- buffered: 与SDK路径相同，一次性读取文件、base64编码并整体序列化为JSON
+- streaming: StreamingUploader按块编码并流式发送
+
+每种模式在独立子进程中运行，以便分别统计峰值RSS。
+
+用法:
+    python benchmarks/bench_upload_memory.py --size-mb 100 --parallel 10
+"""
+import os
+import sys
+import json
+import time
+import base64
+import resource
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from streaming_upload import StreamingUploader, build_tc3_headers
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    """读取并丢弃请求体，返回一个CreateRecTask形式的响应"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        body = json.dumps({"Response": {"Data": {"TaskId": 1}, "RequestId": "bench"}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def upload_buffered(endpoint, file_path):
+    """模拟SDK路径：原始数据、base64字符串和JSON请求体同时驻留内存"""
+    with open(file_path, 'rb') as f:
+        audio_data = f.read()
+    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+    params = {"EngineModelType": "16k_zh", "ChannelNum": 1, "ResTextFormat": 0,
+              "SourceType": 1, "Data": audio_base64, "DataLen": len(audio_data)}
+    payload = json.dumps(params).encode('utf-8')
+    headers = build_tc3_headers("id", "key", endpoint, "CreateRecTask", "2019-06-14", "ap-guangzhou", "asr")
+    requests.post(f"http://{endpoint}/", data=payload, headers=headers).json()
+
+
+def run_mode(mode, file_path, parallel, endpoint):
+    """在当前进程中执行一种模式，输出JSON结果"""
+    uploader = StreamingUploader("id", "key", endpoint, "ap-guangzhou", scheme="http")
+    params = {"EngineModelType": "16k_zh", "ChannelNum": 1, "ResTextFormat": 0,
+              "SourceType": 1, "DataLen": os.path.getsize(file_path)}
+    
+    def work():
+        if mode == 'streaming':
+            uploader.call("CreateRecTask", file_path, params)
+        else:
+            upload_buffered(endpoint, file_path)
+    
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    threads = [threading.Thread(target=work) for _ in range(parallel)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "elapsed": elapsed, "baseline_mb": baseline, "peak_mb": peak}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='上传路径内存基准测试')
+    parser.add_argument('--size-mb', type=float, default=100, help='上传文件大小（MB，默认100）')
+    parser.add_argument('--parallel', type=int, default=10, help='并发上传数（默认10）')
+    parser.add_argument('--modes', default='buffered,streaming', help='测试模式，逗号分隔')
+    # 子进程内部使用的参数
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    parser.add_argument('--endpoint', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_mode:
+        run_mode(args.run_mode, args.file, args.parallel, args.endpoint)
+        return
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"127.0.0.1:{server.server_address[1]}"
+    
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
+        file_path = f.name
+        block = os.urandom(1024 * 1024)
+        for _ in range(int(args.size_mb)):
+            f.write(block)
+    
+    try:
+        total_mb = args.size_mb * args.parallel
+        print(f"并发上传 {args.parallel} x {args.size_mb:.0f}MB")
+        for mode in args.modes.split(','):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run-mode', mode, '--file', file_path,
+                 '--endpoint', endpoint, '--parallel', str(args.parallel)],
+                capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>10}: 峰值RSS {result['peak_mb']:.0f}MB "
+                  f"(每个上传约 {(result['peak_mb'] - result['baseline_mb']) / args.parallel:.1f}MB), "
+                  f"耗时 {result['elapsed']:.2f}s, {total_mb / result['elapsed']:.0f} MB/s")
+    finally:
+        server.shutdown()
+        os.remove(file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""监控目录基准测试
+
+启动本地ASR模拟服务器和FolderWatcher，按固定速率向监控目录写入音频文件（每个文件分块写入，
+模拟录音设备逐步写文件），全部处理完成后报告：
+- 拾取延迟：文件写入完成（大小和修改时间不再变化）到开始处理的时间，包含settle_time
+- 持续吞吐量：文件/分钟和音频分钟/分钟
+- 重启后重新处理的文件数（应为0）
+
+用法:
+    python benchmarks/bench_watch.py --files 40 --rate 4 --workers 8
+"""
+import os
+import sys
+import time
+import wave
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_stub_server import StubAsrServer
+
+
+def make_wav(path, seconds, rate=16000):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x10' * int(rate * seconds))
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def drop_file(path, data, write_time, chunks=5):
+    """分块写入文件，写入期间大小和修改时间不断变化"""
+    size = len(data) // chunks + 1
+    with open(path, 'wb') as f:
+        for start in range(0, len(data), size):
+            f.write(data[start:start + size])
+            f.flush()
+            time.sleep(write_time / chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监控目录基准测试')
+    parser.add_argument('--files', type=int, default=40, help='写入的文件数（默认40）')
+    parser.add_argument('--rate', type=float, default=4, help='每秒写入的文件数（默认4）')
+    parser.add_argument('--seconds', type=float, default=30, help='每个音频的时长（秒，默认30）')
+    parser.add_argument('--write-time', type=float, default=0.5, help='写入每个文件的耗时（秒，默认0.5）')
+    parser.add_argument('--workers', type=int, default=8, help='工作线程数（默认8）')
+    parser.add_argument('--settle-time', type=float, default=1.0, help='文件稳定时间（秒，默认1）')
+    parser.add_argument('--queue-delay', type=float, default=0.5, help='模拟服务器中识别任务的排队时间（秒，默认0.5）')
+    args = parser.parse_args()
+
+    stub = StubAsrServer(queue_delay=args.queue_delay, processing_rate=0.02).start()
+    os.environ.update(TENCENTCLOUD_ASR_ENDPOINT=stub.endpoint, TENCENTCLOUD_SECRET_ID='bench',
+                      TENCENTCLOUD_SECRET_KEY='bench', TENCENTCLOUD_APP_ID='1')
+    workdir = tempfile.mkdtemp(prefix='v2t_bench_watch_')
+    inbox = os.path.join(workdir, 'inbox')
+    os.makedirs(inbox)
+    data = make_wav(os.path.join(workdir, 'source.wav'), args.seconds)
+
+    from watch_folder import FolderWatcher
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            watcher = FolderWatcher([inbox], workers=args.workers, output_dir=os.path.join(workdir, 'out'),
+                                    interval=0.2, settle_time=args.settle_time, report_interval=0).start()
+            scanner = threading.Thread(target=watcher.run, daemon=True)
+            scanner.start()
+            writers = []
+            for i in range(args.files):
+                writer = threading.Thread(target=drop_file, args=(os.path.join(inbox, f'rec_{i:04d}.wav'), data, args.write_time))
+                writer.start()
+                writers.append(writer)
+                time.sleep(1 / args.rate)
+            for writer in writers:
+                writer.join()
+            deadline = time.monotonic() + 300
+            while time.monotonic() < deadline:
+                stats = watcher.get_stats()
+                if stats["succeeded"] + stats["failed"] >= args.files:
+                    break
+                time.sleep(0.1)
+            watcher.stop(cancel=False)
+            scanner.join()
+
+            # 重启：处理记录中的文件不应再次加入队列
+            restarted = FolderWatcher([inbox], workers=1, interval=0.2, settle_time=0, report_interval=0)
+            restarted.start()
+            requeued = restarted.scan() + restarted.scan()
+            restarted.stop()
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.files} 个 {args.seconds:g} 秒音频，每秒写入 {args.rate:g} 个，工作线程 {args.workers}，"
+          f"稳定时间 {args.settle_time:g} 秒")
+    print(f"成功 {stats['succeeded']}，失败 {stats['failed']}，耗时 {stats['elapsed']:.1f}s")
+    print(f"拾取延迟 p50 {stats.get('pickup_p50', 0):.2f}s  p95 {stats.get('pickup_p95', 0):.2f}s  "
+          f"最大 {stats.get('pickup_max', 0):.2f}s")
+    print(f"吞吐量 {stats['files_per_minute']:.1f} 文件/分钟，{stats['audio_minutes_per_minute']:.1f} 音频分钟/分钟")
+    print(f"重启后重新加入队列的文件: {requeued}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import json
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+def parse_callback(body):
+    """解析录音文件识别回调（application/x-www-form-urlencoded）
+
+    Returns:
+        tuple: (任务ID, 与DescribeTaskStatus的Data结构相同的结果字典)
+    """
+    fields = {key: values[0] for key, values in parse_qs(body.decode('utf-8'), keep_blank_values=True).items()}
+    task_id = fields.get("requestId", "")
+    if task_id.isdigit():
+        task_id = int(task_id)
+
+    result = {
+        "TaskId": task_id,
+        "Status": 2 if fields.get("code", "0") == "0" else 3,
+        "Result": fields.get("text", ""),
+        "ErrorMsg": fields.get("message", ""),
+        "ResultDetail": None,
+        "AudioDuration": float(fields.get("audioTime") or 0)
+    }
+    if fields.get("resultDetail"):
+        try:
+            result["ResultDetail"] = json.loads(fields["resultDetail"])
+        except ValueError:
+            pass
+    return task_id, result
+
+class CallbackReceiver:
+    """识别完成回调接收服务器
+
+    在CreateRecTask中注册url后，服务端在任务结束时POST结果到该地址，
+    接收器解析后调用on_result(任务ID, 结果)，通常是TaskPoller.complete，
+    这样等待中的任务无需反复查询状态即可立即完成。
+    """
+
+    def __init__(self, on_result, host='127.0.0.1', port=0, public_url=None, path='/callback'):
+        """
+        Args:
+            on_result: 收到回调时调用的函数，参数为(任务ID, 结果字典)
+            host: 监听地址，接收公网回调时通常为0.0.0.0
+            port: 监听端口，0表示自动分配
+            public_url: 服务端可访问的回调地址（经过NAT或反向代理时指定），默认根据监听地址生成
+            path: 回调路径
+        """
+        self.on_result = on_result
+        self.path = path
+        self.received = 0
+        handler = type('Handler', (_CallbackRequestHandler,), {'receiver': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._public_url = public_url
+        self._thread = None
+
+    @property
+    def url(self):
+        if self._public_url:
+            return self._public_url
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self):
+        """在后台线程中启动接收服务器"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="callback-receiver", daemon=True)
+        self._thread.start()
+        logger.info("识别回调接收地址: %s", self.url)
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _CallbackRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    receiver = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        try:
+            task_id, result = parse_callback(body)
+            self.receiver.received += 1
+            self.receiver.on_result(task_id, result)
+            response = {"code": 0, "message": "成功"}
+        except Exception as e:
+            logger.error("处理识别回调失败: %s", e)
+            response = {"code": 1, "message": str(e)}
+
+        payload = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
@@ -1,12 +1,98 @@
 import os
+import time
 import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import queue
-from main import process_audio_to_text
 from audio_processor import AudioProcessor
+from job_manager import JobManager, Job
+from transcript_cache import get_default_cache
+from logger import get_logger, configure_logging
+
+logger = get_logger(__name__)
+
+class TranscriptView:
+    """识别结果区域的增量渲染
+
+    文本保存在内存中的片段列表里（任务的job.texts，由处理线程追加），只有滚动到的部分才插入Text控件：
+    视图底部接近已插入内容的末尾时才继续插入，用户向上翻看时新到达的文本留在内存中，不会撑大控件。
+    每次渲染按SLICE_CHARS分块插入，超过FRAME_BUDGET就让出事件循环，几MB的结果也不会卡住窗口。
+    """
+
+    SLICE_CHARS = 4096  # 每次insert的最大字符数
+    FRAME_BUDGET = 0.008  # 每次渲染的最长耗时（秒）
+    LOAD_THRESHOLD = 0.9  # 视图底部超过已插入内容的该比例时继续加载
+    FOLLOW_THRESHOLD = 0.999  # 视图在底部时新插入的文本自动滚动到可见
+
+    def __init__(self, root, text, scrollbar):
+        self.root = root
+        self.text = text
+        self.scrollbar = scrollbar
+        self.segments = []
+        self._index = 0  # 下一个要插入的片段
+        self._offset = 0  # 该片段已插入的字符数
+        self._scheduled = None
+        text.config(yscrollcommand=self._on_yscroll)
+
+    def show(self, segments):
+        """显示新的片段列表（列表之后可由其他线程继续追加）"""
+        if self._scheduled is not None:
+            self.root.after_cancel(self._scheduled)
+            self._scheduled = None
+        self.segments = segments
+        self._index = 0
+        self._offset = 0
+        self.text.delete(1.0, tk.END)
+        self.schedule()
+
+    def get_text(self):
+        """返回完整文本（包括尚未插入控件的部分）"""
+        return "\n".join(self.segments)
+
+    def schedule(self):
+        """有新片段或视图滚动后安排一次渲染"""
+        if self._scheduled is None and self._has_more():
+            self._scheduled = self.root.after_idle(self._render)
+
+    def _has_more(self):
+        return self._index < len(self.segments)
+
+    def _wants_more(self):
+        return self.text.yview()[1] >= self.LOAD_THRESHOLD
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= self.LOAD_THRESHOLD:
+            self.schedule()
+
+    def _render(self):
+        self._scheduled = None
+        deadline = time.perf_counter() + self.FRAME_BUDGET
+        while self._has_more() and self._wants_more():
+            segment = self.segments[self._index]
+            piece = segment[self._offset:self._offset + self.SLICE_CHARS]
+            if self._offset == 0 and self._index > 0:
+                piece = "\n" + piece
+                self._offset -= 1
+            follow = self.text.yview()[1] >= self.FOLLOW_THRESHOLD
+            self.text.insert(tk.END, piece)
+            if follow:
+                self.text.see(tk.END)
+            self._offset += len(piece)
+            if self._offset >= len(segment):
+                self._index += 1
+                self._offset = 0
+            if time.perf_counter() >= deadline:
+                break
+        if self._has_more() and self._wants_more():
+            # 让出事件循环处理输入和重绘后继续
+            self._scheduled = self.root.after(1, self._render)
 
 class VoiceToTextGUI:
+    POLL_INTERVAL = 100  # Tcl不支持多线程时检查事件队列的间隔（毫秒）
+    MAX_EVENTS = 500  # 每次最多处理的事件数
+    MAX_FINISHED_JOBS = 100  # 列表中最多保留的已结束任务数，更早的任务连同其文本一起释放
+    
     def __init__(self, root):
         self.root = root
         self.root.title("语音文件转文字工具")
@@ -20,18 +106,28 @@ class VoiceToTextGUI:
             'label': ('SimHei', 10, 'bold')
         }
         
-        # 创建任务队列
-        self.task_queue = queue.Queue()
+        # 处理线程通知的任务状态和片段文本；队列由空变为非空时通过虚拟事件唤醒界面线程，
+        # Tcl不支持多线程时退回定时检查
+        self.event_queue = queue.Queue()
+        self.wakeup_sent = False
+        self._wakeup_lock = threading.Lock()
+        self.use_wakeup_event = bool(int(root.tk.call('info', 'exists', 'tcl_platform(threaded)')))
+        # 转换队列在第一次开始转换时创建
+        self.job_manager = None
+        # 结果区域当前显示的任务
+        self.shown_job_id = None
         
         # 初始化变量
         self.input_file_path = tk.StringVar()
         self.output_file_path = tk.StringVar()
         self.engine_model = tk.StringVar(value="16k_zh")
         self.processing = False
+        self.parallelism = tk.IntVar(value=2)  # 同时处理的文件数
         # 新增选项变量
         self.show_timestamp = tk.BooleanVar(value=True)  # 默认显示时间戳
         self.speaker_diarization = tk.BooleanVar(value=False)  # 默认不进行说话人分离
         self.speaker_count = tk.IntVar(value=2)  # 默认说话人数量
+        self.split_channels = tk.BooleanVar(value=False)  # 默认不按声道分别识别
         # 腾讯云API密钥
         self.tenant_id = tk.StringVar()
         self.app_id = tk.StringVar()
@@ -42,6 +138,7 @@ class VoiceToTextGUI:
         
         # 创建界面组件
         self.create_widgets()
+        self.root.bind("<<JobEvents>>", self.on_job_events)
         
     def get_config_path(self):
         """获取配置文件路径，兼容打包和未打包状态"""
@@ -75,7 +172,7 @@ class VoiceToTextGUI:
                             elif key == 'TENCENTCLOUD_SECRET_KEY':
                                 self.secret_key.set(value)
             except Exception as e:
-                print(f"加载.env配置失败: {str(e)}")
+                logger.warning("加载.env配置失败: %s", e)
     
     def save_env_config(self):
         """保存腾讯云配置到.env文件"""
@@ -108,7 +205,7 @@ class VoiceToTextGUI:
                 f.writelines(config_lines)
             return True
         except Exception as e:
-            print(f"保存配置失败: {str(e)}")
+            logger.warning("保存配置失败: %s", e)
             return False
     
     def open_api_settings(self):
@@ -230,6 +327,19 @@ class VoiceToTextGUI:
         # 初始状态
         self.toggle_speaker_count()
         
+        # 按声道识别选项
+        channel_frame = ttk.Frame(advanced_frame)
+        channel_frame.pack(fill=tk.X, pady=5)
+        ttk.Checkbutton(channel_frame, text="按声道分别识别（多声道WAV，结果标注声道）",
+                        variable=self.split_channels).pack(side=tk.LEFT, padx=5)
+        
+        # 并行任务数选项
+        parallel_frame = ttk.Frame(advanced_frame)
+        parallel_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(parallel_frame, text="同时处理的文件数:").pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(parallel_frame, from_=1, to=8, textvariable=self.parallelism, width=5,
+                    command=self.update_parallelism).pack(side=tk.LEFT, padx=5)
+        
         # 处理按钮
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(pady=10)
@@ -250,6 +360,24 @@ class VoiceToTextGUI:
         self.status_label = ttk.Label(main_frame, textvariable=self.status_var, foreground="blue")
         self.status_label.pack(pady=5)
         
+        # 任务列表，选中任务后在结果区域显示该任务的文本
+        jobs_frame = ttk.LabelFrame(main_frame, text="转换队列", padding="10")
+        jobs_frame.pack(fill=tk.X, pady=10)
+        
+        self.job_tree = ttk.Treeview(jobs_frame, columns=("file", "state", "progress"), show="headings", height=4)
+        self.job_tree.heading("file", text="文件")
+        self.job_tree.heading("state", text="状态")
+        self.job_tree.heading("progress", text="进度")
+        self.job_tree.column("file", width=360)
+        self.job_tree.column("state", width=220)
+        self.job_tree.column("progress", width=60, anchor=tk.E)
+        self.job_tree.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.job_tree.bind("<<TreeviewSelect>>", self.on_job_selected)
+        
+        jobs_scrollbar = ttk.Scrollbar(jobs_frame, command=self.job_tree.yview)
+        jobs_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.job_tree.config(yscrollcommand=jobs_scrollbar.set)
+        
         # 结果展示区域
         result_frame = ttk.LabelFrame(main_frame, text="识别结果", padding="10")
         result_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -261,7 +389,8 @@ class VoiceToTextGUI:
         # 滚动条
         scrollbar = ttk.Scrollbar(result_frame, command=self.result_text.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
-        self.result_text.config(yscrollcommand=scrollbar.set)
+        # 结果从内存中的片段列表增量插入
+        self.transcript_view = TranscriptView(self.root, self.result_text, scrollbar)
         
         # 复制按钮
         ttk.Button(result_frame, text="复制结果", command=self.copy_result).pack(side=tk.BOTTOM, pady=5)
@@ -274,15 +403,19 @@ class VoiceToTextGUI:
             self.speaker_count_combo.config(state=tk.DISABLED)
         
     def browse_input_file(self):
-        file_path = filedialog.askopenfilename(
-            title="选择音频文件",
+        file_paths = filedialog.askopenfilenames(
+            title="选择音频文件（可多选）",
             filetypes=[("音频文件", "*.wav *.mp3 *.aac *.m4a *.flac *.ogg"), ("所有文件", "*.*")]
         )
-        if file_path:
-            self.input_file_path.set(file_path)
-            # 自动建议输出文件名
-            base_name = os.path.splitext(file_path)[0]
-            self.output_file_path.set(f"{base_name}_transcript.txt")
+        if file_paths:
+            self.input_file_path.set(";".join(file_paths))
+            if len(file_paths) == 1:
+                # 自动建议输出文件名
+                base_name = os.path.splitext(file_paths[0])[0]
+                self.output_file_path.set(f"{base_name}_transcript.txt")
+            else:
+                # 多个文件的结果分别保存在各自的音频文件旁
+                self.output_file_path.set("")
     
     def browse_output_file(self):
         file_path = filedialog.asksaveasfilename(
@@ -301,112 +434,210 @@ class VoiceToTextGUI:
             self.open_api_settings()
             return
         
-        input_file = self.input_file_path.get()
-        if not input_file or not os.path.exists(input_file):
+        input_files = [path.strip() for path in self.input_file_path.get().split(";") if path.strip()]
+        if not input_files or not all(os.path.exists(path) for path in input_files):
             messagebox.showerror("错误", "请选择有效的输入文件")
             return
         
         # 检查文件格式
-        if not AudioProcessor.is_supported_format(input_file):
-            messagebox.showerror("错误", "不支持的音频格式")
+        unsupported = [path for path in input_files if not AudioProcessor.is_supported_format(path)]
+        if unsupported:
+            messagebox.showerror("错误", f"不支持的音频格式: {os.path.basename(unsupported[0])}")
             return
         
-        # 准备处理
-        self.processing = True
-        self.process_button.config(state=tk.DISABLED)
-        self.cancel_button.config(state=tk.NORMAL)
-        self.status_var.set("正在处理...")
-        self.progress_var.set(0)
-        self.result_text.delete(1.0, tk.END)
+        # 只有一个文件时才使用指定的输出文件
+        output_file = (self.output_file_path.get() or None) if len(input_files) == 1 else None
+        options = {
+            "engine_model_type": self.engine_model.get(),
+            "remove_timestamp": not self.show_timestamp.get(),  # 转换逻辑：show_timestamp为True时不移除
+            "speaker_diarization": self.speaker_diarization.get(),
+            "speaker_count": self.speaker_count.get(),
+            "split_channels": self.split_channels.get(),
+            "tenant_id": self.tenant_id.get(),
+            "secret_id": self.secret_id.get(),
+            "secret_key": self.secret_key.get(),
+            "app_id": self.app_id.get()
+        }
         
-        # 在新线程中处理，避免界面卡顿
-        thread = threading.Thread(target=self.process_audio, daemon=True)
-        thread.start()
+        manager = self.get_job_manager()
+        jobs = [manager.submit(path, output_file, **options) for path in input_files]
+        # 显示本次加入的第一个任务的文本
+        self.show_job(jobs[0])
         
-        # 检查处理是否完成
-        self.root.after(100, self.check_processing)
+        self.cancel_button.config(state=tk.NORMAL)
+        if not self.processing:
+            self.processing = True
+            if not self.use_wakeup_event:
+                self.root.after(self.POLL_INTERVAL, self.check_processing)
+    
+    def get_job_manager(self):
+        """获取转换队列（首次调用时创建）"""
+        if self.job_manager is None:
+            self.job_manager = JobManager(self.get_parallelism(), on_update=self.on_job_update, on_text=self.on_partial_text,
+                                          cache=self.get_cache(),
+                                          resume=True)  # 窗口关闭后重新转换同一文件时继续之前的任务
+        return self.job_manager
     
-    def process_audio(self):
+    def get_parallelism(self):
         try:
-            input_file = self.input_file_path.get()
-            output_file = self.output_file_path.get() or None
-            engine_model = self.engine_model.get()
-            remove_timestamp = not self.show_timestamp.get()  # 转换逻辑：show_timestamp为True时不移除
-            speaker_diarization = self.speaker_diarization.get()
-            speaker_count = self.speaker_count.get()
-            
-            # 更新进度
-            self.update_status("正在验证音频文件...")
-            self.update_progress(10)
-            
-            # 调用主程序进行处理，传入所有参数
-            success = process_audio_to_text(input_file, output_file, engine_model_type=engine_model,
-                                           remove_timestamp=remove_timestamp,
-                                           speaker_diarization=speaker_diarization,
-                                           speaker_count=speaker_count,
-                                           tenant_id=self.tenant_id.get(),
-                                           secret_id=self.secret_id.get(),
-                                           secret_key=self.secret_key.get(),
-                                           app_id=self.app_id.get())
-            
-            # 将结果放入队列
-            self.task_queue.put((success, output_file))
+            return max(1, int(self.parallelism.get()))
+        except (tk.TclError, ValueError):
+            return 1
+    
+    def update_parallelism(self):
+        if self.job_manager is not None:
+            self.job_manager.set_parallelism(self.get_parallelism())
+    
+    def get_cache(self):
+        """获取识别结果缓存，初始化失败时不使用缓存"""
+        try:
+            return get_default_cache()
         except Exception as e:
-            self.task_queue.put((False, str(e)))
+            logger.warning("初始化识别结果缓存失败: %s", e)
+            return None
+    
+    def post_event(self, kind, job):
+        """在处理线程中调用：事件放入队列，队列中没有未处理的唤醒时唤醒界面线程"""
+        self.event_queue.put((kind, job))
+        if not self.use_wakeup_event:
+            return
+        # 检查和设置标记在同一把锁内完成，多个处理线程只发送一次唤醒
+        with self._wakeup_lock:
+            if self.wakeup_sent:
+                return
+            self.wakeup_sent = True
+        try:
+            self.root.event_generate("<<JobEvents>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            # 窗口已关闭或发送失败，清除标记以便之后的事件可以再次唤醒
+            with self._wakeup_lock:
+                self.wakeup_sent = False
+    
+    def on_job_update(self, job):
+        """在处理线程中收到任务状态变化，交给界面线程显示"""
+        self.post_event("update", job)
+    
+    def on_partial_text(self, job, index, text, total):
+        """在处理线程中收到片段文本；文本已在job.texts中，只需通知界面线程渲染"""
+        self.post_event("text", job)
+    
+    def on_job_events(self, event=None):
+        # 先清除标记再取出事件，之后放入的事件会再次唤醒
+        with self._wakeup_lock:
+            self.wakeup_sent = False
+        self.show_partial_results()
+    
+    def show_job(self, job):
+        """在结果区域显示任务的文本（直接使用内存中的片段，不读取输出文件）"""
+        self.shown_job_id = job.job_id
+        self.transcript_view.show(job.texts)
+    
+    def on_job_selected(self, event=None):
+        selection = self.job_tree.selection()
+        if selection and self.job_manager is not None:
+            job = self.job_manager.get(int(selection[0]))
+            if job is not None and job.job_id != self.shown_job_id:
+                self.show_job(job)
+    
+    def refresh_job(self, job):
+        """更新任务列表中的一行"""
+        item = str(job.job_id)
+        state = job.state_name
+        if job.state == Job.RUNNING and job.message:
+            state = f"{state}（{job.message}）"
+        elif job.state == Job.FAILED and job.error:
+            state = f"{state}: {job.error}"
+        values = (os.path.basename(job.input_file), state, f"{job.progress:.0%}")
+        if self.job_tree.exists(item):
+            self.job_tree.item(item, values=values)
+        else:
+            self.job_tree.insert("", tk.END, iid=item, values=values)
+    
+    def show_partial_results(self):
+        """处理已到达的任务状态和片段文本
+        
+        同一任务的多次状态变化只刷新一次；新文本只通知结果区域按需渲染，
+        每次最多处理MAX_EVENTS个事件，其余的在处理完界面事件后继续。
+        """
+        updated = {}
+        for _ in range(self.MAX_EVENTS):
+            try:
+                kind, job = self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "update":
+                updated[job.job_id] = job
+            elif job.job_id == self.shown_job_id:
+                self.transcript_view.schedule()
+        else:
+            self.root.after_idle(self.show_partial_results)
+        for job in updated.values():
+            # 已从列表中移除的任务不再显示
+            if self.job_manager.get(job.job_id) is not None:
+                self.refresh_job(job)
+        self.prune_finished_jobs()
+        
+        # 总进度为列表中所有任务进度的平均值
+        jobs = self.job_manager.get_jobs()
+        if jobs:
+            self.progress_var.set(100 * sum(1.0 if job.finished else job.progress for job in jobs) / len(jobs))
+        counts = {}
+        for job in jobs:
+            counts[job.state] = counts.get(job.state, 0) + 1
+        self.status_var.set("，".join(f"{Job.STATE_NAMES[state]} {counts[state]}" for state in Job.STATE_NAMES if state in counts) or "就绪")
+        if self.processing and not self.job_manager.active_count():
+            self.finish_processing()
+    
+    def prune_finished_jobs(self):
+        """已结束的任务超过MAX_FINISHED_JOBS个时从列表中移除最早结束的任务"""
+        for job in self.job_manager.remove_finished(keep=self.MAX_FINISHED_JOBS):
+            item = str(job.job_id)
+            if self.job_tree.exists(item):
+                self.job_tree.delete(item)
+            if job.job_id == self.shown_job_id:
+                self.shown_job_id = None
     
     def check_processing(self):
+        """Tcl不支持多线程时定时检查事件队列"""
         if not self.processing:
             return
-        
-        # 检查队列中是否有结果
-        try:
-            success, result = self.task_queue.get(block=False)
-            self.processing = False
-            
-            if success:
-                self.update_status("转换完成")
-                self.update_progress(100)
-                
-                # 显示结果
-                if result and os.path.exists(result):
-                    try:
-                        with open(result, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            self.result_text.delete(1.0, tk.END)
-                            self.result_text.insert(tk.END, content)
-                    except Exception as e:
-                        messagebox.showerror("错误", f"无法读取结果文件: {str(e)}")
-                else:
-                    messagebox.showinfo("成功", "转换成功，但未找到结果文件")
-            else:
-                self.update_status("转换失败")
-                messagebox.showerror("错误", f"转换失败: {result}")
-            
-            # 重置按钮状态
-            self.process_button.config(state=tk.NORMAL)
-            self.cancel_button.config(state=tk.DISABLED)
-            
-        except queue.Empty:
-            # 继续检查
-            self.root.after(100, self.check_processing)
+        self.show_partial_results()
+        if self.processing:
+            self.root.after(self.POLL_INTERVAL, self.check_processing)
     
-    def cancel_processing(self):
-        if messagebox.askyesno("确认", "确定要取消处理吗？"):
-            self.processing = False
-            self.status_var.set("已取消")
-            self.process_button.config(state=tk.NORMAL)
-            self.cancel_button.config(state=tk.DISABLED)
+    def finish_processing(self):
+        """队列中的任务全部结束"""
+        self.processing = False
+        self.cancel_button.config(state=tk.DISABLED)
+        failed = [job for job in self.job_manager.get_jobs() if job.state == Job.FAILED]
+        if failed:
+            messagebox.showerror("错误", "转换失败:\n" + "\n".join(f"{os.path.basename(job.input_file)}: {job.error}" for job in failed))
     
-    def update_status(self, status):
-        self.status_var.set(status)
-        self.root.update_idletasks()
+    def cancel_processing(self):
+        """取消列表中选中的任务，未选中任务时取消全部"""
+        if self.job_manager is None:
+            return
+        selected = [self.job_manager.get(int(item)) for item in self.job_tree.selection()]
+        selected = [job for job in selected if job is not None and not job.finished]
+        prompt = f"确定要取消选中的 {len(selected)} 个任务吗？" if selected else "确定要取消所有任务吗？"
+        if messagebox.askyesno("确认", prompt):
+            if selected:
+                for job in selected:
+                    self.job_manager.cancel(job.job_id)
+            else:
+                self.job_manager.cancel_all()
     
-    def update_progress(self, value):
-        self.progress_var.set(value)
-        self.root.update_idletasks()
+    def on_close(self):
+        """关闭窗口时取消未完成的任务，已提交的识别任务下次转换同一文件时继续"""
+        if self.job_manager is not None and self.job_manager.active_count():
+            if not messagebox.askyesno("确认", "还有未完成的任务，确定要退出吗？"):
+                return
+            self.job_manager.cancel_all()
+        self.root.destroy()
     
     def copy_result(self):
-        content = self.result_text.get(1.0, tk.END)
+        # 复制完整结果，包括尚未滚动到、没有插入文本框的部分
+        content = self.transcript_view.get_text()
         if content.strip():
             self.root.clipboard_clear()
             self.root.clipboard_append(content)
@@ -414,9 +645,21 @@ class VoiceToTextGUI:
         else:
             messagebox.showinfo("提示", "没有可复制的内容")
 
+def warm_up_client():
+    """在后台加载SDK，窗口显示后立即可以操作，第一次转换也不必等待导入"""
+    try:
+        from tencent_cloud_api import warm_up
+        warm_up()
+    except Exception as e:
+        logger.warning("预加载腾讯云SDK失败: %s", e)
+
 def main():
+    configure_logging()
     root = tk.Tk()
     app = VoiceToTextGUI(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
+    # 窗口绘制完成后再开始预加载
+    root.after_idle(lambda: threading.Thread(target=warm_up_client, name="sdk-warm-up", daemon=True).start())
     root.mainloop()
 
 if __name__ == "__main__":
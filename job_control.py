@@ -0,0 +1,139 @@
+import itertools
+import threading
+
+class JobCancelledError(Exception):
+    """转换任务已被取消"""
+
+class CancelToken:
+    """协作式取消标记
+
+    处理流程在上传前、上传的每个数据块之间检查标记；等待识别结果时通过add_callback注册
+    取消动作（例如结束轮询调度器中的Future），取消后等待中的线程立即返回，不必等到下次查询。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._ids = itertools.count()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """设置取消标记并执行已注册的取消动作，重复调用无效"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self):
+        """已取消时抛出JobCancelledError"""
+        if self._event.is_set():
+            raise JobCancelledError("任务已取消")
+
+    def wait(self, timeout=None):
+        """等待取消，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """注册取消时执行的动作，已取消时立即执行
+
+        Returns:
+            用于remove_callback的句柄
+        """
+        with self._lock:
+            if not self._event.is_set():
+                handle = next(self._ids)
+                self._callbacks[handle] = callback
+                return handle
+        callback()
+        return None
+
+    def remove_callback(self, handle):
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+class ProgressTracker:
+    """根据各片段的实际任务状态计算整体进度
+
+    每个片段依次经过 上传 -> 排队（服务端Status 0） -> 识别中（Status 1） -> 完成，
+    整体进度为各片段所处阶段权重的平均值。
+    """
+
+    STAGE_WEIGHTS = {
+        "pending": 0.0,
+        "uploading": 0.05,
+        "queued": 0.3,
+        "recognizing": 0.6,
+        "done": 1.0,
+        "failed": 1.0
+    }
+    STAGE_NAMES = {
+        "uploading": "上传中",
+        "queued": "排队中",
+        "recognizing": "识别中",
+        "failed": "失败"
+    }
+
+    def __init__(self, total, on_progress=None):
+        """
+        Args:
+            total: 片段总数
+            on_progress: 进度变化时调用的函数，参数为(进度0~1, 状态说明)
+        """
+        self.total = max(1, total)
+        self.on_progress = on_progress
+        self._stages = ["pending"] * self.total
+        self._lock = threading.Lock()
+
+    def reset(self, total):
+        """片段数确定（例如分割完成）后重新设置片段总数"""
+        with self._lock:
+            self.total = max(1, total)
+            self._stages = ["pending"] * self.total
+        self._notify()
+
+    def update(self, index, stage):
+        """更新片段所处阶段，已完成的片段不再回退"""
+        with self._lock:
+            if index >= self.total or self._stages[index] in ("done", "failed"):
+                return
+            if self._stages[index] == stage:
+                return
+            self._stages[index] = stage
+        self._notify()
+
+    @staticmethod
+    def status_stage(status):
+        """把识别任务的服务端状态（0等待中，1识别中，2成功，3失败）转换为阶段名称"""
+        return {1: "recognizing", 2: "done", 3: "failed"}.get(status, "queued")
+
+    def stage_callback(self, index):
+        """返回只更新指定片段的回调函数"""
+        return lambda stage: self.update(index, stage)
+
+    def _notify(self):
+        if self.on_progress is None:
+            return
+        with self._lock:
+            stages = list(self._stages)
+        progress = sum(self.STAGE_WEIGHTS[stage] for stage in stages) / len(stages)
+        done = stages.count("done")
+        parts = [f"完成 {done}/{len(stages)}"]
+        for stage, name in self.STAGE_NAMES.items():
+            count = stages.count(stage)
+            if count:
+                parts.append(f"{name} {count}")
+        try:
+            self.on_progress(progress, "，".join(parts))
+        except Exception:
+            pass
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class JobJournal:
+    """识别任务日志
+
+    以JSON Lines格式只追加写入，每个片段按音频内容哈希记录提交的任务ID、状态和识别结果，
+    每条记录写入后立即fsync。进程崩溃或界面被关闭后重新运行时（resume=True），
+    已完成的片段直接使用日志中的结果，仍在识别的任务按任务ID继续轮询，只有缺失或失败的片段重新上传。
+    最后一行可能因崩溃而不完整，加载时忽略无法解析的行。
+    """
+
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path, params=None, resume=False):
+        """
+        Args:
+            path: 日志文件路径
+            params: 识别参数（引擎模型等），与日志中记录的参数不同时不恢复旧记录
+            resume: 是否从已有日志恢复，False则清空重新记录
+        """
+        self.path = path
+        self.params = params or {}
+        self.resumed = 0  # 复用的未完成任务数
+        self.skipped = 0  # 直接使用日志结果的片段数
+        self._entries = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._truncated = False
+        if resume:
+            self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if self._truncated:
+            # 崩溃时最后一行未写完，换行后再追加，避免新记录与残缺行连在一起
+            self._file.write("\n")
+        self._append({"event": "start", "params": self.params})
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        self._truncated = bool(lines) and not lines[-1].endswith("\n")
+        matched = True
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            event = record.get("event")
+            if event == "start":
+                matched = record.get("params") == self.params
+                if not matched:
+                    # 参数改变后旧的任务和结果不再适用
+                    self._entries = {}
+                continue
+            if not matched:
+                continue
+            entry = self._entries.setdefault(record.get("hash"), {})
+            if event == "submitted":
+                entry.update(status="submitted", task_id=record.get("task_id"),
+                             audio_duration=record.get("audio_duration"), offset_map=record.get("offset_map"))
+            elif event == "completed":
+                entry.update(status="completed", result=record.get("result"))
+            elif event == "failed":
+                entry.update(status="failed")
+        if self._entries:
+            logger.info("已从任务日志恢复 %s 个片段的状态: %s", len(self._entries), self.path)
+
+    def _append(self, record):
+        record["time"] = time.time()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                logger.error("写入任务日志失败: %s", e)
+
+    def file_hash(self, file_path):
+        """计算片段内容的SHA256，同一文件只计算一次"""
+        key = os.path.abspath(file_path)
+        digest = self._hashes.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.HASH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self._hashes[key] = digest
+        return digest
+
+    def get_result(self, file_path):
+        """返回日志中该片段已完成的识别结果，没有时返回None"""
+        entry = self._entries.get(self.file_hash(file_path))
+        if entry and entry.get("status") == "completed" and entry.get("result"):
+            with self._lock:
+                self.skipped += 1
+            return entry["result"]
+        return None
+
+    def get_pending(self, file_path):
+        """返回该片段已提交但尚未完成的任务（task_id、audio_duration、offset_map），没有时返回None"""
+        entry = self._entries.get(self.file_hash(file_path))
+        if entry and entry.get("status") == "submitted" and entry.get("task_id") is not None:
+            with self._lock:
+                self.resumed += 1
+            return entry
+        return None
+
+    def record_submitted(self, file_path, task_id, audio_duration=None, offset_map=None):
+        file_hash = self.file_hash(file_path)
+        self._entries[file_hash] = {"status": "submitted", "task_id": task_id,
+                                    "audio_duration": audio_duration, "offset_map": offset_map}
+        self._append({"event": "submitted", "hash": file_hash, "segment": file_path, "task_id": task_id,
+                      "audio_duration": audio_duration, "offset_map": offset_map})
+
+    def record_completed(self, file_path, result):
+        file_hash = self.file_hash(file_path)
+        self._entries[file_hash] = {"status": "completed", "result": result}
+        self._append({"event": "completed", "hash": file_hash, "result": result})
+
+    def record_failed(self, file_path, error=None):
+        file_hash = self.file_hash(file_path)
+        self._entries[file_hash] = {"status": "failed"}
+        self._append({"event": "failed", "hash": file_hash, "error": error})
+
+    def close(self, remove=False):
+        """关闭日志，remove为True时删除日志文件（任务全部成功后不再需要恢复）"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+def get_journal_path(output_file):
+    """任务日志保存在输出文件旁"""
+    return f"{output_file}.journal"
@@ -0,0 +1,227 @@
+import time
+import itertools
+import threading
+from job_control import CancelToken
+from result_sink import get_output_path
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class Job:
+    """转换队列中的一个音频文件"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    STATE_NAMES = {
+        PENDING: "等待中",
+        RUNNING: "处理中",
+        DONE: "已完成",
+        FAILED: "失败",
+        CANCELLED: "已取消"
+    }
+
+    def __init__(self, job_id, input_file, output_file, options):
+        self.job_id = job_id
+        self.input_file = input_file
+        self.output_file = output_file
+        self.options = options
+        self.state = self.PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.error = None
+        self.texts = []
+        self.cancel_token = CancelToken()
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def state_name(self):
+        return self.STATE_NAMES[self.state]
+
+    @property
+    def finished(self):
+        return self.state in (self.DONE, self.FAILED, self.CANCELLED)
+
+class JobManager:
+    """多文件转换队列
+
+    文件按加入顺序排队，最多同时处理parallelism个，每个任务在自己的线程中运行并在结束后退出，
+    不保留空闲线程。每个任务有独立的取消标记：等待中的任务直接移出队列，处理中的任务在下一个
+    上传数据块或立即（等待识别结果时）停止，线程随即结束。
+    状态、进度和文本通过回调通知，回调在处理线程中执行，图形界面需要自行转交给界面线程。
+    """
+
+    def __init__(self, parallelism=2, on_update=None, on_text=None, process_func=None, **process_kwargs):
+        """
+        Args:
+            parallelism: 同时处理的文件数
+            on_update: 任务状态或进度变化时调用的函数，参数为Job
+            on_text: 任务的片段文本按顺序就绪时调用的函数，参数为(Job, 片段序号, 文本, 片段总数)
+            process_func: 处理单个文件的函数，默认使用main.process_audio_to_text
+            process_kwargs: 每个任务都传给process_func的参数（例如API密钥和缓存）
+        """
+        self.parallelism = max(1, parallelism)
+        self.on_update = on_update
+        self.on_text = on_text
+        if process_func is None:
+            from main import process_audio_to_text
+            process_func = process_audio_to_text
+        self.process_func = process_func
+        self.process_kwargs = process_kwargs
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._pending = []
+        self._running = {}
+
+    def submit(self, input_file, output_file=None, **options):
+        """加入一个文件，返回Job
+
+        Args:
+            output_file: 输出文件路径，None则保存在音频文件旁
+            options: 传给process_func的识别参数（引擎模型、时间戳、说话人分离等）
+        """
+        job = Job(next(self._ids), input_file, get_output_path(input_file, output_file), options)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._pending.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def get_jobs(self):
+        """按加入顺序返回所有任务"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_count(self):
+        """返回等待中和处理中的任务数"""
+        with self._lock:
+            return len(self._pending) + len(self._running)
+
+    def set_parallelism(self, parallelism):
+        """调整同时处理的文件数，减少时不影响已在处理的任务"""
+        with self._lock:
+            self.parallelism = max(1, parallelism)
+        self._dispatch()
+
+    def cancel(self, job_id):
+        """取消任务，返回任务是否仍在等待或处理中"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            if job in self._pending:
+                self._pending.remove(job)
+                job.state = Job.CANCELLED
+                job.finished_at = time.time()
+        job.cancel_token.cancel()
+        self._notify(job)
+        return True
+
+    def cancel_all(self):
+        """取消所有等待中和处理中的任务，返回取消的任务数"""
+        with self._lock:
+            job_ids = [job.job_id for job in self._pending] + list(self._running)
+        return sum(1 for job_id in job_ids if self.cancel(job_id))
+
+    def remove_finished(self, older_than=None, keep=0):
+        """从列表中移除已结束的任务，返回移除的任务
+
+        Args:
+            older_than: 只移除结束超过该秒数的任务，None表示移除所有已结束的任务
+            keep: 保留最近结束的任务数
+        """
+        now = time.time()
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.finished),
+                              key=lambda job: job.finished_at or 0)
+            if keep:
+                finished = finished[:-keep]
+            removed = [job for job in finished
+                       if older_than is None or now - (job.finished_at or now) >= older_than]
+            for job in removed:
+                del self._jobs[job.job_id]
+        return removed
+
+    def join(self, timeout=None):
+        """等待所有任务结束，超时返回False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                threads = list(self._running.values())
+                if not threads and not self._pending:
+                    return True
+            for thread in threads:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                thread.join(remaining)
+
+    def _dispatch(self):
+        """有空闲名额时启动等待中的任务"""
+        with self._lock:
+            started = []
+            while self._pending and len(self._running) < self.parallelism:
+                job = self._pending.pop(0)
+                job.state = Job.RUNNING
+                job.started_at = time.time()
+                thread = threading.Thread(target=self._run, args=(job,), name=f"job-{job.job_id}", daemon=True)
+                self._running[job.job_id] = thread
+                started.append((job, thread))
+        for job, thread in started:
+            self._notify(job)
+            thread.start()
+
+    def _run(self, job):
+        def on_progress(progress, message):
+            job.progress = progress
+            job.message = message
+            self._notify(job)
+
+        def on_text(index, text, total):
+            job.texts.append(text)
+            if self.on_text is not None:
+                try:
+                    self.on_text(job, index, text, total)
+                except Exception as e:
+                    logger.warning("文本回调失败: %s", e)
+
+        try:
+            success = self.process_func(job.input_file, job.output_file, on_text=on_text, on_progress=on_progress,
+                                        cancel_token=job.cancel_token, **self.process_kwargs, **job.options)
+            if job.cancel_token.cancelled:
+                job.state = Job.CANCELLED
+            elif success:
+                job.state = Job.DONE
+                job.progress = 1.0
+            else:
+                job.state = Job.FAILED
+                job.error = "转换失败"
+        except Exception as e:
+            logger.error("处理文件失败 %s: %s", job.input_file, e)
+            job.state = Job.CANCELLED if job.cancel_token.cancelled else Job.FAILED
+            job.error = str(e)
+        job.finished_at = time.time()
+        with self._lock:
+            self._running.pop(job.job_id, None)
+        self._notify(job)
+        self._dispatch()
+
+    def _notify(self, job):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(job)
+        except Exception as e:
+            logger.warning("任务状态回调失败: %s", e)
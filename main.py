@@ -1,11 +1,25 @@
 import os
 import time
 import json
+import shutil
+import signal
 import argparse
-from tencent_cloud_api import TencentCloudAPI
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from tencent_cloud_api import get_shared_api
 from audio_processor import AudioProcessor
+from result_sink import ResultSink, get_output_path
+from transcript_utils import TIMESTAMP_PATTERN, parse_timestamp, format_timestamp, remap_result_timestamps, extract_result_text, lookup_cache, sentence_result_response, save_result
+from job_journal import JobJournal, get_journal_path
+from rate_limiter import parse_rate_limits
+from job_control import JobCancelledError, ProgressTracker
+import metrics
+from logger import get_logger, configure_logging
 
-def process_audio_to_text(audio_file_path, output_file=None, engine_model_type="16k_zh", remove_timestamp=True, speaker_diarization=False, speaker_count=2, tenant_id=None, secret_id=None, secret_key=None, app_id=None):
+logger = get_logger("main")
+
+def process_audio_to_text(audio_file_path, output_file=None, engine_model_type="16k_zh", remove_timestamp=True, speaker_diarization=False, speaker_count=2, tenant_id=None, secret_id=None, secret_key=None, app_id=None, jobs=1, cache=None, trim_silence=False, on_text=None, resume=False, cancel_token=None, on_progress=None, split_channels=False):
     """
     处理音频文件并转换为文字
     
@@ -13,55 +27,463 @@ def process_audio_to_text(audio_file_path, output_file=None, engine_model_type="
         audio_file_path: 音频文件路径
         output_file: 输出文件路径，None则自动生成
         engine_model_type: 引擎模型类型，支持不同的识别模型
+        jobs: 分割后片段的最大并发数，1表示逐个处理
+        cache: TranscriptCache实例，None表示不使用缓存
+        trim_silence: 上传前是否裁剪长静音（识别结果的时间戳会换算回原始音频）
+        on_text: 每个片段的文本按顺序就绪时调用的函数，参数为(片段序号, 文本, 片段总数)；
+            输出文件也会随片段完成逐段追加，不必等待全部片段识别完成
+        resume: 是否从输出文件旁的任务日志恢复：已完成的片段直接使用日志中的结果，
+            仍在识别的任务继续轮询，只重新提交缺失的片段
+        cancel_token: CancelToken实例，取消后停止上传和等待，已提交的任务保留在任务日志中
+        on_progress: 进度变化时调用的函数，参数为(进度0~1, 状态说明)，进度由各片段的实际任务状态计算
+        split_channels: 多声道WAV是否按声道拆分后分别识别，结果按时间合并并标注声道
     """
+    started_at = time.monotonic()
+    progress = ProgressTracker(1, on_progress)
+    
     # 检查文件是否存在
     if not os.path.exists(audio_file_path):
-        print(f"错误: 文件不存在 - {audio_file_path}")
+        logger.error("文件不存在 - %s", audio_file_path)
         return False
     
     # 检查文件格式是否支持
     if not AudioProcessor.is_supported_format(audio_file_path):
-        print(f"错误: 不支持的音频格式 - {audio_file_path}")
+        logger.error("不支持的音频格式 - %s", audio_file_path)
         return False
     
+    # 多声道录音按声道分别识别（目前仅支持WAV）
+    if split_channels:
+        channels = AudioProcessor.get_audio_info(audio_file_path).get('channels') or 1
+        is_wav = os.path.splitext(audio_file_path)[1].lower() == '.wav'
+        if channels > 1 and is_wav:
+            if speaker_diarization:
+                logger.info("按声道识别时各声道分别对应说话人，不再进行说话人分离")
+            result = process_channels(audio_file_path, output_file, engine_model_type, remove_timestamp, tenant_id, secret_id, secret_key, app_id, jobs, cache=cache, trim_silence=trim_silence, on_text=on_text, resume=resume, cancel_token=cancel_token, progress=progress, started_at=started_at)
+            if result is not None:
+                return result
+            logger.warning("无法按声道拆分音频，按普通方式识别: %s", audio_file_path)
+        elif channels > 1:
+            logger.warning("目前仅支持按声道拆分WAV文件，按普通方式识别: %s", audio_file_path)
+        else:
+            logger.info("音频只有一个声道，按普通方式识别")
+    
     # 验证音频文件是否符合ASR要求
     is_valid, message = AudioProcessor.validate_for_asr(audio_file_path)
     if not is_valid:
-        print(f"错误: {message}")
+        logger.warning("%s", message)
         
-        # 尝试分割大文件
-        if "时长超过限制" in message:
-            print("尝试分割大音频文件...")
+        # 尝试分割大文件（超长或超大的WAV文件都可以按时长分割）
+        if "时长超过限制" in message or "文件大小超过限制" in message:
+            logger.info("尝试分割大音频文件...")
             segments = AudioProcessor.split_large_audio(audio_file_path)
             if segments:
-                print(f"成功分割为 {len(segments)} 个文件")
+                logger.info("成功分割为 %s 个文件", len(segments))
+                progress.reset(len(segments))
                 
-                # 处理每个分割后的文件
-                all_results = []
-                for segment_path in segments:
-                    print(f"处理文件: {segment_path}")
-                    result = process_single_audio(segment_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, tenant_id, secret_id, secret_key, app_id)
-                    if result:
-                        all_results.append(result)
-                
-                # 合并结果
-                if all_results:
-                    merged_text = "\n".join([r['text'] for r in all_results if 'text' in r])
-                    
-                    # 保存结果
-                    save_result(merged_text, all_results, audio_file_path, output_file)
-                    return True
+                # 处理每个分割后的文件，结果按片段顺序逐段写入输出文件
+                output_path = get_output_path(audio_file_path, output_file)
+                sink = ResultSink(len(segments), output_path, on_text, started_at)
+                journal = open_journal(output_path, audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, trim_silence, resume)
+                try:
+                    if jobs > 1:
+                        process_segments_concurrently(segments, engine_model_type, remove_timestamp, jobs, tenant_id, secret_id, secret_key, app_id, cache=cache, trim_silence=trim_silence, sink=sink, journal=journal, cancel_token=cancel_token, progress=progress)
+                    else:
+                        for index, segment_path in enumerate(segments):
+                            if cancel_token is not None and cancel_token.cancelled:
+                                sink.add(index, None)
+                                continue
+                            logger.info("处理文件: %s", segment_path)
+                            sink.add(index, process_single_audio(segment_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, tenant_id, secret_id, secret_key, app_id, cache=cache, trim_silence=trim_silence, journal=journal, cancel_token=cancel_token, on_stage=progress.stage_callback(index)))
+                    success = finish_sink(sink, journal, cancel_token)
+                finally:
+                    # 任务日志按内容记录片段，恢复时重新分割即可，片段不需要保留
+                    AudioProcessor.remove_segments(segments)
+                metrics.job_finished(audio_file_path, time.monotonic() - started_at, success, segments)
+                return success
         return False
     
     # 处理单个音频文件
-    result = process_single_audio(audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, tenant_id, secret_id, secret_key, app_id)
-    if result:
-        save_result(result['text'], [result], audio_file_path, output_file)
-        return True
+    output_path = get_output_path(audio_file_path, output_file)
+    sink = ResultSink(1, output_path, on_text, started_at)
+    journal = open_journal(output_path, audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, trim_silence, resume)
+    sink.add(0, process_single_audio(audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, tenant_id, secret_id, secret_key, app_id, cache=cache, trim_silence=trim_silence, journal=journal, cancel_token=cancel_token, on_stage=progress.stage_callback(0)))
+    success = finish_sink(sink, journal, cancel_token)
+    metrics.job_finished(audio_file_path, time.monotonic() - started_at, success)
+    return success
+
+def process_channels(audio_file_path, output_file=None, engine_model_type="16k_zh", remove_timestamp=True, tenant_id=None, secret_id=None, secret_key=None, app_id=None, jobs=1, cache=None, trim_silence=False, on_text=None, resume=False, cancel_token=None, progress=None, started_at=None):
+    """按声道拆分多声道录音，各声道作为独立任务并行识别
+    
+    每个声道（超过时长限制时再分割为多个片段）单独创建识别任务，并发数不少于声道数，
+    各声道同时识别。全部完成后按时间顺序合并为一份标注声道的文本，例如通话录音中
+    坐席和客户分别在左右声道时，每句话都能准确对应到说话的一方。
+    
+    Returns:
+        bool: 至少一个片段识别成功时返回True；无法按声道拆分时返回None，由调用方按普通方式识别
+    """
+    started_at = time.monotonic() if started_at is None else started_at
+    workdir = tempfile.mkdtemp(prefix="voice2text_channels_")
+    try:
+        channel_paths = AudioProcessor.split_channels(audio_file_path, workdir)
+        if not channel_paths:
+            return None
+        
+        # 每个片段所属的声道和在该声道中的起始时间
+        segments, channels, offsets = [], [], []
+        for channel, channel_path in enumerate(channel_paths):
+            parts = [channel_path]
+            is_valid, message = AudioProcessor.validate_for_asr(channel_path)
+            if not is_valid:
+                parts = AudioProcessor.split_large_audio(channel_path, output_dir=os.path.join(workdir, f"ch{channel + 1}"))
+                if not parts:
+                    logger.error("声道 %s 分割失败: %s", channel + 1, message)
+                    return False
+            offset = 0.0
+            for part in parts:
+                segments.append(part)
+                channels.append(channel)
+                offsets.append(offset)
+                offset += get_audio_duration(part) or 0.0
+        logger.info("按 %s 个声道分别识别，共 %s 个片段", len(channel_paths), len(segments))
+        
+        if progress is None:
+            progress = ProgressTracker(len(segments))
+        else:
+            progress.reset(len(segments))
+        output_path = get_output_path(audio_file_path, output_file)
+        journal = open_journal(output_path, audio_file_path, engine_model_type, remove_timestamp, False, None, trim_silence, resume, split_channels=True)
+        sink = ResultSink(len(segments))
+        results = process_segments_concurrently(segments, engine_model_type, False, max(jobs, len(channel_paths)), tenant_id, secret_id, secret_key, app_id, cache=cache, trim_silence=trim_silence, sink=sink, journal=journal, cancel_token=cancel_token, progress=progress)
+        
+        if cancel_token is not None and cancel_token.cancelled:
+            logger.info("转换已取消，已完成 %s/%s 个片段，之后可恢复未完成的任务", len(sink.results), len(segments))
+        if journal is not None:
+            if journal.skipped or journal.resumed:
+                logger.info("任务恢复: 跳过已完成的片段 %s 个，继续轮询的任务 %s 个", journal.skipped, journal.resumed)
+            journal.close(remove=all(results))
+        success = any(results)
+        if success:
+            text = merge_channel_results(results, channels, offsets, remove_timestamp)
+            save_result(text, results, audio_file_path, output_path)
+            if on_text is not None:
+                try:
+                    on_text(0, text, 1)
+                except Exception as e:
+                    logger.warning("文本回调失败: %s", e)
+        metrics.job_finished(audio_file_path, time.monotonic() - started_at, success, segments)
+        return success
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# 合并多声道识别结果时每句话前的声道标注
+CHANNEL_LABEL = "声道{}"
+
+def merge_channel_results(results, channels, offsets, remove_timestamp=True):
+    """把各声道片段的识别结果按时间顺序合并为一份文本，每句话标注所属声道
+    
+    Args:
+        results: 各片段的识别结果，失败的片段为None
+        channels: 各片段所属的声道序号（从0开始）
+        offsets: 各片段在所属声道中的起始时间（秒）
+        remove_timestamp: 是否在合并后的文本中省略时间戳
+    """
+    sentences = []
+    for result, channel, offset in zip(results, channels, offsets):
+        if not result:
+            continue
+        response = result.get("full_result") or {}
+        for line in (response.get("Result") or result.get("text") or "").splitlines():
+            line = line.strip()
+            match = TIMESTAMP_PATTERN.match(line)
+            if match:
+                start = parse_timestamp(match.group(1)) + offset
+                end = parse_timestamp(match.group(2)) + offset
+                line = line[match.end():].strip()
+            else:
+                start = end = offset
+            if line:
+                sentences.append((start, channel, end, line))
+    # 开始时间相同时按声道顺序排列
+    sentences.sort(key=lambda sentence: sentence[:2])
+    
+    lines = []
+    for start, channel, end, text in sentences:
+        label = CHANNEL_LABEL.format(channel + 1)
+        if remove_timestamp:
+            lines.append(f"{label}: {text}")
+        else:
+            lines.append(f"[{format_timestamp(start)},{format_timestamp(end)}]  {label}: {text}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+def open_journal(output_path, audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, trim_silence, resume=False, split_channels=False):
+    """在输出文件旁打开任务日志，失败时返回None（不影响识别）"""
+    params = {
+        "input": os.path.abspath(audio_file_path),
+        "engine_model_type": engine_model_type,
+        "remove_timestamp": bool(remove_timestamp),
+        "speaker_diarization": bool(speaker_diarization),
+        "speaker_count": speaker_count if speaker_diarization else None,
+        "trim_silence": bool(trim_silence)
+    }
+    if split_channels:
+        params["split_channels"] = True
+    try:
+        return JobJournal(get_journal_path(output_path), params, resume)
+    except Exception as e:
+        logger.warning("打开任务日志失败，中断后将无法恢复: %s", e)
+        return None
+
+def finish_sink(sink, journal=None, cancel_token=None):
+    """结束增量输出，至少一个片段成功时返回True
+    
+    所有片段都成功时删除任务日志，否则保留日志供 --resume 只重试失败的片段。
+    """
+    sink.close()
+    if cancel_token is not None and cancel_token.cancelled:
+        logger.info("转换已取消，已完成 %s/%s 个片段，之后可恢复未完成的任务", len(sink.results), sink.total)
+    if journal is not None:
+        if journal.skipped or journal.resumed:
+            logger.info("任务恢复: 跳过已完成的片段 %s 个，继续轮询的任务 %s 个", journal.skipped, journal.resumed)
+        journal.close(remove=len(sink.results) == sink.total)
+    if not sink.results:
+        return False
+    logger.info("识别结果已保存到: %s", sink.output_file)
+    if sink.time_to_first_text is not None:
+        logger.info("首段文本耗时: %.2f秒", sink.time_to_first_text)
+    return True
+
+def start_task(tencent_api, audio_file_path, engine_model_type, trim_silence=False, journal=None, cancel_token=None, on_stage=None):
+    """创建识别任务；任务日志中有该片段尚未完成的任务时直接复用，不再上传
+    
+    Args:
+        cancel_token: CancelToken实例，已取消或上传中被取消时抛出JobCancelledError
+        on_stage: 片段进入上传、排队阶段时调用的函数，参数为阶段名称
+    
+    Returns:
+        tuple: (任务ID, 音频时长, 时间偏移映射, 是否为恢复的任务)，创建失败时返回None
+    """
+    if cancel_token is not None:
+        cancel_token.check()
+    if journal is not None:
+        pending = journal.get_pending(audio_file_path)
+        if pending:
+            logger.info("恢复识别任务: %s，TaskId: %s", audio_file_path, pending['task_id'])
+            if on_stage is not None:
+                on_stage("queued")
+            return pending['task_id'], pending.get('audio_duration'), pending.get('offset_map'), True
+    
+    if on_stage is not None:
+        on_stage("uploading")
+
+    # 裁剪静音生成的临时文件上传后即删除；各阶段耗时记在原片段名下
+    with metrics.job(audio_file_path), metrics.span("submit"):
+        upload_path, offset_map = prepare_upload(audio_file_path, trim_silence)
+        try:
+            task_id = submit_audio_task(tencent_api, upload_path, engine_model_type, cancel_token)
+            audio_duration = get_audio_duration(upload_path)
+        finally:
+            cleanup_upload(upload_path, audio_file_path)
+        if task_id is None:
+            return None
+        metrics.task_submitted(task_id)
+    if journal is not None:
+        journal.record_submitted(audio_file_path, task_id, audio_duration, offset_map)
+    if on_stage is not None:
+        on_stage("queued")
+    return task_id, audio_duration, offset_map, False
+
+def submit_audio_task(tencent_api, audio_file_path, engine_model_type, cancel_token=None):
+    """上传音频文件并创建识别任务
+    
+    Returns:
+        任务ID，创建失败时返回None
+    """
+    logger.info("正在直接上传音频文件进行识别: %s", audio_file_path)
+    task_response = tencent_api.recognize_audio_directly(audio_file_path, engine_model_type, callback_url=tencent_api.callback_url,
+                                                         cancel_token=cancel_token)
+    
+    if not task_response or "TaskId" not in task_response:
+        logger.error("创建识别任务失败")
+        return None
+    
+    task_id = task_response["TaskId"]
+    logger.info("识别任务已创建，TaskId: %s", task_id, extra={"task_id": task_id, "file": audio_file_path})
+    return task_id
+
+def prepare_upload(audio_file_path, trim_silence=False):
+    """按需裁剪静音，返回(待上传的文件路径, 时间偏移映射)，未裁剪时映射为None"""
+    if not trim_silence:
+        return audio_file_path, None
+    with metrics.stage("trim"):
+        upload_path, offset_map, _ = AudioProcessor.trim_silence(audio_file_path)
+    return upload_path, offset_map
+
+def cleanup_upload(upload_path, audio_file_path):
+    """删除上传用的临时文件"""
+    if upload_path != audio_file_path and os.path.exists(upload_path):
+        os.remove(upload_path)
+
+def get_audio_duration(audio_file_path):
+    """获取音频时长（秒），用于估算轮询时间，未知时返回None"""
+    try:
+        return AudioProcessor.get_audio_info(audio_file_path).get('duration') or None
+    except Exception:
+        return None
+
+def wait_for_task(tencent_api, task_id, audio_duration=None, cancel_token=None, on_stage=None):
+    """通过共享轮询调度器等待识别任务完成
+    
+    Args:
+        cancel_token: CancelToken实例，取消时立即结束等待并抛出JobCancelledError
+        on_stage: 查询到的任务状态变化时调用的函数，参数为阶段名称
+    
+    Returns:
+        dict: 任务成功时的状态结果，失败或超时返回None
+    """
+    poller = tencent_api.get_poller()
+    on_status = None
+    if on_stage is not None:
+        on_status = lambda status: on_stage(ProgressTracker.status_stage(status))
+    handle = None
+    try:
+        future = poller.submit(task_id, audio_duration, callback=bool(tencent_api.callback_url), on_status=on_status)
+        if cancel_token is not None:
+            # 取消时由取消线程结束Future，等待的线程立即返回
+            handle = cancel_token.add_callback(lambda: poller.cancel(task_id))
+        return future.result()
+    except CancelledError:
+        raise JobCancelledError(f"已取消等待识别任务: {task_id}")
+    except Exception as e:
+        logger.error("识别失败: %s", e)
+        return None
+    finally:
+        if handle is not None:
+            cancel_token.remove_callback(handle)
+        # 通过回调完成的任务没有经过状态查询
+        metrics.task_finished(task_id)
+
+def process_segments_concurrently(segment_paths, engine_model_type, remove_timestamp=True, jobs=4, tenant_id=None, secret_id=None, secret_key=None, app_id=None, cache=None, trim_silence=False, sink=None, journal=None, cancel_token=None, progress=None):
+    """并发处理多个音频片段
+    
+    先以最多jobs个线程并行上传所有片段并创建识别任务，再交给共享轮询调度器
+    统一查询所有未完成任务的状态。每个片段完成时立即交给sink，由sink按片段顺序输出。
+    
+    Args:
+        sink: ResultSink实例，None则只收集结果
+        journal: JobJournal实例，记录任务状态并在恢复时复用
+        cancel_token: CancelToken实例，取消后不再提交新片段，等待中的任务立即结束
+        progress: ProgressTracker实例，按各片段的任务状态更新进度
+    
+    Returns:
+        list: 与segment_paths一一对应的结果列表，失败的片段为None
+    """
+    total = len(segment_paths)
+    if sink is None:
+        sink = ResultSink(total)
+    results = [None] * total
+    try:
+        tencent_api = get_shared_api(tenant_id=tenant_id, secret_id=secret_id, secret_key=secret_key, app_id=app_id)
+    except Exception as e:
+        logger.error("初始化腾讯云API失败: %s", e)
+        for index in range(total):
+            sink.add(index, None)
+        return results
+    
+    poller = tencent_api.get_poller()
+    progress_lock = threading.Lock()
+    finished = [0]
+    
+    def cancelled():
+        return cancel_token is not None and cancel_token.cancelled
+    
+    def finish(index, result):
+        results[index] = result
+        # 先输出进度再交给sink，最后一个片段交给sink后主线程即可返回
+        with progress_lock:
+            finished[0] += 1
+            logger.info("识别进度: %s/%s", finished[0], total)
+        if progress is not None and (result or not cancelled()):
+            progress.update(index, "done" if result else "failed")
+        sink.add(index, result)
+    
+    def handle_result(index, path, task_id, offset_map, resumed, cache_key, handle, future):
+        result = None
+        metrics.task_finished(task_id)
+        if handle is not None:
+            cancel_token.remove_callback(handle)
+        try:
+            result_response = future.result()
+            with metrics.stage("parse", path):
+                if offset_map:
+                    remap_result_timestamps(result_response, offset_map)
+                result = {
+                    "task_id": task_id,
+                    "text": extract_result_text(result_response, remove_timestamp),
+                    "full_result": result_response
+                }
+            if cache_key:
+                cache.put(cache_key, result)
+            if journal is not None:
+                journal.record_completed(path, result)
+        except CancelledError:
+            # 任务保持已提交状态，恢复时继续查询
+            logger.info("片段 %s 已取消", index + 1)
+        except Exception as e:
+            logger.error("片段 %s 识别失败: %s", index + 1, e)
+            if journal is not None:
+                journal.record_failed(path, str(e))
+            if resumed and not cancelled():
+                # 恢复的任务可能已在服务端过期，重新上传一次
+                logger.info("片段 %s 重新提交", index + 1)
+                submit(index, path)
+                return
+        finish(index, result)
     
-    return False
+    def submit(index, path):
+        on_stage = progress.stage_callback(index) if progress is not None else None
+        try:
+            if cancel_token is not None:
+                cancel_token.check()
+            cache_key, cached = lookup_cache(cache, path, engine_model_type, remove_timestamp, trim_silence=trim_silence, api=tencent_api)
+            if cached:
+                finish(index, cached)
+                return
+            journaled = journal.get_result(path) if journal is not None else None
+            if journaled:
+                finish(index, journaled)
+                return
+            started = start_task(tencent_api, path, engine_model_type, trim_silence, journal, cancel_token, on_stage)
+            if started is None:
+                finish(index, None)
+                return
+            task_id, audio_duration, offset_map, resumed = started
+            on_status = None
+            if on_stage is not None:
+                on_status = lambda status: on_stage(ProgressTracker.status_stage(status))
+            future = poller.submit(task_id, audio_duration, callback=bool(tencent_api.callback_url), on_status=on_status)
+            handle = None
+            if cancel_token is not None:
+                handle = cancel_token.add_callback(lambda: poller.cancel(task_id))
+            # 完成回调在轮询线程中执行，只把结果交给提交线程池处理；解析、写缓存、
+            # 写任务日志和重新提交都可能耗时，不能占用轮询线程
+            future.add_done_callback(lambda f: executor.submit(handle_result, index, path, task_id, offset_map, resumed, cache_key, handle, f))
+        except JobCancelledError:
+            finish(index, None)
+        except Exception as e:
+            logger.error("上传片段失败 %s: %s", path, e)
+            finish(index, None)
+    
+    # 并行提交所有片段，提交后立即进入轮询调度；线程池在所有结果处理完之前保持可用
+    logger.info("正在并行提交 %s 个片段（并发数: %s）...", total, jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for index, path in enumerate(segment_paths):
+            executor.submit(submit, index, path)
+        
+        logger.info("正在等待识别结果...")
+        sink.wait()
+    return results
 
-def process_single_audio(audio_file_path, engine_model_type, remove_timestamp=True, speaker_diarization=False, speaker_count=2, tenant_id=None, secret_id=None, secret_key=None, app_id=None):
+def process_single_audio(audio_file_path, engine_model_type, remove_timestamp=True, speaker_diarization=False, speaker_count=2, tenant_id=None, secret_id=None, secret_key=None, app_id=None, cache=None, trim_silence=False, journal=None, cancel_token=None, on_stage=None):
     """处理单个音频文件
     
     Args:
@@ -70,122 +492,216 @@ def process_single_audio(audio_file_path, engine_model_type, remove_timestamp=Tr
         remove_timestamp: 是否移除时间戳
         speaker_diarization: 是否进行说话人分离
         speaker_count: 说话人数量
+        cache: TranscriptCache实例，命中时直接返回缓存结果
+        trim_silence: 上传前是否裁剪长静音
+        journal: JobJournal实例，记录任务状态并在恢复时复用
+        cancel_token: CancelToken实例，取消时停止上传或等待并返回None
+        on_stage: 片段所处阶段（上传、排队、识别中、完成、失败）变化时调用的函数
     
     Returns:
         dict: 包含识别结果的字典
     """
+    on_stage = on_stage or _ignore_stage
     try:
-        # 初始化腾讯云API
-        tencent_api = TencentCloudAPI(tenant_id=tenant_id, secret_id=secret_id, secret_key=secret_key, app_id=app_id)
+        # 获取共享的腾讯云API客户端
+        tencent_api = get_shared_api(tenant_id=tenant_id, secret_id=secret_id, secret_key=secret_key, app_id=app_id)
         
-        # 转换音频格式（如果需要）
-        print("正在处理音频文件...")
-        # 这里简化处理，实际使用时可能需要转换
+        # 先查询结果缓存，命中则无需上传和识别
+        cache_key, cached = lookup_cache(cache, audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, trim_silence, tencent_api)
+        if cached:
+            on_stage("done")
+            return cached
         
-        # 直接上传音频文件进行识别（不使用对象存储）
-        print("正在直接上传音频文件进行识别...")
-        task_response = tencent_api.recognize_audio_directly(audio_file_path, engine_model_type)
+        # 中断前已完成的片段直接使用任务日志中的结果
+        if journal is not None:
+            journaled = journal.get_result(audio_file_path)
+            if journaled:
+                logger.info("任务日志中已有识别结果: %s", audio_file_path)
+                on_stage("done")
+                return journaled
         
-        if not task_response or "TaskId" not in task_response:
-            print("创建识别任务失败")
-            return None
-        
-        task_id = task_response["TaskId"]
-        print(f"识别任务已创建，TaskId: {task_id}")
+        # 转换音频格式（如果需要）
+        logger.debug("正在处理音频文件...")
+        # 这里简化处理，实际使用时可能需要转换
         
-        # 轮询获取识别结果
-        print("正在等待识别结果...")
-        max_attempts = 60  # 最多轮询60次
-        attempt = 0
+        # 短音频使用一句话识别，一次请求即返回结果；一句话识别不支持说话人分离
+        result = None
+        if not speaker_diarization:
+            result = recognize_short_audio(tencent_api, audio_file_path, engine_model_type, remove_timestamp, trim_silence, cancel_token, on_stage)
+        if result is not None:
+            if cache_key:
+                cache.put(cache_key, result)
+            if journal is not None:
+                journal.record_completed(audio_file_path, result)
+            on_stage("done")
+            return result
         
-        while attempt < max_attempts:
-            attempt += 1
-            result_response = tencent_api.get_recognition_result(task_id)
+        # 直接上传音频文件进行识别（不使用对象存储），任务日志中有未完成的任务时继续轮询该任务
+        while True:
+            started = start_task(tencent_api, audio_file_path, engine_model_type, trim_silence, journal, cancel_token, on_stage)
+            if started is None:
+                on_stage("failed")
+                return None
+            task_id, audio_duration, offset_map, resumed = started
             
-            if result_response and "Status" in result_response:
-                status = result_response["Status"]
-                
-                if status == 2:  # 任务成功
-                    print("识别完成！")
-                    # 提取文本结果
-                    text = ""
-                    if "Result" in result_response:
-                        text = result_response["Result"]
-                        # 移除时间戳
-                        if remove_timestamp:
-                            lines = text.split('\n')
-                            clean_lines = []
-                            for line in lines:
-                                # 移除类似 [0:0.000,0:1.489] 这样的时间戳
-                                if '[' in line and ':' in line and ',' in line and ']' in line:
-                                    # 找到最后一个 ] 的位置
-                                    bracket_pos = line.rfind(']')
-                                    if bracket_pos > -1 and bracket_pos + 1 < len(line):
-                                        clean_lines.append(line[bracket_pos + 1:].strip())
-                                    else:
-                                        clean_lines.append(line)
-                                else:
-                                    clean_lines.append(line)
-                            text = '\n'.join(clean_lines)
-                    elif "ResultDetail" in result_response:
-                        # 处理详细结果
-                        for item in result_response["ResultDetail"]:
-                            if "Text" in item:
-                                text += item["Text"] + "\n"
-                    
-                    return {
-                        "task_id": task_id,
-                        "text": text,
-                        "full_result": result_response
-                    }
-                elif status == 3:  # 任务失败
-                    print(f"识别失败: {result_response.get('ErrorMsg', '未知错误')}")
-                    return None
-                elif status == 1:  # 任务进行中
-                    print(f"识别中... (尝试 {attempt}/{max_attempts})")
-                    time.sleep(3)  # 每3秒轮询一次
-                elif status == 0:  # 任务等待中
-                    print(f"识别等待中... (尝试 {attempt}/{max_attempts})")
-                    time.sleep(3)  # 每3秒轮询一次
-                else:
-                    print(f"未知状态: {status}")
-                    time.sleep(3)  # 未知状态也继续尝试轮询
-            else:
-                print("获取结果失败，重试中...")
-                time.sleep(3)
-        
-        print("轮询超时")
-        return None
+            # 轮询获取识别结果（查询时间根据音频时长和任务状态自适应调整）
+            logger.info("正在等待识别结果...")
+            result_response = wait_for_task(tencent_api, task_id, audio_duration, cancel_token, on_stage)
+            if result_response is not None:
+                break
+            if journal is not None:
+                journal.record_failed(audio_file_path)
+            if not resumed:
+                on_stage("failed")
+                return None
+            # 恢复的任务可能已在服务端过期，重新上传一次
+            logger.warning("恢复的任务未能完成，重新提交")
+        logger.info("识别完成！")
+        with metrics.stage("parse", audio_file_path):
+            if offset_map:
+                remap_result_timestamps(result_response, offset_map)
+            text = extract_result_text(result_response, remove_timestamp)
+        result = {
+            "task_id": task_id,
+            "text": text,
+            "full_result": result_response
+        }
+        if cache_key:
+            cache.put(cache_key, result)
+        if journal is not None:
+            journal.record_completed(audio_file_path, result)
+        on_stage("done")
+        return result
     
+    except JobCancelledError:
+        # 已提交的任务保留在任务日志中，恢复时继续查询
+        logger.info("已取消: %s", audio_file_path)
+        return None
     except Exception as e:
-        print(f"处理音频文件时出错: {str(e)}")
+        logger.error("处理音频文件时出错: %s", e)
+        on_stage("failed")
         return None
 
-def save_result(text, detailed_results, audio_file_path, output_file=None):
-    """保存识别结果"""
-    # 如果没有指定输出文件，自动生成
-    if output_file is None:
-        base_name = os.path.splitext(audio_file_path)[0]
-        output_file = f"{base_name}_transcript.txt"
+def _ignore_stage(stage):
+    pass
+
+def recognize_short_audio(tencent_api, audio_file_path, engine_model_type, remove_timestamp=True, trim_silence=False, cancel_token=None, on_stage=None):
+    """短音频直接调用一句话识别（SentenceRecognition），不创建任务、不轮询
     
-    # 保存文本结果
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(text)
-        print(f"识别结果已保存到: {output_file}")
-        
-    except Exception as e:
-        print(f"保存结果时出错: {str(e)}")
+    Returns:
+        dict: 与process_single_audio相同结构的结果（task_id为None）；音频不适合一句话识别
+            或识别失败时返回None，由调用方改用录音文件识别
+    """
+    voice_format = tencent_api.get_sentence_voice_format(audio_file_path, engine_model_type, tencent_api.sentence_max_duration)
+    if voice_format is None:
+        return None
+    if cancel_token is not None:
+        cancel_token.check()
+    if on_stage is not None:
+        on_stage("uploading")
+    logger.info("短音频使用一句话识别: %s", audio_file_path)
+    with metrics.job(audio_file_path), metrics.span("sentence"):
+        upload_path, offset_map = prepare_upload(audio_file_path, trim_silence)
+        try:
+            if upload_path != audio_file_path:
+                # 裁剪静音后生成的是WAV文件
+                voice_format = "wav"
+            response = tencent_api.recognize_audio_file(upload_path, engine_model_type, voice_format)
+        except Exception as e:
+            logger.warning("一句话识别失败，改用录音文件识别: %s", e)
+            return None
+        finally:
+            cleanup_upload(upload_path, audio_file_path)
+    with metrics.stage("parse", audio_file_path):
+        result_response = sentence_result_response(response)
+        if offset_map:
+            remap_result_timestamps(result_response, offset_map)
+        text = extract_result_text(result_response, remove_timestamp)
+    return {
+        "task_id": None,
+        "text": text,
+        "full_result": result_response
+    }
+
 
 def main():
     """主函数"""
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='语音文件转文字工具')
-    parser.add_argument('input_file', help='输入音频文件路径')
+    parser.add_argument('input_file', nargs='?', help='输入音频文件路径')
     parser.add_argument('-o', '--output', help='输出文本文件路径（可选）')
     parser.add_argument('-m', '--model', default='16k_zh', help='引擎模型类型（默认: 16k_zh，支持其他模型如16k_en等）')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='长音频分割后并发处理的片段数（默认: 1，逐个处理）')
+    # 批量处理参数
+    parser.add_argument('-b', '--batch', nargs='+', metavar='PATH', help='批量处理模式：目录、通配符模式或音频文件（可指定多个）')
+    parser.add_argument('--manifest', help='批量处理清单文件，每行一个音频文件路径')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='批量处理时同时处理的文件数（默认: 4）')
+    parser.add_argument('--output-dir', help='批量处理结果输出目录（默认保存在每个音频文件旁）')
+    # 监控目录参数
+    parser.add_argument('--watch', nargs='+', metavar='DIR', help='监控模式：持续监控目录，自动转写新写入完成的音频文件（Ctrl+C停止）')
+    parser.add_argument('--done-dir', help='监控模式下处理成功的音频移动到的目录（默认保留在原处，通过处理记录避免重复处理）')
+    parser.add_argument('--failed-dir', help='监控模式下处理失败的音频移动到的目录')
+    parser.add_argument('--settle-time', type=float, default=2.0, help='文件大小和修改时间保持不变多少秒后视为写入完成（默认: 2）')
+    parser.add_argument('--scan-interval', type=float, default=1.0, help='监控目录的扫描间隔（秒，默认: 1）')
+    parser.add_argument('--recursive', action='store_true', help='监控模式下同时监控子目录')
+    # 转写服务参数
+    parser.add_argument('--serve', action='store_true', help='服务模式：启动本地HTTP转写服务，多个调用方共用任务队列、客户端和缓存')
+    parser.add_argument('--serve-host', default='127.0.0.1', help='转写服务监听地址（默认: 127.0.0.1）')
+    parser.add_argument('--serve-port', type=int, default=8765, help='转写服务监听端口（默认: 8765）')
+    parser.add_argument('--work-dir', help='转写服务保存上传音频和识别结果的目录（默认为临时目录）')
+    parser.add_argument('--serve-root', help='转写服务允许按本机路径提交的目录，只接受该目录下的文件（默认不接受按路径提交）')
+    # 缓存参数
+    parser.add_argument('--no-cache', action='store_true', help='不使用识别结果缓存')
+    parser.add_argument('--cache-dir', help='识别结果缓存目录（默认: ~/.cache/voice2text）')
+    # 回调参数
+    parser.add_argument('--callback-port', type=int, help='启动本地回调接收服务器的端口，识别完成时由服务端回调通知（0表示自动分配）')
+    parser.add_argument('--callback-host', default='127.0.0.1', help='回调接收服务器监听地址（默认: 127.0.0.1）')
+    parser.add_argument('--callback-url', help='服务端可访问的回调地址（经过NAT或反向代理时指定）')
+    # 上传前预处理参数
+    parser.add_argument('--normalize', action='store_true', help='上传前重采样到引擎采样率并混为单声道，减少上传数据量')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的任务日志恢复：复用未完成的任务，跳过已完成的片段')
+    parser.add_argument('--trim-silence', action='store_true', help='上传前裁剪长静音（时间戳会换算回原始音频）')
+    parser.add_argument('--split-channels', action='store_true', help='多声道WAV按声道分别识别，结果按时间合并并标注声道（如通话录音的坐席和客户）')
+    parser.add_argument('--sentence-max-duration', type=float, metavar='SECONDS',
+                        help='不超过该时长的短音频使用一句话识别，一次请求返回结果（默认: 60，0表示总是创建识别任务）')
+    # 频率限制参数
+    parser.add_argument('--rate-limit', action='append', metavar='ACTION=QPS',
+                        help='接口每秒请求数上限，例如 --rate-limit CreateRecTask=20（可重复指定，0表示不限流）')
+    # 阶段耗时统计参数
+    parser.add_argument('--metrics-prom', metavar='PATH', help='将各阶段耗时直方图写入Prometheus文本文件')
+    parser.add_argument('--metrics-json', metavar='PATH', help='将各阶段耗时和每个片段的统计写入JSON运行报告')
+    # 日志和跟踪参数
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='日志级别（默认: INFO）')
+    parser.add_argument('--log-format', default='text', choices=['text', 'json'], help='日志格式：text或每行一条JSON（默认: text）')
+    parser.add_argument('--log-sample', type=float, default=1.0, metavar='RATE', help='DEBUG日志采样比例，例如0.01表示同一条日志每100次输出1次')
+    parser.add_argument('--log-file', help='日志输出文件（默认输出到终端）')
+    parser.add_argument('--trace', metavar='PATH', help='将各阶段的时间区间导出为Chrome trace JSON（可在chrome://tracing或Perfetto中查看）')
+    parser.add_argument('--codec', choices=sorted(AudioProcessor.NORMALIZE_CODECS), help='预处理后压缩编码的格式（需要pydub和ffmpeg，隐含--normalize）')
     
     args = parser.parse_args()
+    configure_logging(args.log_level, args.log_format == 'json', args.log_sample, args.log_file)
+    
+    if args.callback_port is not None:
+        enable_callbacks(args)
+    if args.normalize or args.codec:
+        enable_normalization(args)
+    if args.rate_limit:
+        configure_rate_limits(args)
+    if args.sentence_max_duration is not None:
+        configure_sentence_recognition(args)
+    if args.metrics_prom or args.metrics_json:
+        metrics.enable_metrics()
+    if args.trace:
+        metrics.enable_tracing()
+    
+    if args.serve:
+        return run_serve(args)
+    if args.watch:
+        return run_watch(args)
+    if args.batch or args.manifest:
+        return run_batch(args)
+    if not args.input_file:
+        parser.error("请指定输入音频文件，或使用 --batch/--manifest 进行批量处理")
     
     # 显示欢迎信息
     print("=== 语音文件转文字工具 ===")
@@ -195,12 +711,179 @@ def main():
     print("注意: 当前使用直接上传音频文件的方式进行识别，无需对象存储服务")
     
     # 处理音频文件
-    success = process_audio_to_text(args.input_file, args.output, args.model)
+    cache = create_cache(args)
+    success = process_audio_to_text(args.input_file, args.output, args.model, jobs=max(1, args.jobs), cache=cache,
+                                    trim_silence=args.trim_silence, resume=args.resume, split_channels=args.split_channels)
+    log_cache_stats(cache)
+    log_normalize_stats()
+    log_rate_limit_stats()
+    export_metrics(args)
     
     if success:
         print("\n转换完成！")
     else:
         print("\n转换失败，请检查错误信息")
 
+def enable_callbacks(args):
+    """为共享客户端启用识别完成回调"""
+    try:
+        get_shared_api().enable_callbacks(args.callback_host, args.callback_port, args.callback_url)
+    except Exception as e:
+        logger.warning("启动回调接收服务器失败，将使用轮询: %s", e)
+
+def enable_normalization(args):
+    """为共享客户端启用上传前音频预处理"""
+    try:
+        get_shared_api().enable_normalization(args.codec)
+    except Exception as e:
+        logger.warning("启用音频预处理失败，将上传原文件: %s", e)
+
+def configure_sentence_recognition(args):
+    """按命令行参数设置共享客户端使用一句话识别的最长音频时长"""
+    try:
+        get_shared_api().set_sentence_max_duration(args.sentence_max_duration)
+    except Exception as e:
+        logger.warning("设置一句话识别时长失败: %s", e)
+
+def configure_rate_limits(args):
+    """按命令行参数设置共享客户端各接口的频率限制"""
+    try:
+        rate_limiter = get_shared_api().rate_limiter
+        for action, rate in parse_rate_limits(args.rate_limit).items():
+            rate_limiter.set_limit(action, rate)
+    except Exception as e:
+        logger.warning("设置频率限制失败，将使用默认配额: %s", e)
+
+def log_rate_limit_stats():
+    try:
+        tencent_api = get_shared_api()
+    except Exception:
+        return
+    for action, stats in tencent_api.rate_limiter.get_metrics().items():
+        if stats["calls"]:
+            logger.info("频率限制统计: %s 请求 %s 次，被限流 %s 次，峰值排队 %s，平均等待 %.0fms",
+                        action, stats['calls'], stats['throttled'], stats['max_waiting'], stats['avg_wait'] * 1000)
+
+def export_metrics(args):
+    """按命令行参数导出阶段耗时统计"""
+    registry = metrics.get_metrics()
+    if registry is None:
+        return
+    try:
+        if args.trace:
+            metrics.get_tracer().write(args.trace)
+            logger.info("跟踪数据已写入: %s", args.trace)
+        if args.metrics_prom:
+            registry.write_prometheus(args.metrics_prom)
+            logger.info("阶段耗时指标已写入: %s", args.metrics_prom)
+        if args.metrics_json:
+            registry.write_json(args.metrics_json)
+            logger.info("运行报告已写入: %s", args.metrics_json)
+    except Exception as e:
+        logger.warning("导出统计信息失败: %s", e)
+
+def log_normalize_stats():
+    try:
+        tencent_api = get_shared_api()
+    except Exception:
+        return
+    stats = tencent_api.normalize_stats
+    if tencent_api.normalize and stats["files"]:
+        saved = stats["original_bytes"] - stats["output_bytes"]
+        logger.info("预处理统计: %s 个文件，上传数据 %s -> %s 字节（节省 %s 字节），编码耗时 %.2f秒",
+                    stats['files'], stats['original_bytes'], stats['output_bytes'], saved, stats['encode_time'])
+
+def create_cache(args):
+    """根据命令行参数创建识别结果缓存，--no-cache时返回None"""
+    if args.no_cache:
+        return None
+    from transcript_cache import TranscriptCache, get_default_cache
+    try:
+        return TranscriptCache(args.cache_dir) if args.cache_dir else get_default_cache()
+    except Exception as e:
+        logger.warning("初始化识别结果缓存失败，将不使用缓存: %s", e)
+        return None
+
+def log_cache_stats(cache):
+    if cache is not None:
+        stats = cache.get_stats()
+        logger.info("缓存统计: 命中 %s，未命中 %s，条目 %s", stats['hits'], stats['misses'], stats['entries'])
+
+def run_batch(args):
+    """批量处理模式"""
+    from batch_processor import BatchProcessor, collect_input_files
+    
+    print("=== 语音文件转文字工具（批量模式） ===")
+    files = collect_input_files(args.batch, args.manifest)
+    cache = create_cache(args)
+    processor = BatchProcessor(workers=args.workers, output_dir=args.output_dir,
+                               engine_model_type=args.model, jobs=max(1, args.jobs), cache=cache,
+                               trim_silence=args.trim_silence, resume=args.resume, split_channels=args.split_channels)
+    summary = processor.run(files)
+    log_cache_stats(cache)
+    log_normalize_stats()
+    log_rate_limit_stats()
+    export_metrics(args)
+    
+    print(f"\n批量处理完成: 成功 {summary['succeeded']}/{summary['total']}，"
+          f"耗时 {summary['elapsed']:.1f}s，{summary['files_per_minute']:.1f} 文件/分钟")
+    return summary['failed'] == 0
+
+def run_serve(args):
+    """本地HTTP转写服务模式，Ctrl+C停止"""
+    from transcribe_server import TranscriptionService
+    
+    print("=== 语音文件转文字工具（服务模式） ===")
+    cache = create_cache(args)
+    service = TranscriptionService(args.serve_host, args.serve_port, workers=args.workers, work_dir=args.work_dir,
+                                   cache=cache, jobs=max(1, args.jobs), path_root=args.serve_root)
+    service.start()
+    print(f"转写服务已启动: {service.url}")
+    
+    def on_terminate(signum, frame):
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, on_terminate)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n正在停止，取消未完成的任务...")
+    finally:
+        service.stop()
+        log_cache_stats(cache)
+        log_rate_limit_stats()
+        export_metrics(args)
+    return True
+
+def run_watch(args):
+    """监控目录模式，Ctrl+C停止"""
+    from watch_folder import FolderWatcher
+    
+    print("=== 语音文件转文字工具（监控模式） ===")
+    cache = create_cache(args)
+    watcher = FolderWatcher(args.watch, workers=args.workers, output_dir=args.output_dir,
+                            engine_model_type=args.model, jobs=max(1, args.jobs), cache=cache,
+                            trim_silence=args.trim_silence, split_channels=args.split_channels,
+                            done_dir=args.done_dir, failed_dir=args.failed_dir, interval=args.scan_interval,
+                            settle_time=args.settle_time, recursive=args.recursive)
+    watcher.start()
+    
+    def on_terminate(signum, frame):
+        raise KeyboardInterrupt
+    
+    # 作为服务运行时按SIGTERM停止，与Ctrl+C相同
+    signal.signal(signal.SIGTERM, on_terminate)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n正在停止，处理中的任务将在下次启动时继续...")
+    finally:
+        watcher.stop()
+        log_cache_stats(cache)
+        log_rate_limit_stats()
+        export_metrics(args)
+    return True
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
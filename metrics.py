@@ -0,0 +1,373 @@
+import os
+import json
+import time
+import threading
+
+# 各处理阶段
+STAGES = ("pickup", "trim", "normalize", "read", "encode", "upload", "sentence", "queue_wait", "recognition", "parse", "save")
+
+# 阶段耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+class _NullTimer:
+    """未启用统计时使用的空计时器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+# 当前线程正在处理的片段，未显式指定片段的计时记在它名下
+_current = threading.local()
+
+class _StageTimer:
+    def __init__(self, registry, stage, job, args=None):
+        self.registry = registry
+        self.stage = stage
+        self.job = job if job is not None else getattr(_current, 'job', None)
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        if self.registry is not None:
+            self.registry.observe(self.stage, duration, self.job)
+        if _tracer is not None:
+            args = dict(self.args) if self.args else {}
+            if self.job is not None:
+                args["job"] = self.job
+            _tracer.add(self.stage, self.start, duration, args=args)
+        return False
+
+class Tracer:
+    """记录时间区间（span），导出为Chrome trace格式
+
+    导出的JSON可以在 chrome://tracing 或 https://ui.perfetto.dev 中打开。每个线程一行；
+    服务端排队和识别没有对应的本地线程，按任务单独成行显示。
+    """
+
+    MAX_EVENTS = 1000000  # 最多记录的事件数，超出后丢弃新事件
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events = []
+        self._threads = {}
+        self._lanes = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def add(self, name, start, duration, tid=None, args=None):
+        """记录一个区间，start为time.perf_counter()的值"""
+        thread_name = None
+        if tid is None:
+            tid = threading.get_ident()
+            thread_name = threading.current_thread().name
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": self._pid,
+            "tid": tid
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            if len(self._events) >= self.MAX_EVENTS:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            if thread_name is not None:
+                self._threads[tid] = thread_name
+
+    def lane(self, label):
+        """返回一个虚拟线程编号，用于显示不属于本地线程的区间（例如服务端排队）"""
+        with self._lock:
+            tid = self._lanes.get(label)
+            if tid is None:
+                # 避开真实线程编号
+                tid = self._lanes[label] = -(len(self._lanes) + 1)
+            return tid
+
+    def to_chrome_trace(self):
+        with self._lock:
+            events = list(self._events)
+            names = dict(self._threads)
+            names.update({tid: label for label, tid in self._lanes.items()})
+        for tid, name in names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """按桶估算分位数（返回所在桶的上界）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bound in enumerate(DURATION_BUCKETS):
+            seen += self.counts[i]
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+class MetricsRegistry:
+    """处理阶段耗时统计
+
+    记录每个阶段的耗时直方图，以及每个片段（按文件路径）的各阶段耗时、读取和上传的字节数、状态查询次数。
+    服务端排队时间（Status=0）和识别时间（Status=1）根据状态查询观察到的状态变化计算，精度受查询间隔限制；
+    通过回调完成的任务以回调到达的时间作为完成时间。
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {"bytes_read": 0, "bytes_uploaded": 0, "polls": 0, "tasks": 0}
+        self._segments = {}
+        self._jobs = {}
+        self._tasks = {}  # 任务ID -> [片段, 提交时间, 开始识别时间]
+
+    def _segment(self, job):
+        entry = self._segments.get(job)
+        if entry is None:
+            entry = self._segments[job] = {"stages": {}, "bytes_read": 0, "bytes_uploaded": 0, "polls": 0}
+        return entry
+
+    def observe(self, stage, seconds, job=None):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = _Histogram()
+            histogram.observe(seconds)
+            if job is not None:
+                stages = self._segment(job)["stages"]
+                stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def add_bytes(self, kind, count, job=None):
+        """累计字节数，kind为read或uploaded"""
+        key = f"bytes_{kind}"
+        with self._lock:
+            self._counters[key] += count
+            if job is not None:
+                self._segment(job)[key] += count
+
+    def task_submitted(self, task_id, job=None):
+        with self._lock:
+            self._counters["tasks"] += 1
+            self._tasks[task_id] = [job, time.perf_counter(), None]
+            if job is not None:
+                self._segment(job)["task_id"] = task_id
+
+    def task_polled(self, task_id, status):
+        """记录一次状态查询，状态为1时记下开始识别的时间，2/3时结束该任务"""
+        with self._lock:
+            self._counters["polls"] += 1
+            task = self._tasks.get(task_id)
+            if task is None:
+                return
+            if task[0] is not None:
+                self._segment(task[0])["polls"] += 1
+            if status == 1 and task[2] is None:
+                task[2] = time.perf_counter()
+        if status in (2, 3):
+            self.task_finished(task_id)
+
+    def task_finished(self, task_id):
+        """任务结束（查询或回调得知），计算排队和识别耗时；重复调用时忽略"""
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+        if task is None:
+            return
+        job, submitted, recognizing = task
+        now = time.perf_counter()
+        if recognizing is None:
+            # 没有观察到识别中状态，全部计为排队时间
+            recognizing = now
+        self.observe("queue_wait", recognizing - submitted, job)
+        if now > recognizing:
+            self.observe("recognition", now - recognizing, job)
+        if _tracer is not None:
+            tid = _tracer.lane(f"TaskId {task_id}" + (f" ({os.path.basename(job)})" if job else ""))
+            args = {"task_id": task_id, "job": job}
+            _tracer.add("queue_wait", submitted, recognizing - submitted, tid, args)
+            if now > recognizing:
+                _tracer.add("recognition", recognizing, now - recognizing, tid, args)
+
+    def job_finished(self, job, elapsed, success, segments=None):
+        """记录一个输入文件的总耗时和分割出的片段"""
+        with self._lock:
+            self._jobs[job] = {"elapsed": elapsed, "success": bool(success), "segments": list(segments or [job])}
+
+    def get_report(self):
+        """返回JSON运行报告"""
+        with self._lock:
+            stages = {}
+            for stage, histogram in self._histograms.items():
+                stages[stage] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "avg": histogram.sum / histogram.count if histogram.count else 0.0,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "max": histogram.max,
+                    "buckets": dict(zip([str(b) for b in DURATION_BUCKETS], histogram.counts))
+                }
+            return {
+                "started_at": self.started_at,
+                "elapsed": time.perf_counter() - self._start,
+                "stages": stages,
+                "counters": dict(self._counters),
+                "jobs": json.loads(json.dumps(self._jobs)),
+                "segments": json.loads(json.dumps(self._segments))
+            }
+
+    def to_prometheus(self):
+        """返回Prometheus文本格式的指标"""
+        lines = [
+            "# HELP voice2text_stage_duration_seconds Time spent in each processing stage.",
+            "# TYPE voice2text_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            for stage in sorted(self._histograms, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+                histogram = self._histograms[stage]
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'voice2text_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'voice2text_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'voice2text_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'voice2text_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+            counters = dict(self._counters)
+        lines += [
+            "# HELP voice2text_bytes_total Bytes read from audio files and uploaded to the API.",
+            "# TYPE voice2text_bytes_total counter",
+            f'voice2text_bytes_total{{direction="read"}} {counters["bytes_read"]}',
+            f'voice2text_bytes_total{{direction="uploaded"}} {counters["bytes_uploaded"]}',
+            "# HELP voice2text_status_polls_total DescribeTaskStatus calls.",
+            "# TYPE voice2text_status_polls_total counter",
+            f'voice2text_status_polls_total {counters["polls"]}',
+            "# HELP voice2text_tasks_total Recognition tasks created.",
+            "# TYPE voice2text_tasks_total counter",
+            f'voice2text_tasks_total {counters["tasks"]}'
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """写入Prometheus文本文件（先写临时文件再替换，供node_exporter的textfile收集器读取）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_report(), f, ensure_ascii=False, indent=2)
+
+# 进程级统计实例和跟踪记录，None表示未启用
+_registry = None
+_tracer = None
+
+def enable_metrics():
+    """启用阶段耗时统计，返回统计实例"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
+
+def get_metrics():
+    """返回统计实例，未启用时返回None"""
+    return _registry
+
+def enable_tracing():
+    """启用区间跟踪（同时启用阶段耗时统计，用于计算服务端排队和识别区间），返回跟踪记录"""
+    global _tracer
+    enable_metrics()
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def get_tracer():
+    """返回跟踪记录，未启用时返回None"""
+    return _tracer
+
+def stage(name, job=None):
+    """计时上下文管理器，未启用统计时返回空计时器，开销只有一次函数调用"""
+    if _registry is None:
+        return _NULL_TIMER
+    return _StageTimer(_registry, name, job)
+
+def span(name, job=None, **args):
+    """只记录跟踪区间、不计入阶段直方图的上下文管理器，未启用跟踪时返回空计时器"""
+    if _tracer is None:
+        return _NULL_TIMER
+    return _StageTimer(None, name, job, args)
+
+class _JobContext:
+    def __init__(self, job):
+        self.job = job
+
+    def __enter__(self):
+        self.previous = getattr(_current, 'job', None)
+        _current.job = self.job
+        return self
+
+    def __exit__(self, *exc):
+        _current.job = self.previous
+        return False
+
+def job(name):
+    """在with块内把当前线程的计时、字节数和任务记在指定片段名下"""
+    if _registry is None:
+        return _NULL_TIMER
+    return _JobContext(name)
+
+def add_bytes(kind, count, job=None):
+    if _registry is not None:
+        _registry.add_bytes(kind, count, job if job is not None else getattr(_current, 'job', None))
+
+def task_submitted(task_id, job=None):
+    if _registry is not None:
+        _registry.task_submitted(task_id, job if job is not None else getattr(_current, 'job', None))
+
+def task_polled(task_id, status):
+    if _registry is not None:
+        _registry.task_polled(task_id, status)
+
+def task_finished(task_id):
+    if _registry is not None:
+        _registry.task_finished(task_id)
+
+def job_finished(job, elapsed, success, segments=None):
+    if _registry is not None:
+        _registry.job_finished(job, elapsed, success, segments)
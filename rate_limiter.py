@@ -0,0 +1,256 @@
+import time
+import random
+import threading
+
+# 腾讯云语音识别各接口的默认频率限制（次/秒）
+DEFAULT_RATE_LIMITS = {
+    "CreateRecTask": 20,
+    "DescribeTaskStatus": 50,
+    "SentenceRecognition": 30
+}
+
+def is_rate_limit_error(error):
+    """判断异常是否为频率限制错误（RequestLimitExceeded及其子错误码）"""
+    code = getattr(error, 'code', None) or ""
+    return str(code).startswith("RequestLimitExceeded")
+
+class RateLimitWait(Exception):
+    """非阻塞调用时没有可用令牌，调用方应在delay秒后重试"""
+
+    def __init__(self, action, delay):
+        super().__init__(f"{action} 达到频率限制，{delay:.3f}秒后重试")
+        self.action = action
+        self.delay = delay
+
+class TokenBucket:
+    """令牌桶
+
+    每秒补充rate个令牌，最多积累capacity个。acquire()在没有令牌时阻塞到下一个令牌生成，
+    等待中的线程按到达顺序预约令牌，因此请求会被均匀摊开，而不是在每秒开始时集中发出。
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 最多积累的令牌数，默认为1（不允许突发，服务端按秒计数时任何一秒内都不会超过rate次）
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的时间（秒）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            # 暂停期间不补充令牌，欠下的令牌从暂停结束时开始补充
+            wait = max(0.0, self._paused_until - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def try_acquire(self):
+        """不阻塞地获取令牌：有令牌时取走一个并返回0，否则不预约，返回需要等待的时间（秒）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self._paused_until - now)
+            if self._tokens < 1:
+                wait += (1 - self._tokens) / self.rate
+            if wait > 0:
+                return wait
+            self._tokens -= 1
+            return 0.0
+
+    def acquire(self):
+        """阻塞直到获得一个令牌，返回等待的时间（秒）"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """清空令牌并在指定时间内不再补充（收到频率限制错误时退避）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, now + seconds)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+class ApiRateLimiter:
+    """按接口分别限流的客户端频率限制器
+
+    每个接口一个令牌桶，调用前先获取令牌，使请求速率保持在配额以内。
+    仍然收到RequestLimitExceeded时（例如多个进程共用同一配额），暂停该接口的令牌桶并按指数退避重试，
+    同时把速率下调到当前的BACKOFF_FACTOR倍（同一秒内并发收到的多个错误只下调一次）；
+    之后每次未被限流的调用逐步恢复速率，直到回到配置的配额。
+    """
+
+    HEADROOM = 0.95  # 实际使用的配额比例，留出余量抵消请求到达服务端时间的抖动
+    MAX_RETRIES = 6  # 频率限制错误的最大重试次数
+    BASE_BACKOFF = 0.5  # 首次退避时间（秒）
+    MAX_BACKOFF = 10  # 最长退避时间（秒）
+    BACKOFF_FACTOR = 0.8  # 收到频率限制错误后速率下调的比例
+    RECOVERY_STEP = 0.02  # 每次成功调用恢复的速率（占配额的比例）
+
+    def __init__(self, limits=None):
+        """
+        Args:
+            limits: 各接口每秒请求数上限，未指定的接口使用DEFAULT_RATE_LIMITS，值为0或None表示不限流
+        """
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.limits.update(limits or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._last_cut = {}  # 各接口上次下调速率的时间
+
+    def set_limit(self, action, rate):
+        """修改接口的频率限制，rate为0或None表示不限流"""
+        with self._lock:
+            self.limits[action] = rate
+            # 令牌桶在下次调用时按新配额重新创建
+            self._buckets.pop(action, None)
+
+    def _get_bucket(self, action):
+        with self._lock:
+            bucket = self._buckets.get(action)
+            if bucket is None and self.limits.get(action):
+                bucket = self._buckets[action] = TokenBucket(self.limits[action] * self.HEADROOM)
+            stats = self._stats.get(action)
+            if stats is None:
+                stats = self._stats[action] = {
+                    "calls": 0,
+                    "throttled": 0,
+                    "retries": 0,
+                    "waiting": 0,
+                    "max_waiting": 0,
+                    "deferred": 0,
+                    "total_wait": 0.0,
+                    "max_wait": 0.0
+                }
+            return bucket, stats
+
+    def call(self, action, func, *args, **kwargs):
+        """获取令牌后调用func，遇到频率限制错误时退避重试
+
+        等待令牌和退避都在调用线程中阻塞进行。
+
+        Raises:
+            func抛出的异常；频率限制错误超过MAX_RETRIES次后抛出最后一次的错误
+        """
+        return self._call(action, func, args, kwargs, True)
+
+    def call_nowait(self, action, func, *args, **kwargs):
+        """与call相同，但没有可用令牌或需要退避时不等待，抛出RateLimitWait
+
+        用于轮询调度器这类自己安排重试时间的调用方，避免限流时占住工作线程。
+
+        Raises:
+            RateLimitWait: 需要等待后重试，delay为等待时间
+        """
+        return self._call(action, func, args, kwargs, False)
+
+    def _call(self, action, func, args, kwargs, block):
+        bucket, stats = self._get_bucket(action)
+        attempt = 0
+        while True:
+            if bucket is not None and not block:
+                wait = bucket.try_acquire()
+                if wait > 0:
+                    with self._lock:
+                        stats["deferred"] += 1
+                    raise RateLimitWait(action, wait)
+            elif bucket is not None:
+                with self._lock:
+                    stats["waiting"] += 1
+                    stats["max_waiting"] = max(stats["max_waiting"], stats["waiting"])
+                try:
+                    waited = bucket.acquire()
+                finally:
+                    with self._lock:
+                        stats["waiting"] -= 1
+                        stats["total_wait"] += waited
+                        stats["max_wait"] = max(stats["max_wait"], waited)
+            with self._lock:
+                stats["calls"] += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    self._recover(action, bucket)
+                    raise
+                if attempt >= self.MAX_RETRIES:
+                    with self._lock:
+                        stats["throttled"] += 1
+                    raise
+                delay = min(self.MAX_BACKOFF, self.BASE_BACKOFF * 2 ** attempt) * random.uniform(0.8, 1.2)
+                attempt += 1
+                now = time.monotonic()
+                with self._lock:
+                    stats["throttled"] += 1
+                    stats["retries"] += 1
+                    cut = now - self._last_cut.get(action, 0) >= 1
+                    if cut:
+                        self._last_cut[action] = now
+                if bucket is not None:
+                    if cut:
+                        bucket.set_rate(max(1.0, bucket.rate * self.BACKOFF_FACTOR))
+                    bucket.pause(delay)
+                elif not block:
+                    raise RateLimitWait(action, delay)
+                else:
+                    time.sleep(delay)
+                continue
+            self._recover(action, bucket)
+            return result
+
+    def _recover(self, action, bucket):
+        """请求未被限流时逐步恢复速率"""
+        limit = (self.limits.get(action) or 0) * self.HEADROOM
+        if bucket is not None and bucket.rate < limit:
+            bucket.set_rate(min(limit, bucket.rate + limit * self.RECOVERY_STEP))
+
+    def get_metrics(self):
+        """返回各接口的调用统计
+
+        waiting为当前等待令牌的调用数（队列深度），max_waiting为峰值队列深度，
+        deferred为非阻塞调用因没有令牌而推迟的次数，
+        throttled为服务端返回频率限制错误的次数，rate为当前生效的速率。
+        """
+        with self._lock:
+            metrics = {}
+            for action, stats in self._stats.items():
+                entry = dict(stats)
+                bucket = self._buckets.get(action)
+                entry["limit"] = self.limits.get(action)
+                entry["rate"] = bucket.rate if bucket is not None else None
+                entry["avg_wait"] = stats["total_wait"] / stats["calls"] if stats["calls"] else 0.0
+                metrics[action] = entry
+            return metrics
+
+def parse_rate_limits(values):
+    """解析 ACTION=QPS 形式的频率限制参数"""
+    limits = {}
+    for value in values or []:
+        action, _, rate = value.partition('=')
+        if not action or not rate:
+            raise ValueError(f"频率限制格式应为 ACTION=QPS: {value}")
+        limits[action.strip()] = float(rate)
+    return limits
@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+import metrics
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class ResultSink:
+    """按片段顺序增量输出识别结果
+
+    片段可以以任意顺序完成；尚未轮到的结果先缓存，一旦前面的片段全部完成就立即按顺序
+    追加写入输出文件并调用on_text回调，因此长音频的前几个片段识别完成后即可看到文字，
+    最终文件内容与全部完成后一次性保存的结果相同。失败的片段以None加入，不阻塞后续片段。
+    """
+
+    def __init__(self, total, output_file=None, on_text=None, started_at=None):
+        """
+        Args:
+            total: 片段总数
+            output_file: 输出文件路径，None表示不写文件
+            on_text: 按顺序输出每段文本时调用的函数，参数为(片段序号, 文本, 片段总数)
+            started_at: 开始处理的时间（time.monotonic()），用于计算首段文本耗时，默认为创建时
+        """
+        self.total = total
+        self.output_file = output_file
+        self.on_text = on_text
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.first_text_at = None
+
+        self._results = [None] * total
+        self._arrived = [False] * total
+        self._next = 0  # 下一个待输出的片段序号
+        self._completed = 0
+        self._written = 0  # 已写入文件的文本段数
+        self._file = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if total == 0:
+            self._done.set()
+
+    def add(self, index, result):
+        """加入一个片段的结果，result为None表示该片段失败"""
+        with self._lock:
+            if self._arrived[index]:
+                return
+            self._arrived[index] = True
+            self._results[index] = result
+            self._completed += 1
+            # 输出从_next开始连续完成的片段
+            while self._next < self.total and self._arrived[self._next]:
+                ready = self._results[self._next]
+                if ready and 'text' in ready:
+                    self._emit(self._next, ready['text'])
+                self._next += 1
+            if self._completed == self.total:
+                self._close_file()
+                self._done.set()
+
+    def _emit(self, index, text):
+        if self.first_text_at is None:
+            self.first_text_at = time.monotonic()
+        if self.output_file:
+            try:
+                with metrics.stage("save"):
+                    if self._file is None:
+                        self._file = open(self.output_file, 'w', encoding='utf-8')
+                    # 与"\n".join(所有文本)的结果一致
+                    self._file.write(("\n" if self._written else "") + text)
+                    self._file.flush()
+            except Exception as e:
+                logger.error("写入识别结果失败: %s", e)
+        self._written += 1
+        if self.on_text:
+            try:
+                self.on_text(index, text, self.total)
+            except Exception as e:
+                logger.error("输出识别结果回调失败: %s", e)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def wait(self, timeout=None):
+        """等待所有片段完成，超时返回False"""
+        return self._done.wait(timeout)
+
+    def close(self):
+        """提前结束时关闭输出文件"""
+        with self._lock:
+            self._close_file()
+
+    @property
+    def completed(self):
+        return self._completed
+
+    @property
+    def results(self):
+        """按片段顺序返回成功的结果"""
+        with self._lock:
+            return [r for r in self._results if r]
+
+    @property
+    def time_to_first_text(self):
+        """从开始处理到输出第一段文本的时间（秒），尚未输出时为None"""
+        if self.first_text_at is None:
+            return None
+        return self.first_text_at - self.started_at
+
+    def get_metrics(self):
+        return {
+            "total": self.total,
+            "completed": self._completed,
+            "written": self._written,
+            "time_to_first_text": self.time_to_first_text,
+            "elapsed": time.monotonic() - self.started_at
+        }
+
+def get_output_path(audio_file_path, output_file=None):
+    """计算识别结果的输出路径，未指定时保存在音频文件旁"""
+    if output_file is None:
+        return f"{os.path.splitext(audio_file_path)[0]}_transcript.txt"
+    return output_file
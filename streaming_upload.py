@@ -0,0 +1,175 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import threading
+from datetime import datetime, timezone
+import requests
+
+# 每次编码的原始字节数，必须是3的倍数，保证分块编码拼接后与整体编码结果一致
+ENCODE_CHUNK_SIZE = 3 * 256 * 1024
+
+# 请求体不参与签名时使用的固定哈希值，对应请求头 X-TC-Content-SHA256: UNSIGNED-PAYLOAD
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+class StreamingUploadError(Exception):
+    """流式上传时API返回的错误"""
+
+    def __init__(self, code, message, request_id=None):
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+        self.request_id = request_id
+
+class Base64JsonBody:
+    """以流的方式生成 {..., "Data": "<base64音频>"} 形式的JSON请求体
+
+    音频文件按块读取并编码，任意时刻只有一个块在内存中，
+    不会像一次性读取那样同时持有原始数据、base64字符串和序列化后的JSON三份拷贝。
+    对象实现了__len__，requests会据此设置Content-Length而不是使用分块传输。
+    传入cancel_token时每个数据块发送前检查取消标记，取消后抛出异常中止请求并关闭连接。
+    """
+
+    def __init__(self, file_path, params, data_field="Data", chunk_size=ENCODE_CHUNK_SIZE, cancel_token=None):
+        if chunk_size % 3:
+            raise ValueError("chunk_size必须是3的倍数")
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.file_size = os.path.getsize(file_path)
+        # 其余参数先序列化，Data字段放在最后，以便流式拼接
+        head = json.dumps(params, ensure_ascii=False)
+        separator = ", " if params else ""
+        self.head = f'{head[:-1]}{separator}"{data_field}": "'.encode('utf-8')
+        self.tail = b'"}'
+        self.cancel_token = cancel_token
+
+    def __len__(self):
+        encoded_size = (self.file_size + 2) // 3 * 4
+        return len(self.head) + encoded_size + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        # 按块读取而不是内存映射：映射的页面被访问后会计入进程常驻内存
+        with open(self.file_path, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                if self.cancel_token is not None:
+                    self.cancel_token.check()
+                yield base64.b64encode(chunk)
+        yield self.tail
+
+    def sha256_hexdigest(self):
+        """计算完整请求体的SHA256（需要额外读取并编码一遍文件）"""
+        digest = hashlib.sha256()
+        for chunk in self:
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _hmac_sha256(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+def build_tc3_headers(secret_id, secret_key, host, action, version, region, service, payload_hash=None, timestamp=None):
+    """生成腾讯云API 3.0（TC3-HMAC-SHA256）签名请求头
+
+    Args:
+        payload_hash: 请求体的SHA256十六进制摘要，None表示请求体不参与签名
+        timestamp: 请求时间戳，默认为当前时间
+    """
+    timestamp = int(timestamp or time.time())
+    date = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+    content_type = "application/json; charset=utf-8"
+    algorithm = "TC3-HMAC-SHA256"
+
+    headers = {
+        "Content-Type": content_type,
+        "Host": host,
+        "X-TC-Action": action,
+        "X-TC-Timestamp": str(timestamp),
+        "X-TC-Version": version,
+        "X-TC-Region": region
+    }
+    if payload_hash is None:
+        headers["X-TC-Content-SHA256"] = UNSIGNED_PAYLOAD
+        payload_hash = hashlib.sha256(UNSIGNED_PAYLOAD.encode('utf-8')).hexdigest()
+
+    canonical_headers = f"content-type:{content_type}\nhost:{host}\nx-tc-action:{action.lower()}\n"
+    signed_headers = "content-type;host;x-tc-action"
+    canonical_request = f"POST\n/\n\n{canonical_headers}\n{signed_headers}\n{payload_hash}"
+
+    credential_scope = f"{date}/{service}/tc3_request"
+    string_to_sign = (f"{algorithm}\n{timestamp}\n{credential_scope}\n"
+                      f"{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}")
+
+    secret_date = _hmac_sha256(("TC3" + secret_key).encode('utf-8'), date)
+    secret_service = _hmac_sha256(secret_date, service)
+    secret_signing = _hmac_sha256(secret_service, "tc3_request")
+    signature = hmac.new(secret_signing, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    headers["Authorization"] = (f"{algorithm} Credential={secret_id}/{credential_scope}, "
+                                f"SignedHeaders={signed_headers}, Signature={signature}")
+    return headers
+
+class StreamingUploader:
+    """以流式请求体调用腾讯云API的上传器
+
+    每个线程使用自己的requests会话（keep-alive），可在多线程中共享同一个实例。
+    """
+
+    def __init__(self, secret_id, secret_key, endpoint, region, service="asr", version="2019-06-14",
+                 scheme="https", timeout=300, sign_payload=False):
+        """
+        Args:
+            endpoint: API域名，例如 asr.tencentcloudapi.com
+            sign_payload: 是否对请求体签名；签名需要在发送前额外编码一遍文件以计算哈希
+        """
+        self.secret_id = secret_id
+        self.secret_key = secret_key
+        self.endpoint = endpoint
+        self.region = region
+        self.service = service
+        self.version = version
+        self.scheme = scheme
+        self.timeout = timeout
+        self.sign_payload = sign_payload
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def call(self, action, file_path, params, data_field="Data", cancel_token=None):
+        """发送请求，音频文件以base64形式流式写入data_field字段
+
+        Args:
+            cancel_token: CancelToken实例，取消后在下一个数据块处中止上传
+
+        Returns:
+            dict: 响应中Response部分的内容
+
+        Raises:
+            StreamingUploadError: API返回错误时抛出，包含错误码和请求ID
+        """
+        body = Base64JsonBody(file_path, params, data_field, cancel_token=cancel_token)
+        payload_hash = body.sha256_hexdigest() if self.sign_payload else None
+        headers = build_tc3_headers(self.secret_id, self.secret_key, self.endpoint, action,
+                                    self.version, self.region, self.service, payload_hash)
+        headers["Content-Length"] = str(len(body))
+
+        resp = self._session().post(f"{self.scheme}://{self.endpoint}/", data=body,
+                                    headers=headers, timeout=self.timeout)
+        try:
+            response = resp.json().get("Response", {})
+        except ValueError:
+            raise StreamingUploadError("ClientNetworkError", f"无效的响应 (HTTP {resp.status_code})")
+
+        error = response.get("Error")
+        if error:
+            raise StreamingUploadError(error.get("Code", ""), error.get("Message", ""), response.get("RequestId"))
+        return response
@@ -0,0 +1,334 @@
+import time
+import heapq
+import random
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from rate_limiter import RateLimitWait
+
+class _PollTask:
+    """轮询中的单个识别任务"""
+
+    __slots__ = ('task_id', 'future', 'audio_duration', 'submitted_at', 'deadline',
+                 'interval', 'status', 'expected_finish', 'last_pending_at', 'polls', 'errors', 'callback',
+                 'on_status')
+
+    def __init__(self, task_id, audio_duration, submitted_at, deadline, interval, callback=False, on_status=None):
+        self.task_id = task_id
+        self.future = Future()
+        self.audio_duration = audio_duration
+        self.submitted_at = submitted_at
+        self.deadline = deadline
+        self.interval = interval
+        self.status = None
+        self.expected_finish = None
+        self.last_pending_at = None
+        self.polls = 0
+        self.errors = 0
+        self.callback = callback
+        self.on_status = on_status
+
+class TaskPoller:
+    """集中式自适应轮询调度器
+
+    所有识别任务放在一个按下次查询时间排序的优先队列中，由一个调度线程负责
+    到期分发，状态查询交给少量工作线程执行，因此不会为每个任务占用一个休眠线程。
+    下次查询时间根据音频时长和服务端状态（等待中/识别中）估算完成时间，在到达估算时间前
+    每次等待剩余时间的一半，超过估算时间后按指数退避，并加入随机抖动。
+    """
+
+    MIN_INTERVAL = 0.5  # 最短查询间隔（秒）
+    MAX_INTERVAL = 30  # 最长查询间隔（秒）
+    BACKOFF = 1.5  # 退避倍数
+    JITTER = 0.2  # 抖动比例
+    REAL_TIME_FACTOR = 0.1  # 估算的识别耗时与音频时长之比
+    MIN_TIMEOUT = 600  # 最短超时时间（秒）
+    TIMEOUT_FACTOR = 2  # 超时时间按音频时长放大的倍数
+    MAX_ERRORS = 5  # 连续查询失败的最大次数
+    CALLBACK_FALLBACK_INTERVAL = 60  # 使用回调的任务的兜底查询间隔（秒）
+    MAX_EARLY_RESULTS = 1000  # 最多暂存的先于任务登记到达的回调结果数
+
+    def __init__(self, query_func, workers=4, min_interval=None, max_interval=None, real_time_factor=None):
+        """
+        Args:
+            query_func: 查询任务状态的函数，参数为任务ID，返回包含Status字段的字典；
+                抛出RateLimitWait时按其delay重新安排查询，不计为查询失败
+            workers: 执行状态查询的线程数
+            min_interval: 最短查询间隔（秒）
+            max_interval: 最长查询间隔（秒）
+            real_time_factor: 估算的识别耗时与音频时长之比
+        """
+        self.query_func = query_func
+        self.min_interval = min_interval or self.MIN_INTERVAL
+        self.max_interval = max_interval or self.MAX_INTERVAL
+        self.real_time_factor = real_time_factor if real_time_factor is not None else self.REAL_TIME_FACTOR
+
+        self._heap = []
+        self._tasks = {}
+        self._early_results = {}
+        # 回调线程和查询线程可能同时结束同一个任务
+        self._resolve_lock = threading.RLock()
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="task-poller")
+        self._thread = threading.Thread(target=self._run, name="task-poller-scheduler", daemon=True)
+        self._thread.start()
+
+        # 统计信息
+        self._metrics_lock = threading.Lock()
+        self._overshoots = deque(maxlen=1000)
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "callback_completed": 0,
+            "polls": 0,
+            "query_errors": 0,
+            "rate_limited": 0,
+            "max_schedule_lag": 0.0
+        }
+
+    def submit(self, task_id, audio_duration=None, timeout=None, callback=False, on_status=None):
+        """加入一个识别任务，返回在任务完成时得到结果的Future
+
+        Args:
+            task_id: 识别任务ID
+            audio_duration: 音频时长（秒），用于估算首次查询时间和超时时间
+            timeout: 超时时间（秒），默认根据音频时长计算
+            callback: 任务是否注册了回调地址；是则主要依靠complete()完成，
+                轮询只按CALLBACK_FALLBACK_INTERVAL作为兜底
+            on_status: 查询到的任务状态（0等待中，1识别中）变化时调用的函数，参数为状态值
+        """
+        now = time.monotonic()
+        duration = audio_duration or 0
+        if timeout is None:
+            timeout = self.MIN_TIMEOUT + duration * self.TIMEOUT_FACTOR
+        task = _PollTask(task_id, duration, now, now + timeout, self.min_interval, callback, on_status)
+
+        # 按音频时长估算完成时间，首次查询安排在到达估算时间之前
+        task.expected_finish = now + self.min_interval + duration * self.real_time_factor
+        if callback:
+            first_delay = self._next_delay(task, None)
+        else:
+            first_delay = self._clamp((task.expected_finish - now) / 2)
+        with self._metrics_lock:
+            self._stats["submitted"] += 1
+        with self._cond:
+            self._tasks[task_id] = task
+            early_result = self._early_results.pop(task_id, None)
+        task.future.add_done_callback(lambda _: self._forget(task))
+        if early_result is not None:
+            # 回调先于任务登记到达
+            self._resolve(task, early_result, from_callback=True)
+            return task.future
+        self._schedule(task, now + first_delay)
+        return task.future
+
+    def wait(self, task_id, audio_duration=None, timeout=None, callback=False):
+        """加入任务并阻塞等待结果"""
+        return self.submit(task_id, audio_duration, timeout, callback).result()
+
+    def complete(self, task_id, result):
+        """由外部（例如识别完成回调）直接提供任务结果
+
+        Args:
+            result: 与状态查询结果相同结构的字典，Status为2表示成功，3表示失败
+        """
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None:
+                if len(self._early_results) < self.MAX_EARLY_RESULTS:
+                    self._early_results[task_id] = result
+                return False
+        self._resolve(task, result, from_callback=True)
+        return True
+
+    def cancel(self, task_id):
+        """取消等待中的任务：Future以CancelledError结束，之后不再查询该任务
+
+        服务端的识别任务不会撤销，之后仍可按任务ID继续查询（例如从任务日志恢复）。
+
+        Returns:
+            bool: 任务存在且尚未完成时返回True
+        """
+        with self._cond:
+            task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        with self._resolve_lock:
+            if not task.future.cancel():
+                return False
+        with self._metrics_lock:
+            self._stats["cancelled"] += 1
+        return True
+
+    def _forget(self, task):
+        with self._cond:
+            if self._tasks.get(task.task_id) is task:
+                del self._tasks[task.task_id]
+
+    def pending_count(self):
+        """返回尚未完成的任务数"""
+        with self._cond:
+            return len(self._tasks)
+
+    def get_metrics(self):
+        """返回轮询统计信息
+
+        overshoot为任务最后一次"未完成"查询到"已完成"查询之间的间隔，
+        即发现任务完成的延迟上限。
+        """
+        with self._metrics_lock:
+            metrics = dict(self._stats)
+            overshoots = sorted(self._overshoots)
+        metrics["pending"] = self.pending_count()
+        if overshoots:
+            metrics["overshoot_avg"] = sum(overshoots) / len(overshoots)
+            metrics["overshoot_p50"] = overshoots[len(overshoots) // 2]
+            metrics["overshoot_p95"] = overshoots[min(len(overshoots) - 1, int(len(overshoots) * 0.95))]
+            metrics["overshoot_max"] = overshoots[-1]
+        return metrics
+
+    def stop(self):
+        """停止调度线程，未完成的任务以异常结束"""
+        with self._cond:
+            self._stopped = True
+            tasks = [entry[2] for entry in self._heap]
+            self._heap = []
+            self._cond.notify_all()
+        for task in tasks:
+            self._fail(task, Exception(f"轮询已停止，任务ID: {task.task_id}"))
+        self._executor.shutdown(wait=False)
+
+    def _clamp(self, delay):
+        return max(self.min_interval, min(self.max_interval, delay))
+
+    def _schedule(self, task, due):
+        with self._cond:
+            stopped = self._stopped
+            if not stopped:
+                heapq.heappush(self._heap, (due, next(self._counter), task))
+                # 新任务比当前等待的任务更早到期时唤醒调度线程
+                if self._heap[0][2] is task:
+                    self._cond.notify()
+        # 停止后提交或重新调度的任务不会再被轮询，直接以异常结束，避免等待方一直阻塞
+        if stopped:
+            self._fail(task, Exception(f"轮询已停止，任务ID: {task.task_id}"))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait_time = self._heap[0][0] - time.monotonic()
+                    if wait_time <= 0:
+                        break
+                    self._cond.wait(wait_time)
+                if self._stopped:
+                    return
+                due, _, task = heapq.heappop(self._heap)
+
+            lag = time.monotonic() - due
+            with self._metrics_lock:
+                if lag > self._stats["max_schedule_lag"]:
+                    self._stats["max_schedule_lag"] = lag
+            if task.future.done():
+                # 任务已被取消
+                continue
+            self._executor.submit(self._check, task)
+
+    def _check(self, task):
+        if task.future.done():
+            return
+        try:
+            result = self.query_func(task.task_id)
+        except RateLimitWait as e:
+            # 客户端频率限制没有可用令牌：不在工作线程中等待，按需要等待的时间重新排入调度堆
+            with self._metrics_lock:
+                self._stats["rate_limited"] += 1
+            self._schedule(task, time.monotonic() + e.delay)
+            return
+        except Exception as e:
+            task.polls += 1
+            task.errors += 1
+            with self._metrics_lock:
+                self._stats["polls"] += 1
+                self._stats["query_errors"] += 1
+            if task.errors >= self.MAX_ERRORS:
+                self._fail(task, e)
+            else:
+                self._schedule(task, time.monotonic() + self._next_delay(task, task.status))
+            return
+
+        task.polls += 1
+        task.errors = 0
+        with self._metrics_lock:
+            self._stats["polls"] += 1
+        result = result or {}
+        status = result.get("Status", 0)
+        if not self._resolve(task, result):
+            if task.on_status is not None and status != task.status:
+                try:
+                    task.on_status(status)
+                except Exception:
+                    pass
+            now = time.monotonic()
+            task.last_pending_at = now
+            if now >= task.deadline:
+                self._fail(task, Exception(f"语音识别任务超时，任务ID: {task.task_id}"))
+                return
+            self._schedule(task, now + self._next_delay(task, status))
+
+    def _resolve(self, task, result, from_callback=False):
+        """根据结果状态结束任务，任务仍在进行中时返回False"""
+        status = result.get("Status", 0)
+        if status not in (2, 3):
+            return False
+        with self._resolve_lock:
+            if task.future.done():
+                return True
+            if status == 2:  # 任务成功
+                with self._metrics_lock:
+                    self._stats["completed"] += 1
+                    if from_callback:
+                        self._stats["callback_completed"] += 1
+                    else:
+                        self._overshoots.append(time.monotonic() - (task.last_pending_at or task.submitted_at))
+                task.future.set_result(result)
+            else:  # 任务失败
+                self._fail(task, Exception(f"语音识别任务失败: {result.get('ErrorMsg', '未知错误')}"))
+        return True
+
+    def _next_delay(self, task, status):
+        """根据任务状态计算下次查询的延迟"""
+        now = time.monotonic()
+        if status == 1 and task.status != 1:
+            # 刚进入识别状态，按音频时长估算完成时间
+            task.expected_finish = now + task.audio_duration * self.real_time_factor
+            task.interval = self.min_interval
+        task.status = status
+        if task.callback:
+            # 等待回调，轮询只作为兜底
+            return self.CALLBACK_FALLBACK_INTERVAL * random.uniform(1 - self.JITTER, 1 + self.JITTER)
+
+        if task.expected_finish and now < task.expected_finish:
+            # 每次等待剩余时间的一半，逐步逼近估算的完成时间，提前完成的任务也能及时发现
+            delay = (task.expected_finish - now) / 2
+        else:
+            delay = task.interval
+            task.interval = min(self.max_interval, task.interval * self.BACKOFF)
+        delay *= random.uniform(1 - self.JITTER, 1 + self.JITTER)
+        return self._clamp(delay)
+
+    def _fail(self, task, error):
+        with self._resolve_lock:
+            if task.future.done():
+                return
+            with self._metrics_lock:
+                self._stats["failed"] += 1
+            task.future.set_exception(error)
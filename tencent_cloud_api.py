@@ -1,19 +1,64 @@
 import os
 import time
+import logging
 import base64
 import json
-from dotenv import load_dotenv
-# 使用腾讯云官方SDK
-from tencentcloud.common import credential
-from tencentcloud.common.profile.client_profile import ClientProfile
-from tencentcloud.common.profile.http_profile import HttpProfile
-from tencentcloud.asr.v20190614 import asr_client, models
+import queue
+import threading
+from contextlib import contextmanager
+from task_poller import TaskPoller
+from audio_processor import AudioProcessor
+from rate_limiter import ApiRateLimiter, RateLimitWait
+from job_control import JobCancelledError
+import metrics
+from logger import get_logger
 
-# 加载环境变量
-load_dotenv()
+# 腾讯云官方SDK、dotenv和requests在第一次创建客户端时才导入，
+# 命令行解析参数和图形界面显示窗口之前不需要加载它们
+
+logger = get_logger(__name__)
+
+_env_loaded = False
+
+def load_env():
+    """从.env加载环境变量（只加载一次）"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+def warm_up():
+    """预先加载.env和SDK模块，供图形界面在后台线程中调用，使第一次转换不必等待导入"""
+    load_env()
+    import tencentcloud.common.credential
+    import tencentcloud.asr.v20190614.asr_client
+    import tencentcloud.asr.v20190614.models
+    import streaming_upload
 
 class TencentCloudAPI:
-    def __init__(self, tenant_id=None, secret_id=None, secret_key=None, app_id=None):
+    # 每个实例最多同时持有的ASR客户端（HTTP连接）数量
+    MAX_POOL_SIZE = 16
+    # 超过该大小的音频文件使用流式上传（字节）
+    STREAM_UPLOAD_THRESHOLD = 4 * 1024 * 1024
+    # 默认API地址，可通过endpoint参数或TENCENTCLOUD_ASR_ENDPOINT环境变量指向本地模拟服务器
+    DEFAULT_ENDPOINT = "asr.tencentcloudapi.com"
+    # 一句话识别（SentenceRecognition）的音频时长（秒）和文件大小（字节）上限
+    SENTENCE_MAX_DURATION = 60
+    SENTENCE_MAX_SIZE = 3 * 1024 * 1024
+    # 一句话识别支持的文件格式（扩展名 -> VoiceFormat）
+    SENTENCE_VOICE_FORMATS = {'.wav': 'wav', '.mp3': 'mp3', '.m4a': 'm4a', '.aac': 'aac', '.pcm': 'pcm', '.amr': 'amr'}
+    # 一句话识别支持的引擎模型，其他模型（例如16k_zh_video）只能使用录音文件识别
+    SENTENCE_ENGINE_MODELS = {"8k_zh", "8k_en", "16k_zh", "16k_zh-PY", "16k_zh_medical", "16k_zh_dialect", "16k_en",
+                              "16k_yue", "16k_ja", "16k_ko", "16k_vi", "16k_ms", "16k_id", "16k_fil", "16k_th",
+                              "16k_pt", "16k_tr", "16k_ar", "16k_es", "16k_hi", "16k_fr", "16k_de"}
+    
+    def __init__(self, tenant_id=None, secret_id=None, secret_key=None, app_id=None, max_pool_size=None, endpoint=None, rate_limits=None):
+        from tencentcloud.common import credential
+        from tencentcloud.common.profile.client_profile import ClientProfile
+        from tencentcloud.common.profile.http_profile import HttpProfile
+        load_env()
+        
         # 从参数、环境变量获取API密钥
         self.tenant_id = tenant_id or os.getenv('TENCENTCLOUD_TENANT_ID')
         self.secret_id = secret_id or os.getenv('TENCENTCLOUD_SECRET_ID')
@@ -28,16 +73,86 @@ class TencentCloudAPI:
         # 初始化凭证
         self.cred = credential.Credential(self.secret_id, self.secret_key)
         
-        # 初始化HTTP配置
+        # 初始化HTTP配置（启用keep-alive，复用TLS连接）
+        # endpoint可以带协议前缀，例如 http://127.0.0.1:8000
+        endpoint = endpoint or os.getenv('TENCENTCLOUD_ASR_ENDPOINT') or self.DEFAULT_ENDPOINT
+        scheme, _, host = endpoint.rpartition('://')
         self.http_profile = HttpProfile()
-        self.http_profile.endpoint = "asr.tencentcloudapi.com"
+        self.http_profile.scheme = scheme or "https"
+        self.http_profile.endpoint = host.rstrip('/')
+        self.http_profile.keepAlive = True
         
         # 初始化客户端配置
         self.client_profile = ClientProfile()
         self.client_profile.httpProfile = self.http_profile
         
+        # 客户端池：每个AsrClient持有自己的HTTP会话，同一时间只借给一个线程使用
+        self.max_pool_size = max_pool_size or self.MAX_POOL_SIZE
+        self._pool = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        # 已创建（含已预留）的客户端数量，包括下面初始化时创建的客户端
+        self.clients_created = 1
+        self._poller = None
+        self._uploader = None
+        self._callback_receiver = None
+        self.callback_url = ""
+        # 上传前预处理（重采样/混音/压缩），默认关闭
+        self.normalize = False
+        self.normalize_codec = None
+        self.normalize_stats = {"files": 0, "original_bytes": 0, "output_bytes": 0, "encode_time": 0.0}
+        # 不超过该时长的短音频使用一句话识别，0表示总是创建录音文件识别任务
+        self.sentence_max_duration = self.SENTENCE_MAX_DURATION
+        # 按接口分别限流，遇到RequestLimitExceeded时退避重试
+        self.rate_limiter = ApiRateLimiter(rate_limits)
+        
         # 初始化ASR客户端
-        self.client = asr_client.AsrClient(self.cred, self.region, self.client_profile)
+        self.client = self._create_client()
+        self._pool.put(self.client)
+    
+    def _create_client(self):
+        """创建新的ASR客户端（调用方负责在clients_created中预留名额）"""
+        from tencentcloud.asr.v20190614 import asr_client
+        return asr_client.AsrClient(self.cred, self.region, self.client_profile)
+    
+    @contextmanager
+    def _acquire_client(self):
+        """从客户端池借出一个ASR客户端，用完后归还
+        
+        池中没有空闲客户端且未达到上限时创建新客户端，否则等待其他线程归还。
+        """
+        try:
+            client = self._pool.get_nowait()
+        except queue.Empty:
+            # 检查上限与预留名额在同一把锁内完成，避免并发线程同时越过上限
+            with self._pool_lock:
+                can_create = self.clients_created < self.max_pool_size
+                if can_create:
+                    self.clients_created += 1
+            if can_create:
+                try:
+                    client = self._create_client()
+                except Exception:
+                    with self._pool_lock:
+                        self.clients_created -= 1
+                    raise
+            else:
+                client = self._pool.get()
+        try:
+            yield client
+        finally:
+            self._pool.put(client)
+    
+    def _call_api(self, action, req, block=True):
+        """经频率限制器调用SDK接口，等待令牌时不占用客户端
+        
+        block为False时没有可用令牌不等待，抛出RateLimitWait由调用方安排重试。
+        """
+        def send():
+            with self._acquire_client() as client:
+                return getattr(client, action)(req)
+        if not block:
+            return self.rate_limiter.call_nowait(action, send)
+        return self.rate_limiter.call(action, send)
     
     def upload_audio_to_cos(self, file_path):
         """
@@ -51,22 +166,94 @@ class TencentCloudAPI:
         except Exception as e:
             raise Exception(f"读取音频文件失败: {str(e)}")
     
-    def recognize_audio_directly(self, audio_file_path, engine_model_type="16k_zh", callback_url=""):
+    def get_uploader(self):
+        """获取流式上传器（首次调用时创建）"""
+        with self._pool_lock:
+            if self._uploader is None:
+                from streaming_upload import StreamingUploader
+                self._uploader = StreamingUploader(self.secret_id, self.secret_key, self.http_profile.endpoint,
+                                                   self.region, scheme=self.http_profile.scheme)
+            return self._uploader
+    
+    def enable_normalization(self, codec=None):
+        """启用上传前预处理：按引擎采样率重采样、混为单声道，codec不为空时再压缩编码"""
+        if codec is not None and codec not in AudioProcessor.NORMALIZE_CODECS:
+            raise ValueError(f"不支持的压缩编码: {codec}（可选: {', '.join(AudioProcessor.NORMALIZE_CODECS)}）")
+        self.normalize = True
+        self.normalize_codec = codec
+    
+    def cache_settings(self):
+        """返回影响识别结果的客户端设置（服务地址、上传前预处理），用于区分结果缓存"""
+        return {
+            "endpoint": f"{self.http_profile.scheme}://{self.http_profile.endpoint}",
+            "normalize": (self.normalize_codec or "wav") if self.normalize else None
+        }
+    
+    def _normalize_audio(self, audio_file_path, engine_model_type):
+        """执行预处理并累计统计信息，返回待上传的文件路径"""
+        upload_path, stats = AudioProcessor.normalize_for_asr(audio_file_path, engine_model_type, self.normalize_codec)
+        with self._pool_lock:
+            self.normalize_stats["files"] += 1
+            self.normalize_stats["original_bytes"] += stats["original_bytes"]
+            self.normalize_stats["output_bytes"] += stats["output_bytes"]
+            self.normalize_stats["encode_time"] += stats["encode_time"]
+        return upload_path
+    
+    def recognize_audio_directly(self, audio_file_path, engine_model_type="16k_zh", callback_url="", streaming=None, normalize=None, cancel_token=None):
         """
         使用腾讯云SDK直接识别音频文件（用于长音频）
         返回任务ID信息
+        
+        streaming为None时，文件大小超过STREAM_UPLOAD_THRESHOLD则使用流式上传：
+        按块编码并发送请求体，峰值内存与文件大小无关
+        normalize为None时按enable_normalization()的设置决定是否先预处理音频
+        cancel_token为CancelToken实例时，流式上传在每个数据块之间检查取消，
+        一次性上传在发送请求前检查，取消时抛出JobCancelledError
         """
+        upload_path = audio_file_path
         try:
-            print(f"开始处理音频文件: {audio_file_path}")
+            logger.debug("开始处理音频文件: %s", audio_file_path)
+            
+            if self.normalize if normalize is None else normalize:
+                with metrics.stage("normalize"):
+                    upload_path = self._normalize_audio(audio_file_path, engine_model_type)
+            
+            file_size = os.path.getsize(upload_path)
+            if streaming is None:
+                streaming = file_size >= self.STREAM_UPLOAD_THRESHOLD
+            if streaming:
+                logger.debug("音频文件大小: %d 字节，使用流式上传", file_size, extra={"file": upload_path})
+                params = {
+                    "EngineModelType": engine_model_type,
+                    "ChannelNum": 1,
+                    "ResTextFormat": 0,
+                    "SourceType": 1,
+                    "DataLen": file_size
+                }
+                if callback_url:
+                    params["CallbackUrl"] = callback_url
+                # 流式上传时读取、编码和发送交替进行，整体计为上传阶段
+                with metrics.stage("upload"):
+                    response = self.rate_limiter.call("CreateRecTask", self.get_uploader().call, "CreateRecTask", upload_path, params,
+                                                      cancel_token=cancel_token)
+                metrics.add_bytes("read", file_size)
+                metrics.add_bytes("uploaded", (file_size + 2) // 3 * 4)
+                logger.debug("CreateRecTask响应: %s", response)
+                return response.get("Data", response)
             
             # 读取音频文件并转换为base64
-            with open(audio_file_path, 'rb') as f:
-                audio_data = f.read()
+            with metrics.stage("read"):
+                with open(upload_path, 'rb') as f:
+                    audio_data = f.read()
+            with metrics.stage("encode"):
                 audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+            metrics.add_bytes("read", len(audio_data))
+            metrics.add_bytes("uploaded", len(audio_base64))
             
-            print(f"音频文件大小: {len(audio_data)} 字节")
+            logger.debug("音频文件大小: %d 字节", len(audio_data), extra={"file": upload_path})
             
             # 创建请求对象
+            from tencentcloud.asr.v20190614 import models
             req = models.CreateRecTaskRequest()
             
             # 设置请求参数
@@ -80,58 +267,103 @@ class TencentCloudAPI:
             if callback_url:
                 req.CallbackUrl = callback_url
             
-            print(f"请求参数已设置，准备发送请求")
-            print(f"引擎模型: {engine_model_type}")
+            logger.debug("请求参数已设置，准备发送请求，引擎模型: %s", engine_model_type)
+            if cancel_token is not None:
+                cancel_token.check()
             
-            # 发送请求并获取响应
-            resp = self.client.CreateRecTask(req)
+            # 发送请求并获取响应，随后立即释放音频数据
+            with metrics.stage("upload"):
+                resp = self._call_api("CreateRecTask", req)
+            del req, audio_data, audio_base64
             
             # 返回任务信息（将SDK响应转换为字典格式）
             response_dict = json.loads(resp.to_json_string())
-            print(f"完整API响应结构: {response_dict}")
-            print(f"响应类型: {type(response_dict)}")
+            logger.debug("CreateRecTask响应: %s", response_dict)
             
             # 直接返回Data部分内容，因为API返回格式显示TaskId在Data中
             if "Data" in response_dict:
-                print(f"返回Data部分: {response_dict['Data']}")
                 return response_dict['Data']
             
             # 尝试其他可能的结构
             if "Response" in response_dict and "Data" in response_dict["Response"]:
-                print(f"返回Response.Data部分: {response_dict['Response']['Data']}")
                 return response_dict["Response"]["Data"]
             
-            print("返回整个响应")
+            logger.debug("响应中没有Data字段，返回整个响应")
             return response_dict
             
+        except JobCancelledError:
+            logger.info("已取消上传: %s", audio_file_path)
+            raise
         except Exception as e:
-            print(f"识别过程中发生异常: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("识别过程中发生异常: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             raise
+        finally:
+            # 删除预处理生成的临时文件
+            if upload_path != audio_file_path and os.path.exists(upload_path):
+                os.remove(upload_path)
     
-    def recognize_audio_file(self, file_path, audio_format="wav", sample_rate=16000):
+    def set_sentence_max_duration(self, seconds):
+        """设置使用一句话识别的最长音频时长（不超过SENTENCE_MAX_DURATION），0表示关闭"""
+        self.sentence_max_duration = max(0, min(seconds, self.SENTENCE_MAX_DURATION))
+    
+    @classmethod
+    def get_sentence_voice_format(cls, audio_file_path, engine_model_type, max_duration=None):
+        """判断音频能否使用一句话识别
+        
+        根据文件头读取的时长和文件大小判断，格式和引擎模型也需要一句话识别支持；
+        无法读取准确时长的文件不使用一句话识别。
+        
+        Returns:
+            str: 可以使用时返回对应的VoiceFormat，否则返回None
         """
-        使用腾讯云SDK识别音频文件内容
+        max_duration = cls.SENTENCE_MAX_DURATION if max_duration is None else max_duration
+        voice_format = cls.SENTENCE_VOICE_FORMATS.get(os.path.splitext(audio_file_path)[1].lower())
+        if not max_duration or voice_format is None or engine_model_type not in cls.SENTENCE_ENGINE_MODELS:
+            return None
+        try:
+            if os.path.getsize(audio_file_path) > cls.SENTENCE_MAX_SIZE:
+                return None
+            info = AudioProcessor.get_audio_info(audio_file_path)
+        except Exception:
+            return None
+        if not info.get('sample_rate') or not info.get('duration') or info['duration'] > max_duration:
+            return None
+        return voice_format
+    
+    def recognize_audio_file(self, file_path, engine_model_type="16k_zh", voice_format=None):
+        """
+        使用腾讯云SDK识别音频文件内容（一句话识别，同步返回结果，音频不超过60秒）
+        
+        Args:
+            engine_model_type: 引擎模型类型
+            voice_format: 音频格式，None则按文件扩展名确定
         """
         try:
             # 读取音频文件并转换为base64
-            with open(file_path, 'rb') as f:
-                audio_data = f.read()
+            with metrics.stage("read"):
+                with open(file_path, 'rb') as f:
+                    audio_data = f.read()
+            with metrics.stage("encode"):
                 audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+            metrics.add_bytes("read", len(audio_data))
+            metrics.add_bytes("uploaded", len(audio_base64))
             
             # 创建请求对象
+            from tencentcloud.asr.v20190614 import models
             req = models.SentenceRecognitionRequest()
             
             # 设置请求参数
-            req.EngineModelType = "16k_zh"
-            req.ChannelNum = 1
-            req.ResTextFormat = 0
+            req.EngSerViceType = engine_model_type
             req.SourceType = 1
+            req.VoiceFormat = voice_format or self.SENTENCE_VOICE_FORMATS.get(os.path.splitext(file_path)[1].lower(), "wav")
             req.Data = audio_base64
+            req.DataLen = len(audio_data)
+            # 返回词级时间戳（不含标点），用于生成逐句的时间戳
+            req.WordInfo = 1
             
-            # 发送请求并获取响应
-            resp = self.client.SentenceRecognition(req)
+            # 发送请求并获取响应，上传和识别在同一次请求中完成
+            with metrics.stage("sentence"):
+                resp = self._call_api("SentenceRecognition", req)
             
             # 返回识别结果（将SDK响应转换为字典格式）
             return json.loads(resp.to_json_string())
@@ -139,51 +371,62 @@ class TencentCloudAPI:
         except Exception as e:
             raise Exception(f"语音识别失败: {str(e)}")
     
-    def poll_recognition_result(self, task_id, max_retries=60, interval=5):
+    def get_poller(self):
+        """获取该客户端共享的轮询调度器（首次调用时创建）"""
+        with self._pool_lock:
+            if self._poller is None:
+                # 轮询线程不在令牌桶上阻塞，限流时由调度器推迟该任务的查询
+                self._poller = TaskPoller(lambda task_id: self.get_recognition_result(task_id, block=False))
+            return self._poller
+    
+    def enable_callbacks(self, host='127.0.0.1', port=0, public_url=None):
+        """启动本地回调接收服务器，之后创建的任务会注册回调地址
+        
+        回调到达时直接完成轮询调度器中等待的任务，轮询仅作为低频兜底。
+        
+        Returns:
+            str: 注册到CreateRecTask的回调地址
         """
-        轮询获取语音识别结果
+        poller = self.get_poller()
+        with self._pool_lock:
+            if self._callback_receiver is None:
+                from callback_receiver import CallbackReceiver
+                self._callback_receiver = CallbackReceiver(poller.complete, host, port, public_url).start()
+                self.callback_url = self._callback_receiver.url
+        return self.callback_url
+    
+    def poll_recognition_result(self, task_id, audio_duration=None, timeout=None):
         """
-        for retry in range(max_retries):
-            try:
-                result = self.get_recognition_result(task_id)
-                if result.get("Response", {}).get("Status", 0) == 2:
-                    # 任务完成
-                    return result
-                elif result.get("Response", {}).get("Status", 0) == 3:
-                    # 任务失败
-                    raise Exception(f"语音识别任务失败: {result.get('Response', {}).get('ErrorMsg', '未知错误')}")
-                # 任务仍在进行中，继续轮询
-                time.sleep(interval)
-            except Exception as e:
-                # 如果是API错误，直接抛出
-                if "获取识别结果失败" in str(e):
-                    raise
-                # 其他错误，记录并重试
-                print(f"轮询错误 (尝试 {retry + 1}/{max_retries}): {str(e)}")
-                time.sleep(interval)
+        轮询获取语音识别结果
         
-        # 超时
-        raise Exception(f"语音识别任务超时，任务ID: {task_id}")
+        由共享的轮询调度器根据音频时长和任务状态自适应安排查询时间，
+        任务成功时返回结果，失败或超时时抛出异常
+        """
+        return self.get_poller().wait(task_id, audio_duration, timeout, callback=bool(self.callback_url))
     
-    def get_recognition_result(self, task_id):
+    def get_recognition_result(self, task_id, block=True):
         """
         使用腾讯云SDK获取语音识别结果（用于长音频）
+        
+        block为False时遇到频率限制不等待，直接抛出RateLimitWait（供轮询调度器重新安排查询）
         """
         try:
-            print(f"正在查询任务ID: {task_id} 的识别结果")
+            logger.debug("正在查询任务ID: %s 的识别结果", task_id)
             
             # 创建请求对象
+            from tencentcloud.asr.v20190614 import models
             req = models.DescribeTaskStatusRequest()
             
             # 设置请求参数
             req.TaskId = task_id
             
             # 发送请求并获取响应
-            resp = self.client.DescribeTaskStatus(req)
+            with metrics.span("poll", task_id=task_id):
+                resp = self._call_api("DescribeTaskStatus", req, block)
             
-            # 转换响应为字典
+            # 转换响应为字典（识别完成时响应包含完整转写文本，只在调试时输出）
             response_dict = json.loads(resp.to_json_string())
-            print(f"原始API响应: {response_dict}")
+            logger.debug("DescribeTaskStatus响应: %s", response_dict)
             
             # 提取Data部分数据，因为main.py期望Status等字段在顶层
             result_data = {}
@@ -194,7 +437,6 @@ class TencentCloudAPI:
                 if "Data" in response_data:
                     # 直接使用Data中的所有字段，确保Status等字段在顶层
                     result_data = response_data["Data"]
-                    print(f"提取Data数据到顶层: {result_data}")
                 else:
                     result_data = response_data
             elif "Data" in response_dict:
@@ -206,13 +448,40 @@ class TencentCloudAPI:
             # 确保Status字段存在（即使是0表示未知状态）
             if "Status" not in result_data:
                 result_data["Status"] = 0
-                print("Status字段不存在，已添加默认值0")
-            
-            print(f"最终返回结果: {result_data}")
+                logger.debug("Status字段不存在，已添加默认值0")
+            metrics.task_polled(task_id, result_data["Status"])
+            logger.debug("任务 %s 状态: %s", task_id, result_data.get("StatusStr", result_data["Status"]),
+                         extra={"task_id": task_id, "status": result_data["Status"]})
             return result_data
             
+        except RateLimitWait:
+            raise
         except Exception as e:
-            print(f"获取识别结果时发生异常: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise Exception(f"获取识别结果失败: {str(e)}")
\ No newline at end of file
+            logger.warning("获取识别结果时发生异常: %s", e, extra={"task_id": task_id},
+                           exc_info=logger.isEnabledFor(logging.DEBUG))
+            raise Exception(f"获取识别结果失败: {str(e)}")
+
+# 进程级共享客户端，按密钥区分
+_shared_apis = {}
+_shared_apis_lock = threading.Lock()
+
+def get_shared_api(tenant_id=None, secret_id=None, secret_key=None, app_id=None, endpoint=None):
+    """获取进程内共享的TencentCloudAPI实例
+    
+    相同密钥的调用方（命令行、GUI、批量处理）复用同一个实例及其keep-alive连接池，
+    避免每个片段都重新创建凭证、客户端和TLS连接。该函数可在多线程中安全调用。
+    """
+    load_env()
+    key = (
+        tenant_id or os.getenv('TENCENTCLOUD_TENANT_ID'),
+        secret_id or os.getenv('TENCENTCLOUD_SECRET_ID'),
+        secret_key or os.getenv('TENCENTCLOUD_SECRET_KEY'),
+        app_id or os.getenv('TENCENTCLOUD_APP_ID'),
+        endpoint or os.getenv('TENCENTCLOUD_ASR_ENDPOINT')
+    )
+    with _shared_apis_lock:
+        api = _shared_apis.get(key)
+        if api is None:
+            api = TencentCloudAPI(*key[:4], endpoint=key[4])
+            _shared_apis[key] = api
+        return api
@@ -0,0 +1,89 @@
+"""测试用的合成音频文件头"""
+import struct
+
+
+def streaminfo(sample_rate, channels, total_samples, bits=16):
+    """FLAC STREAMINFO块内容（34字节）"""
+    packed = sample_rate << 44 | (channels - 1) << 41 | (bits - 1) << 36 | total_samples
+    return struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + packed.to_bytes(8, 'big') + b'\x00' * 16
+
+
+def write_flac(path, sample_rate=16000, channels=2, seconds=10):
+    """只有STREAMINFO和少量填充数据的FLAC文件"""
+    info = streaminfo(sample_rate, channels, sample_rate * seconds)
+    with open(path, 'wb') as f:
+        f.write(b'fLaC' + bytes([0x80]) + len(info).to_bytes(3, 'big') + info + b'\x00' * 1024)
+
+
+def mp3_frame_header(bitrate_index=9, rate_index=0, mono=False, padding=0):
+    """MPEG1 Layer III帧头；默认128kbps、44100Hz、双声道"""
+    h = 0x7FF << 21 | 3 << 19 | 1 << 17 | 1 << 16 | bitrate_index << 12 | rate_index << 10 | padding << 9
+    if mono:
+        h |= 3 << 6
+    return struct.pack('>I', h)
+
+
+def mp3_cbr(frames, bitrate_index=9):
+    """由相同长度的帧组成的CBR MP3数据（128kbps/44100Hz每帧417字节）"""
+    frame = mp3_frame_header(bitrate_index)
+    frame += b'\x00' * (417 - len(frame))
+    return frame * frames
+
+
+def mp3_xing(total_frames, frames=3):
+    """首帧为Xing头的VBR MP3数据"""
+    first = mp3_frame_header() + b'\x00' * 32 + b'Xing' + struct.pack('>II', 1, total_frames)
+    first += b'\x00' * (417 - len(first))
+    return first + mp3_cbr(frames)
+
+
+def mp3_vbri(total_frames, frames=3):
+    """首帧为VBRI头的VBR MP3数据"""
+    first = mp3_frame_header() + b'\x00' * 32 + b'VBRI' + b'\x00' * 10 + struct.pack('>I', total_frames)
+    first += b'\x00' * (417 - len(first))
+    return first + mp3_cbr(frames)
+
+
+def adts_frames(count, rate_index=8, channels=1, length=200):
+    """ADTS帧序列，默认16000Hz单声道、每帧200字节"""
+    header = bytes([
+        0xFF, 0xF1,
+        1 << 6 | rate_index << 2 | channels >> 2,
+        (channels & 3) << 6 | length >> 11,
+        (length >> 3) & 0xFF,
+        (length & 7) << 5 | 0x1F,
+        0xFC,
+    ])
+    return (header + b'\x00' * (length - 7)) * count
+
+
+def ogg_page(packet, granule, serial=1):
+    """只含一个数据包的Ogg页"""
+    segments = [255] * (len(packet) // 255) + [len(packet) % 255]
+    return (b'OggS' + bytes([0, 0]) + struct.pack('<qIII', granule, serial, 0, 0)
+            + bytes([len(segments)]) + bytes(segments) + packet)
+
+
+def vorbis_id(sample_rate=16000, channels=1):
+    return b'\x01vorbis' + struct.pack('<IBI', 0, channels, sample_rate) + b'\x00' * 16
+
+
+def opus_head(channels=2, pre_skip=312, input_rate=16000):
+    return b'OpusHead' + struct.pack('<BBHIhB', 1, channels, pre_skip, input_rate, 0, 0)
+
+
+def box(box_type, payload):
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+
+def mp4_file(timescale=1000, duration=5000, sample_rate=44100, channels=2, version=0):
+    """ftyp + mdat + moov（moov在mdat之后）结构的M4A文件"""
+    if version == 1:
+        mvhd = box(b'mvhd', b'\x01\x00\x00\x00' + b'\x00' * 16 + struct.pack('>IQ', timescale, duration) + b'\x00' * 80)
+    else:
+        mvhd = box(b'mvhd', b'\x00' * 12 + struct.pack('>II', timescale, duration) + b'\x00' * 80)
+    hdlr = box(b'hdlr', b'\x00' * 8 + b'soun' + b'\x00' * 12)
+    entry = b'\x00' * 4 + b'mp4a' + b'\x00' * 16 + struct.pack('>HHHHI', channels, 16, 0, 0, sample_rate << 16)
+    stsd = box(b'stsd', b'\x00' * 8 + entry)
+    trak = box(b'trak', box(b'mdia', hdlr + box(b'minf', box(b'stbl', stsd))))
+    return box(b'ftyp', b'M4A ' + b'\x00' * 4) + box(b'mdat', b'\x00' * 1000) + box(b'moov', mvhd + trak)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import pytest
+from async_tencent_cloud_api import _AsyncConnectionPool, AsyncTencentCloudAPI
+from task_poller import TaskPoller
+
+
+def run_server(handler):
+    async def start():
+        server = await asyncio.start_server(handler, '127.0.0.1', 0)
+        return server, server.sockets[0].getsockname()[1]
+    return start()
+
+
+def test_request_times_out_and_closes_connection():
+    closed = []
+
+    async def silent(reader, writer):
+        # 读取请求但从不响应
+        await reader.read()
+        closed.append(True)
+        writer.close()
+
+    async def main():
+        server, port = await run_server(silent)
+        pool = _AsyncConnectionPool('127.0.0.1', port, False, 4, timeout=0.2)
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.request({"Content-Length": "2"}, [b"{}"])
+        await asyncio.sleep(0.1)
+        server.close()
+        return pool
+
+    pool = asyncio.run(main())
+    assert pool._idle == []
+    assert closed == [True]
+
+
+def test_streamed_body_is_produced_off_the_event_loop():
+    received = []
+    producer_threads = []
+
+    async def echo(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        received.append(await reader.readexactly(6))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+        await writer.drain()
+        writer.close()
+
+    class Body:
+        def __iter__(self):
+            for chunk in (b"abc", b"def"):
+                producer_threads.append(threading.get_ident())
+                yield chunk
+
+    async def main():
+        server, port = await run_server(echo)
+        pool = _AsyncConnectionPool('127.0.0.1', port, False, 4, timeout=5)
+        result = await pool.request({"Content-Length": "6"}, Body())
+        pool.close()
+        server.close()
+        return result
+
+    assert asyncio.run(main()) == (200, b"{}")
+    assert received == [b"abcdef"]
+    assert threading.get_ident() not in producer_threads
+
+
+def test_wait_retries_network_errors(monkeypatch):
+    monkeypatch.setattr(TaskPoller, "MIN_INTERVAL", 0.001)
+    monkeypatch.setattr(TaskPoller, "MAX_INTERVAL", 0.01)
+    api = AsyncTencentCloudAPI(secret_id="x", secret_key="y", app_id="1", endpoint="http://127.0.0.1:1")
+    responses = [ConnectionResetError("reset"), asyncio.IncompleteReadError(b"", 10), {"Status": 2, "Result": "ok"}]
+
+    async def get_status(task_id):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    api.get_status = get_status
+    assert asyncio.run(api.wait(1, audio_duration=0))["Result"] == "ok"
@@ -0,0 +1,136 @@
+import struct
+import wave
+import pytest
+from audio_probe import probe_audio
+from audio_fixtures import (write_flac, streaminfo, mp3_cbr, mp3_xing, mp3_vbri, adts_frames,
+                            ogg_page, vorbis_id, opus_head, mp4_file)
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_wav(tmp_path):
+    path = str(tmp_path / "a.wav")
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(b'\x00' * 8000 * 4 * 3)
+    info = probe_audio(path)
+    assert info['duration'] == pytest.approx(3.0)
+    assert (info['sample_rate'], info['channels'], info['codec']) == (8000, 2, 'pcm')
+
+
+def test_wav_without_fmt_chunk(tmp_path):
+    data = b'RIFF' + struct.pack('<I', 20) + b'WAVE' + b'data' + struct.pack('<I', 4) + b'\x00' * 4
+    assert probe_audio(write(tmp_path, "a.wav", data)) is None
+
+
+def test_flac_streaminfo(tmp_path):
+    path = str(tmp_path / "a.flac")
+    write_flac(path, sample_rate=16000, channels=2, seconds=12)
+    info = probe_audio(path)
+    assert info['duration'] == pytest.approx(12.0)
+    assert (info['sample_rate'], info['channels'], info['codec'], info['exact']) == (16000, 2, 'flac', True)
+
+
+def test_flac_after_id3_tag(tmp_path):
+    tag = b'ID3\x03\x00\x00' + bytes([0, 0, 0, 10]) + b'\x00' * 10
+    info = streaminfo(44100, 1, 44100 * 2)
+    data = tag + b'fLaC' + bytes([0x80, 0, 0, 34]) + info
+    assert probe_audio(write(tmp_path, "a.flac", data))['duration'] == pytest.approx(2.0)
+
+
+def test_flac_first_block_not_streaminfo(tmp_path):
+    data = b'fLaC' + bytes([0x81, 0, 0, 34]) + b'\x00' * 34
+    assert probe_audio(write(tmp_path, "a.flac", data)) is None
+
+
+def test_mp3_cbr(tmp_path):
+    # 128kbps: 每秒16000字节
+    info = probe_audio(write(tmp_path, "a.mp3", mp3_cbr(100)))
+    assert info['duration'] == pytest.approx(100 * 417 / 16000)
+    assert (info['sample_rate'], info['channels'], info['codec']) == (44100, 2, 'mp3')
+
+
+def test_mp3_cbr_ignores_id3v1_tag(tmp_path):
+    data = mp3_cbr(100) + b'TAG' + b'\x00' * 125
+    assert probe_audio(write(tmp_path, "a.mp3", data))['duration'] == pytest.approx(100 * 417 / 16000)
+
+
+def test_mp3_xing(tmp_path):
+    info = probe_audio(write(tmp_path, "a.mp3", mp3_xing(1000)))
+    assert info['duration'] == pytest.approx(1000 * 1152 / 44100)
+
+
+def test_mp3_vbri(tmp_path):
+    info = probe_audio(write(tmp_path, "a.mp3", mp3_vbri(500)))
+    assert info['duration'] == pytest.approx(500 * 1152 / 44100)
+
+
+def test_adts_exact_when_fully_scanned(tmp_path):
+    info = probe_audio(write(tmp_path, "a.aac", adts_frames(50)))
+    assert info['duration'] == pytest.approx(50 * 1024 / 16000)
+    assert (info['sample_rate'], info['channels'], info['codec'], info['exact']) == (16000, 1, 'aac', True)
+
+
+def test_adts_estimated_from_first_frames(tmp_path):
+    info = probe_audio(write(tmp_path, "a.aac", adts_frames(1000)))
+    assert info['duration'] == pytest.approx(1000 * 1024 / 16000)
+    assert not info['exact']
+
+
+def test_ogg_vorbis(tmp_path):
+    data = ogg_page(vorbis_id(16000, 1), 0) + ogg_page(b'\x00' * 100, 16000 * 7)
+    info = probe_audio(write(tmp_path, "a.ogg", data))
+    assert info['duration'] == pytest.approx(7.0)
+    assert (info['sample_rate'], info['channels'], info['codec']) == (16000, 1, 'vorbis')
+
+
+def test_ogg_opus_uses_48k_granule_and_pre_skip(tmp_path):
+    data = ogg_page(opus_head(2, 312, 16000), 0) + ogg_page(b'\x00' * 100, 48000 * 5 + 312)
+    info = probe_audio(write(tmp_path, "a.opus", data))
+    assert info['duration'] == pytest.approx(5.0)
+    assert (info['sample_rate'], info['channels'], info['codec']) == (16000, 2, 'opus')
+
+
+def test_ogg_ignores_pages_of_other_streams(tmp_path):
+    data = (ogg_page(vorbis_id(16000, 1), 0) + ogg_page(b'\x00' * 100, 16000 * 3)
+            + ogg_page(b'\x00' * 100, 16000 * 99, serial=2))
+    assert probe_audio(write(tmp_path, "a.ogg", data))['duration'] == pytest.approx(3.0)
+
+
+def test_ogg_unknown_codec(tmp_path):
+    data = ogg_page(b'\x01unknown' + b'\x00' * 30, 0)
+    assert probe_audio(write(tmp_path, "a.ogg", data)) is None
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_mp4_mvhd_and_stsd(tmp_path, version):
+    info = probe_audio(write(tmp_path, "a.m4a", mp4_file(1000, 65000, 44100, 2, version)))
+    assert info['duration'] == pytest.approx(65.0)
+    assert (info['sample_rate'], info['channels'], info['codec']) == (44100, 2, 'mp4a')
+
+
+def test_mp4_without_moov(tmp_path):
+    data = mp4_file()
+    data = data[:data.index(b'moov') - 4]
+    assert probe_audio(write(tmp_path, "a.m4a", data)) is None
+
+
+@pytest.mark.parametrize("name, data", [
+    ("empty.mp3", b""),
+    ("garbage.mp3", bytes(range(256)) * 64),
+    ("truncated.flac", b'fLaC\x80\x00\x00\x22' + b'\x00' * 10),
+    ("truncated.mp4", mp4_file()[:40]),
+    ("truncated.ogg", b'OggS' + b'\x00' * 10),
+])
+def test_truncated_or_garbage_input(tmp_path, name, data):
+    assert probe_audio(write(tmp_path, name, data)) is None
+
+
+def test_missing_file(tmp_path):
+    assert probe_audio(str(tmp_path / "missing.mp3")) is None
@@ -0,0 +1,57 @@
+import os
+import wave
+from audio_processor import AudioProcessor
+
+
+def write_wav(path, seconds, rate=8000):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x10' * int(rate * seconds))
+
+
+def truncate_wav(path, seconds, rate=8000):
+    """保留文件头（声明的时长不变），只保留前seconds秒的数据"""
+    with open(path, 'r+b') as f:
+        f.truncate(44 + int(rate * seconds) * 2)
+
+
+def frame_count(paths):
+    total = 0
+    for path in paths:
+        with wave.open(path, 'rb') as wf:
+            total += wf.getnframes()
+    return total
+
+
+def test_split_truncated_wav_stops_at_end_of_data(tmp_path):
+    path = str(tmp_path / "truncated.wav")
+    write_wav(path, 20)
+    truncate_wav(path, 12)
+    segments = AudioProcessor.split_large_audio(path, max_duration=5, output_dir=str(tmp_path / "out"))
+    assert len(segments) == 3
+    assert frame_count(segments) == 12 * 8000
+    assert sorted(os.listdir(tmp_path / "out")) == sorted(os.path.basename(p) for p in segments)
+
+
+def test_split_truncated_wav_at_segment_boundary(tmp_path):
+    path = str(tmp_path / "truncated.wav")
+    write_wav(path, 20)
+    truncate_wav(path, 10)
+    segments = AudioProcessor.split_large_audio(path, max_duration=5, smart_cut=False, output_dir=str(tmp_path / "out"))
+    assert len(segments) == 2
+    assert frame_count(segments) == 10 * 8000
+
+
+def test_split_defaults_to_temp_dir_and_remove_segments(tmp_path):
+    path = str(tmp_path / "long.wav")
+    write_wav(path, 12)
+    segments = AudioProcessor.split_large_audio(path, max_duration=5)
+    try:
+        assert len(segments) == 3
+        assert os.listdir(tmp_path) == ["long.wav"]
+    finally:
+        segment_dir = os.path.dirname(segments[0])
+        AudioProcessor.remove_segments(segments)
+    assert not os.path.exists(segment_dir)
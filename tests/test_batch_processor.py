@@ -0,0 +1,18 @@
+import os
+from batch_processor import collect_input_files
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'')
+
+
+def test_collect_input_files_walks_directories_in_order(tmp_path):
+    touch(str(tmp_path / "b.wav"))
+    touch(str(tmp_path / "a.txt"))
+    touch(str(tmp_path / "interview_segments" / "part1.mp3"))
+    touch(str(tmp_path / "sub" / "c.flac"))
+    files = collect_input_files([str(tmp_path), str(tmp_path / "b.wav")])
+    assert [os.path.relpath(p, tmp_path) for p in files] == [
+        "b.wav", os.path.join("interview_segments", "part1.mp3"), os.path.join("sub", "c.flac")]
@@ -0,0 +1,45 @@
+import queue
+import threading
+import tkinter as tk
+from gui import VoiceToTextGUI
+
+
+class FakeRoot:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.events = 0
+
+    def event_generate(self, name, when=None):
+        self.events += 1
+        if self.fail:
+            raise tk.TclError("窗口已关闭")
+
+
+def make_gui(root):
+    # 只测试事件通知，不创建窗口
+    gui = VoiceToTextGUI.__new__(VoiceToTextGUI)
+    gui.root = root
+    gui.event_queue = queue.Queue()
+    gui.wakeup_sent = False
+    gui._wakeup_lock = threading.Lock()
+    gui.use_wakeup_event = True
+    return gui
+
+
+def test_post_event_sends_one_wakeup_until_drained():
+    root = FakeRoot()
+    gui = make_gui(root)
+    gui.post_event("update", None)
+    gui.post_event("text", None)
+    assert root.events == 1
+    assert gui.event_queue.qsize() == 2
+
+
+def test_failed_wakeup_does_not_block_later_events():
+    root = FakeRoot(fail=True)
+    gui = make_gui(root)
+    gui.post_event("update", None)
+    root.fail = False
+    gui.post_event("update", None)
+    assert root.events == 2
+    assert gui.wakeup_sent
@@ -0,0 +1,110 @@
+import os
+import struct
+import threading
+import wave
+import main
+from audio_processor import AudioProcessor
+from job_journal import JobJournal, get_journal_path
+from task_poller import TaskPoller
+
+
+def write_segment(path, value):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(struct.pack('<h', value) * 8000)
+    return path
+
+
+def test_journal_replay(tmp_path):
+    done = write_segment(str(tmp_path / "a.wav"), 1)
+    pending = write_segment(str(tmp_path / "b.wav"), 2)
+    failed = write_segment(str(tmp_path / "c.wav"), 3)
+    path = str(tmp_path / "out.txt.journal")
+    journal = JobJournal(path, {"engine_model_type": "16k_zh"})
+    journal.record_submitted(done, 1, 1.0)
+    journal.record_completed(done, {"task_id": 1, "text": "一"})
+    journal.record_submitted(pending, 2, 1.0, [[0, 0]])
+    journal.record_submitted(failed, 3, 1.0)
+    journal.record_failed(failed, "失败")
+    journal.close()
+    # 崩溃时最后一行只写了一半
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "completed", "hash": "')
+
+    resumed = JobJournal(path, {"engine_model_type": "16k_zh"}, resume=True)
+    assert resumed.get_result(done) == {"task_id": 1, "text": "一"}
+    assert resumed.get_pending(done) is None
+    assert resumed.get_pending(pending)["task_id"] == 2
+    assert resumed.get_pending(pending)["offset_map"] == [[0, 0]]
+    assert resumed.get_result(failed) is None and resumed.get_pending(failed) is None
+    resumed.close()
+
+    # 识别参数改变后不恢复旧记录
+    changed = JobJournal(path, {"engine_model_type": "16k_en"}, resume=True)
+    assert changed.get_result(done) is None and changed.get_pending(pending) is None
+    changed.close()
+
+
+class FakeApi:
+    """记录上传和状态查询的客户端"""
+
+    callback_url = ""
+
+    def __init__(self):
+        self.uploads = []
+        self.polled = []
+        self._lock = threading.Lock()
+        self._next_id = 200
+        self.poller = TaskPoller(self.query, workers=2, min_interval=0.01, max_interval=0.05)
+
+    def recognize_audio_directly(self, path, engine_model_type, callback_url="", cancel_token=None):
+        with self._lock:
+            self._next_id += 1
+            self.uploads.append(self._next_id)
+            return {"TaskId": self._next_id}
+
+    def query(self, task_id):
+        with self._lock:
+            self.polled.append(task_id)
+        return {"TaskId": task_id, "Status": 2, "Result": f"任务{task_id}\n"}
+
+    def get_poller(self):
+        return self.poller
+
+
+def test_resume_skips_completed_segments_and_polls_pending_tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(AudioProcessor, "MAX_AUDIO_DURATION", 5)
+    audio = str(tmp_path / "long.wav")
+    with wave.open(audio, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        for second in range(12):
+            wf.writeframes(struct.pack('<h', 1000 + second) * 8000)
+    output = str(tmp_path / "long.txt")
+
+    # 模拟中断的运行：第一个片段已完成，第二个片段已提交任务101，第三个片段尚未上传
+    segments = AudioProcessor.split_large_audio(audio, output_dir=str(tmp_path / "segments"))
+    assert len(segments) == 3
+    journal = main.open_journal(output, audio, "16k_zh", True, False, 2, False)
+    journal.record_submitted(segments[0], 100, 5.0)
+    journal.record_completed(segments[0], {"task_id": 100, "text": "已完成的片段", "full_result": {}})
+    journal.record_submitted(segments[1], 101, 5.0)
+    journal.close()
+
+    api = FakeApi()
+    monkeypatch.setattr(main, "get_shared_api", lambda **kwargs: api)
+    try:
+        assert main.process_audio_to_text(audio, output, jobs=2, resume=True)
+    finally:
+        api.poller.stop()
+
+    assert len(api.uploads) == 1
+    assert sorted(api.polled) == sorted([101] + api.uploads)
+    with open(output, encoding='utf-8') as f:
+        text = f.read()
+    assert text.index("已完成的片段") < text.index("任务101") < text.index(f"任务{api.uploads[0]}")
+    # 全部完成后删除任务日志
+    assert not os.path.exists(get_journal_path(output))
@@ -0,0 +1,14 @@
+from job_manager import JobManager
+
+
+def test_remove_finished_keeps_most_recent_jobs(tmp_path):
+    manager = JobManager(parallelism=2, process_func=lambda *args, **kwargs: True)
+    jobs = [manager.submit(str(tmp_path / f"{i}.wav")) for i in range(5)]
+    assert manager.join(timeout=5)
+    for i, job in enumerate(jobs):
+        job.finished_at = 1000 + i
+
+    removed = manager.remove_finished(keep=2)
+
+    assert sorted(job.job_id for job in removed) == [job.job_id for job in jobs[:3]]
+    assert [job.job_id for job in manager.get_jobs()] == [job.job_id for job in jobs[3:]]
@@ -0,0 +1,79 @@
+import wave
+import threading
+from types import SimpleNamespace
+import main
+from task_poller import TaskPoller
+from audio_fixtures import write_flac
+
+
+def test_split_channels_with_stereo_flac_uses_normal_path(tmp_path, monkeypatch):
+    audio = str(tmp_path / "stereo.flac")
+    write_flac(audio, channels=2, seconds=10)
+    processed = []
+
+    def fake_single(path, *args, **kwargs):
+        processed.append(path)
+        return {"task_id": 1, "text": "你好\n", "full_result": {}}
+
+    def fail_channels(*args, **kwargs):
+        raise AssertionError("非WAV文件不应按声道拆分")
+
+    monkeypatch.setattr(main, "process_single_audio", fake_single)
+    monkeypatch.setattr(main, "process_channels", fail_channels)
+    output = str(tmp_path / "out.txt")
+    assert main.process_audio_to_text(audio, output, split_channels=True)
+    assert processed == [audio]
+    with open(output, encoding='utf-8') as f:
+        assert "你好" in f.read()
+
+
+def test_split_channels_falls_back_when_split_fails(tmp_path, monkeypatch):
+    audio = str(tmp_path / "stereo.wav")
+    with wave.open(audio, 'wb') as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b'\x00' * 16000 * 4)
+    processed = []
+
+    def fake_single(path, *args, **kwargs):
+        processed.append(path)
+        return {"task_id": 1, "text": "你好\n", "full_result": {}}
+
+    monkeypatch.setattr(main, "process_single_audio", fake_single)
+    monkeypatch.setattr(main.AudioProcessor, "split_channels", staticmethod(lambda *args, **kwargs: []))
+    assert main.process_audio_to_text(audio, str(tmp_path / "out.txt"), split_channels=True)
+    assert processed == [audio]
+
+
+class RecordingJournal:
+    """记录写入任务日志时所在的线程"""
+
+    def __init__(self):
+        self.threads = []
+
+    def get_result(self, path):
+        return None
+
+    def record_completed(self, path, result):
+        self.threads.append(threading.current_thread().name)
+
+    def record_failed(self, path, error):
+        self.threads.append(threading.current_thread().name)
+
+
+def test_segment_results_are_handled_off_the_poller_threads(monkeypatch):
+    poller = TaskPoller(lambda task_id: {"TaskId": task_id, "Status": 2, "Result": f"片段{task_id}"},
+                        workers=2, min_interval=0.01, max_interval=0.05)
+    api = SimpleNamespace(callback_url="", get_poller=lambda: poller)
+    task_ids = iter(range(1, 100))
+    monkeypatch.setattr(main, "get_shared_api", lambda **kwargs: api)
+    monkeypatch.setattr(main, "start_task", lambda *args, **kwargs: (next(task_ids), 0, None, False))
+    journal = RecordingJournal()
+    try:
+        results = main.process_segments_concurrently(["a.wav", "b.wav", "c.wav"], "16k_zh", jobs=2, journal=journal)
+    finally:
+        poller.stop()
+    assert all(results)
+    assert len(journal.threads) == 3
+    assert not any(name.startswith("task-poller") for name in journal.threads)
@@ -0,0 +1,127 @@
+import time
+import pytest
+from rate_limiter import TokenBucket, ApiRateLimiter, RateLimitWait, parse_rate_limits
+from task_poller import TaskPoller
+
+
+class LimitError(Exception):
+    code = "RequestLimitExceeded"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(10)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1)
+    clock.now += 0.2
+    assert bucket.reserve() == 0
+
+
+def test_bucket_allows_burst_up_to_capacity(clock):
+    bucket = TokenBucket(10, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.1)
+    # 空闲再久也最多积累capacity个令牌
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.1)
+
+
+def test_try_acquire_does_not_reserve(clock):
+    bucket = TokenBucket(10)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.1)
+    assert bucket.try_acquire() == pytest.approx(0.1)
+    clock.now += 0.1
+    assert bucket.try_acquire() == 0
+
+
+def test_pause_stops_refill(clock):
+    bucket = TokenBucket(10)
+    bucket.pause(1.0)
+    assert bucket.try_acquire() == pytest.approx(1.1)
+    clock.now += 1.0
+    assert bucket.try_acquire() == pytest.approx(0.1)
+    clock.now += 0.1
+    assert bucket.try_acquire() == 0
+
+
+def test_call_backs_off_and_lowers_rate_on_limit_errors(monkeypatch):
+    monkeypatch.setattr(ApiRateLimiter, "BASE_BACKOFF", 0.001)
+    limiter = ApiRateLimiter({"Action": 1000})
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) < 3:
+            raise LimitError()
+        return "ok"
+
+    assert limiter.call("Action", func) == "ok"
+    stats = limiter.get_metrics()["Action"]
+    assert stats["calls"] == 3
+    assert stats["throttled"] == 2
+    assert stats["rate"] < 1000 * ApiRateLimiter.HEADROOM
+
+
+def test_call_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(ApiRateLimiter, "BASE_BACKOFF", 0.001)
+    monkeypatch.setattr(ApiRateLimiter, "MAX_RETRIES", 2)
+    limiter = ApiRateLimiter({"Action": 0})
+
+    def func():
+        raise LimitError()
+
+    with pytest.raises(LimitError):
+        limiter.call("Action", func)
+    assert limiter.get_metrics()["Action"]["calls"] == 3
+
+
+def test_call_nowait_raises_instead_of_waiting():
+    limiter = ApiRateLimiter({"Action": 1})
+    assert limiter.call_nowait("Action", lambda: "ok") == "ok"
+    with pytest.raises(RateLimitWait) as info:
+        limiter.call_nowait("Action", lambda: "ok")
+    assert info.value.delay > 0.5
+    assert limiter.get_metrics()["Action"]["deferred"] == 1
+
+
+def test_poller_reschedules_rate_limited_queries():
+    attempts = []
+
+    def query(task_id):
+        attempts.append(task_id)
+        if len(attempts) == 1:
+            raise RateLimitWait("DescribeTaskStatus", 0.01)
+        return {"TaskId": task_id, "Status": 2}
+
+    poller = TaskPoller(query, workers=1, min_interval=0.01, max_interval=0.05)
+    try:
+        assert poller.submit(1, audio_duration=0).result(timeout=5)["Status"] == 2
+        stats = poller.get_metrics()
+    finally:
+        poller.stop()
+    assert stats["rate_limited"] == 1
+    assert stats["query_errors"] == 0
+    assert stats["polls"] == 1
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits(["CreateRecTask=5", "DescribeTaskStatus = 2.5"]) == {
+        "CreateRecTask": 5.0, "DescribeTaskStatus": 2.5}
+    with pytest.raises(ValueError):
+        parse_rate_limits(["CreateRecTask"])
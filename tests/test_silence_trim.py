@@ -0,0 +1,95 @@
+import os
+import struct
+import wave
+from audio_processor import AudioProcessor
+from transcript_utils import TIMESTAMP_PATTERN, parse_timestamp, remap_result_timestamps
+
+RATE = 8000
+# 原始音频中的语音（方波）区间，其余为静音
+TONES = [(0.0, 1.0), (4.0, 5.0), (10.0, 11.5)]
+DURATION = 14.0
+
+
+def write_gapped_wav(path):
+    samples = bytearray()
+    for index in range(int(DURATION * RATE)):
+        seconds = index / RATE
+        loud = any(start <= seconds < end for start, end in TONES)
+        value = (8000 if index // 20 % 2 else -8000) if loud else 0
+        samples += struct.pack('<h', value)
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(bytes(samples))
+
+
+def tone_ranges(path):
+    """从裁剪后的音频中找出各段方波的起止时间（秒）"""
+    with wave.open(path, 'rb') as wf:
+        data = wf.readframes(wf.getnframes())
+    values = struct.unpack(f'<{len(data) // 2}h', data)
+    ranges = []
+    start = None
+    for index, value in enumerate(values + (0,)):
+        if value and start is None:
+            start = index
+        elif not value and start is not None:
+            ranges.append((start / RATE, index / RATE))
+            start = None
+    return ranges
+
+
+def format_trimmed(seconds):
+    minutes, rest = divmod(seconds, 60)
+    return f"{int(minutes)}:{rest:.3f}"
+
+
+def test_trimmed_timestamps_map_back_to_original_audio(tmp_path):
+    source = str(tmp_path / "gaps.wav")
+    write_gapped_wav(source)
+    trimmed, offset_map, stats = AudioProcessor.trim_silence(source, output_dir=str(tmp_path))
+    try:
+        assert trimmed != source and offset_map
+        assert len(offset_map) == len(TONES)
+        # 每段语音前后各保留约VAD_PADDING秒静音（第一段从0秒开始，前面没有静音），误差为几帧
+        padding = AudioProcessor.VAD_PADDING
+        expected = (1.0 + padding) + (1.0 + 2 * padding) + (1.5 + 2 * padding)
+        assert abs(stats['trimmed_duration'] - expected) < 6 * AudioProcessor.VAD_FRAME
+        assert stats['original_duration'] == DURATION
+        
+        # 模拟服务端按裁剪后的音频返回的时间戳（毫秒精度）
+        found = tone_ranges(trimmed)
+        assert len(found) == len(TONES)
+        lines = [f"[{format_trimmed(start)},{format_trimmed(end)}]  第{index}句"
+                 for index, (start, end) in enumerate(found)]
+        response = {
+            "Result": "\n".join(lines) + "\n",
+            "ResultDetail": [{"StartMs": int(round(start * 1000)), "EndMs": int(round(end * 1000))}
+                             for start, end in found],
+        }
+        remap_result_timestamps(response, offset_map)
+        
+        remapped = [(parse_timestamp(match.group(1)), parse_timestamp(match.group(2)))
+                    for match in TIMESTAMP_PATTERN.finditer(response["Result"])]
+        assert len(remapped) == len(TONES)
+        for (start, end), (expected_start, expected_end) in zip(remapped, TONES):
+            assert abs(start - expected_start) < 0.005
+            assert abs(end - expected_end) < 0.005
+        for item, (expected_start, expected_end) in zip(response["ResultDetail"], TONES):
+            assert abs(item["StartMs"] - expected_start * 1000) <= 5
+            assert abs(item["EndMs"] - expected_end * 1000) <= 5
+        assert "第2句" in response["Result"]
+    finally:
+        if trimmed != source and os.path.exists(trimmed):
+            os.remove(trimmed)
+
+
+def test_map_trimmed_time_clamps_inside_kept_ranges():
+    offset_map = [(0.0, 0.0, 1.2), (1.2, 3.8, 1.4), (2.6, 9.8, 1.9)]
+    assert AudioProcessor.map_trimmed_time(offset_map, 0.5) == 0.5
+    assert abs(AudioProcessor.map_trimmed_time(offset_map, 1.4) - 4.0) < 1e-9
+    assert abs(AudioProcessor.map_trimmed_time(offset_map, 2.8) - 10.0) < 1e-9
+    # 超出裁剪后音频末尾的时间落在最后一段的结尾
+    assert abs(AudioProcessor.map_trimmed_time(offset_map, 10.0) - 11.7) < 1e-9
+    assert AudioProcessor.map_trimmed_time(None, 3.0) == 3.0
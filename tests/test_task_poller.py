@@ -0,0 +1,59 @@
+import threading
+import pytest
+from task_poller import TaskPoller
+
+
+def make_poller(statuses):
+    """依次返回statuses中的状态，最后一个状态之后保持不变"""
+    calls = []
+    lock = threading.Lock()
+
+    def query(task_id):
+        with lock:
+            calls.append(task_id)
+            status = statuses[min(len(calls), len(statuses)) - 1]
+        return {"TaskId": task_id, "Status": status, "Result": "ok"}
+
+    return TaskPoller(query, workers=2, min_interval=0.01, max_interval=0.05), calls
+
+
+def test_pending_task_is_rescheduled_until_done():
+    poller, calls = make_poller([0, 2])
+    try:
+        result = poller.submit(1, audio_duration=0).result(timeout=5)
+    finally:
+        poller.stop()
+    assert result["Status"] == 2
+    assert len(calls) == 2
+
+
+def test_recognizing_task_resolves():
+    poller, calls = make_poller([0, 1, 1, 2])
+    try:
+        result = poller.submit(7, audio_duration=0.1).result(timeout=5)
+    finally:
+        poller.stop()
+    assert result["TaskId"] == 7
+    assert len(calls) == 4
+
+
+def test_submit_after_stop_fails_future():
+    poller, calls = make_poller([2])
+    poller.stop()
+    future = poller.submit(1, audio_duration=0)
+    with pytest.raises(Exception, match="轮询已停止"):
+        future.result(timeout=5)
+    assert calls == []
+
+
+def test_callback_task_reports_status_changes_once():
+    poller, calls = make_poller([1, 1, 1, 2])
+    poller.CALLBACK_FALLBACK_INTERVAL = 0.01
+    statuses = []
+    try:
+        future = poller.submit(1, audio_duration=0, callback=True, on_status=statuses.append)
+        assert future.result(timeout=5)["Status"] == 2
+    finally:
+        poller.stop()
+    assert len(calls) == 4
+    assert statuses == [1]
@@ -0,0 +1,29 @@
+import threading
+import time
+from tencent_cloud_api import TencentCloudAPI
+
+
+def test_client_pool_never_exceeds_max_size():
+    api = TencentCloudAPI(secret_id="x", secret_key="y", app_id="1", max_pool_size=3)
+    created = []
+
+    def slow_create():
+        time.sleep(0.02)
+        created.append(object())
+        return created[-1]
+
+    api._create_client = slow_create
+    barrier = threading.Barrier(10)
+
+    def borrow():
+        barrier.wait()
+        with api._acquire_client():
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=borrow) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert api.clients_created == 3
+    assert len(created) == 2
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from job_manager import Job
+from transcribe_server import TranscriptionService
+
+
+class FakeProcess:
+    """代替process_audio_to_text，把收到的参数和音频内容写入识别结果"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = []
+
+    def __call__(self, input_file, output_file, on_text=None, on_progress=None, cancel_token=None, **options):
+        self.release.wait(5)
+        with open(input_file, 'rb') as f:
+            data = f.read()
+        self.calls.append((input_file, options))
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(f"{os.path.basename(input_file)} {len(data)} {options.get('engine_model_type', '')}\n")
+        return True
+
+
+@pytest.fixture
+def served(tmp_path, monkeypatch):
+    monkeypatch.setattr("tencent_cloud_api.get_shared_api", lambda **kwargs: None)
+    root = tmp_path / "audio"
+    root.mkdir()
+    process = FakeProcess()
+    service = TranscriptionService(port=0, workers=2, work_dir=str(tmp_path / "service"),
+                                   process_func=process, path_root=str(root)).start()
+    try:
+        yield service, process, root
+    finally:
+        process.release.set()
+        service.stop()
+
+
+def request(service, method, path, body=None, content_type=None):
+    headers = {"Content-Type": content_type} if content_type else {}
+    req = urllib.request.Request(service.url + path, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def submit_path(service, path, **options):
+    body = json.dumps({"path": path, **options}).encode('utf-8')
+    return request(service, "POST", "/jobs", body, "application/json")
+
+
+def test_upload_status_and_result(served):
+    service, process, _ = served
+    process.release.clear()
+    status, job = request(service, "POST", "/jobs?filename=call.wav&model=8k_zh", b"RIFF" * 10)
+    assert status == 202
+    assert job["input"].startswith("call_") and job["state"] in (Job.PENDING, Job.RUNNING)
+
+    status, _ = request(service, "GET", f"/jobs/{job['job_id']}/result")
+    assert status == 409
+    process.release.set()
+    status, described = request(service, "GET", f"/jobs/{job['job_id']}?wait=10")
+    assert status == 200 and described["state"] == Job.DONE
+
+    status, result = request(service, "GET", f"/jobs/{job['job_id']}/result")
+    assert status == 200
+    assert result["text"].split()[1:] == ["40", "8k_zh"]
+    # 上传的音频在任务结束后删除
+    assert os.listdir(service.upload_dir) == []
+    status, listed = request(service, "GET", "/jobs")
+    assert [item["job_id"] for item in listed["jobs"]] == [job["job_id"]]
+
+
+def test_submit_errors(served):
+    service, _, _ = served
+    assert request(service, "POST", "/jobs?filename=a.txt", b"text")[0] == 400
+    assert request(service, "POST", "/jobs?filename=a.wav&unknown=1", b"RIFF")[0] == 400
+    assert request(service, "POST", "/jobs?filename=a.wav", b"")[0] == 400
+    assert request(service, "GET", "/jobs/999")[0] == 404
+    assert request(service, "GET", "/nothing")[0] == 404
+
+
+def test_path_submission_inside_root(served):
+    service, process, root = served
+    audio = root / "sub" / "a.wav"
+    audio.parent.mkdir()
+    audio.write_bytes(b"RIFF")
+    status, job = submit_path(service, str(audio), trim_silence=True)
+    assert status == 202
+    status, described = request(service, "GET", f"/jobs/{job['job_id']}?wait=10")
+    assert described["state"] == Job.DONE
+    assert [(path, options["trim_silence"]) for path, options in process.calls] == [(str(audio), True)]
+    # 按路径提交的音频不会被删除
+    assert audio.exists()
+    # 相对路径按path_root解析
+    assert submit_path(service, "sub/a.wav")[0] == 202
+
+
+def test_path_submission_outside_root_is_rejected(served, tmp_path):
+    service, process, root = served
+    outside = tmp_path / "secret.wav"
+    outside.write_bytes(b"RIFF")
+    (root / "link.wav").symlink_to(outside)
+
+    for path in (str(outside), str(root / ".." / "secret.wav"), "../secret.wav", str(root / "link.wav")):
+        status, response = submit_path(service, path)
+        assert status == 403, path
+        assert "error" in response
+    assert submit_path(service, str(root / "missing.wav"))[0] == 400
+    assert request(service, "POST", "/jobs", b"{}", "application/json")[0] == 400
+    assert process.calls == []
+
+
+def test_path_submission_disabled_without_root(tmp_path, monkeypatch):
+    monkeypatch.setattr("tencent_cloud_api.get_shared_api", lambda **kwargs: None)
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"RIFF")
+    service = TranscriptionService(port=0, work_dir=str(tmp_path / "service"), process_func=FakeProcess()).start()
+    try:
+        assert submit_path(service, str(audio))[0] == 403
+    finally:
+        service.stop()
+
+
+def test_prune_removes_expired_jobs_and_results(served):
+    service, _, _ = served
+    jobs = [request(service, "POST", f"/jobs?filename={name}.wav", b"RIFF")[1] for name in ("old", "new")]
+    for job in jobs:
+        assert request(service, "GET", f"/jobs/{job['job_id']}?wait=10")[1]["state"] == Job.DONE
+    old, new = (service.manager.get(job["job_id"]) for job in jobs)
+    old.finished_at -= service.retention + 1
+
+    assert service.prune() == [old]
+    assert not os.path.exists(old.output_file)
+    assert os.path.exists(new.output_file)
+    assert request(service, "GET", f"/jobs/{old.job_id}")[0] == 404
+    assert request(service, "GET", f"/jobs/{new.job_id}/result")[0] == 200
@@ -0,0 +1,35 @@
+from tencent_cloud_api import TencentCloudAPI
+from transcript_cache import TranscriptCache
+from transcript_utils import lookup_cache
+
+
+def make_api(endpoint=None):
+    return TencentCloudAPI(secret_id="x", secret_key="y", app_id="1", endpoint=endpoint)
+
+
+def test_cache_key_depends_on_endpoint_and_normalization(tmp_path, monkeypatch):
+    monkeypatch.delenv("TENCENTCLOUD_ASR_ENDPOINT", raising=False)
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"RIFF")
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    real = make_api()
+    stub = make_api("http://127.0.0.1:8000")
+
+    key, _ = lookup_cache(cache, str(audio), "16k_zh", api=stub)
+    cache.put(key, {"Status": 2, "Result": "stub"})
+    assert lookup_cache(cache, str(audio), "16k_zh", api=stub)[1] == {"Status": 2, "Result": "stub"}
+    assert lookup_cache(cache, str(audio), "16k_zh", api=real)[1] is None
+
+    normalized = make_api()
+    normalized.enable_normalization()
+    assert lookup_cache(cache, str(audio), "16k_zh", api=normalized)[0] != lookup_cache(cache, str(audio), "16k_zh", api=real)[0]
+
+
+def test_cache_key_depends_on_trim_silence(tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"RIFF")
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    key, _ = lookup_cache(cache, str(audio), "16k_zh")
+    cache.put(key, {"Status": 2, "Result": "untrimmed"})
+    assert lookup_cache(cache, str(audio), "16k_zh", trim_silence=True) == (cache.make_key(str(audio), "16k_zh", trim_silence=True), None)
+    assert lookup_cache(cache, str(audio), "16k_zh", trim_silence=False)[1] == {"Status": 2, "Result": "untrimmed"}
@@ -0,0 +1,17 @@
+from transcript_utils import sentence_result_response
+
+
+def test_sentence_result_split_by_word_timestamps():
+    words = [
+        {"Word": "你好", "StartTime": 100, "EndTime": 600},
+        {"Word": "世界", "StartTime": 600, "EndTime": 1000},
+        {"Word": "再见", "StartTime": 1500, "EndTime": 2000},
+    ]
+    result = sentence_result_response({"Result": "你好，世界。再见！", "AudioDuration": 2500, "WordList": words})
+    assert result["Result"] == "[0:0.100,0:1.000]  你好，世界。\n[0:1.500,0:2.000]  再见！\n"
+
+
+def test_sentence_result_without_word_list_uses_whole_clip():
+    result = sentence_result_response({"Result": "你好。再见！", "AudioDuration": 2500, "WordList": None})
+    assert result["Result"] == "[0:0.000,0:2.500]  你好。再见！\n"
+    assert sentence_result_response({"Result": "", "AudioDuration": 0})["Result"] == ""
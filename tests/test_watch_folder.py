@@ -0,0 +1,33 @@
+import os
+from watch_folder import FolderWatcher
+
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_archive_removes_journal_on_success(tmp_path):
+    watch_dir = tmp_path / "in"
+    done_dir = tmp_path / "done"
+    audio = str(watch_dir / "a.wav")
+    output = str(watch_dir / "a.txt")
+    write(audio)
+    write(output)
+    write(output + ".journal")
+    write(str(watch_dir / "a_segments" / "notes.wav"))
+    watcher = FolderWatcher([str(watch_dir)], process_func=lambda *args, **kwargs: True, done_dir=str(done_dir))
+
+    watcher._archive(str(watch_dir), audio, output, True)
+
+    # 同名的"_segments"目录是用户数据，保持不动
+    assert os.listdir(watch_dir) == ["a_segments"]
+    assert os.listdir(watch_dir / "a_segments") == ["notes.wav"]
+    assert sorted(os.listdir(done_dir)) == ["a.txt", "a.wav"]
+
+
+def test_recursive_listing_includes_segments_named_dirs(tmp_path):
+    write(str(tmp_path / "interview_segments" / "part1.wav"))
+    watcher = FolderWatcher([str(tmp_path)], process_func=lambda *args, **kwargs: True, recursive=True)
+    assert list(watcher._list_files(str(tmp_path))) == [str(tmp_path / "interview_segments" / "part1.wav")]
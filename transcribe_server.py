@@ -0,0 +1,358 @@
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from audio_processor import AudioProcessor
+from job_manager import Job, JobManager
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class ServiceError(Exception):
+    """返回给调用方的请求错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class TranscriptionService:
+    """本地HTTP转写服务
+
+    多个内部工具通过HTTP提交音频，而不是各自嵌入process_audio_to_text。所有请求共用一个任务队列
+    （JobManager，最多同时处理workers个文件）、一个腾讯云客户端及其连接池、轮询调度器和频率限制，
+    以及一个识别结果缓存，因此调用方共享接口配额，相同音频只识别一次。
+
+    接口（请求和响应均为JSON）:
+        POST /jobs                 提交任务：请求体为音频数据（查询参数filename指定文件名和格式），
+                                   或JSON {"path": 本机音频路径}（仅限path_root目录下的文件）；
+                                   识别参数通过查询参数或JSON字段指定
+        GET  /jobs                 列出任务
+        GET  /jobs/<id>            任务状态，?wait=秒数 时等待任务结束或超时再返回
+        GET  /jobs/<id>/result     识别结果，任务未结束时返回409
+        POST /jobs/<id>/cancel     取消任务，处理中的任务随即停止（返回的状态可能仍为处理中）
+        GET  /stats                队列、缓存、轮询和频率限制统计
+    """
+
+    # 可由调用方指定的识别参数及其类型
+    OPTIONS = {
+        "engine_model_type": str,
+        "remove_timestamp": bool,
+        "speaker_diarization": bool,
+        "speaker_count": int,
+        "trim_silence": bool,
+        "split_channels": bool
+    }
+    OPTION_ALIASES = {"model": "engine_model_type"}
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+    MAX_WAIT = 60  # ?wait 的最长等待时间（秒）
+    RETENTION = 3600  # 已结束的任务保留多久（秒）
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=4, work_dir=None, cache=None, jobs=1, retention=None, process_func=None, path_root=None):
+        """
+        Args:
+            host: 监听地址，默认只接受本机请求
+            port: 监听端口，0表示自动分配
+            workers: 同时处理的文件数
+            work_dir: 保存上传音频和识别结果的目录，默认为系统临时目录下新建的目录
+            cache: TranscriptCache实例，所有任务共享
+            jobs: 单个长音频分割后片段的并发数
+            retention: 已结束的任务及其结果保留的秒数，默认为RETENTION
+            process_func: 处理单个文件的函数，默认使用main.process_audio_to_text
+            path_root: 允许按本机路径提交的目录，只接受该目录下的文件；None表示不接受按路径提交
+        """
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="voice2text_service_")
+        self.upload_dir = os.path.join(self.work_dir, "uploads")
+        self.output_dir = os.path.join(self.work_dir, "results")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.cache = cache
+        self.retention = self.RETENTION if retention is None else retention
+        self.path_root = os.path.realpath(path_root) if path_root else None
+        self.started_at = time.time()
+
+        self._changed = threading.Condition()
+        self._uploads = {}
+        self.manager = JobManager(workers, on_update=self._on_update, process_func=process_func,
+                                  cache=cache, jobs=max(1, jobs))
+
+        handler = type('Handler', (_ServiceRequestHandler,), {'service': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """在后台线程中启动服务"""
+        try:
+            from tencent_cloud_api import get_shared_api
+            get_shared_api()
+        except Exception as e:
+            logger.warning("初始化腾讯云API失败: %s", e)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="transcribe-server", daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._prune_loop, name="transcribe-prune", daemon=True).start()
+        logger.info("转写服务地址: %s，同时处理 %s 个文件，工作目录: %s", self.url, self.manager.parallelism, self.work_dir)
+        return self
+
+    def stop(self, cancel=True):
+        """停止接收请求，cancel为True时取消所有未完成的任务"""
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if cancel:
+            self.manager.cancel_all()
+        self.manager.join()
+
+    def submit(self, input_file, options, upload=False):
+        """提交任务，返回Job；upload为True时任务结束后删除input_file"""
+        job = self.manager.submit(input_file, self._output_path(input_file), **options)
+        if upload:
+            with self._changed:
+                self._uploads[job.job_id] = input_file
+            # 任务可能在登记前已经结束
+            self._on_update(job)
+        logger.info("已提交任务 %s: %s", job.job_id, input_file, extra={"job_id": job.job_id, "file": input_file})
+        return job
+
+    def save_upload(self, stream, length, filename):
+        """把请求体按块写入上传目录，返回文件路径"""
+        if length <= 0:
+            raise ServiceError(400, "请求体为空")
+        if length > self.MAX_UPLOAD_BYTES:
+            raise ServiceError(413, f"音频超过上传大小限制（{self.MAX_UPLOAD_BYTES // 1024 // 1024}MB）")
+        name = os.path.basename(filename or "") or "audio.wav"
+        if not AudioProcessor.is_supported_format(name):
+            raise ServiceError(400, f"不支持的音频格式: {os.path.splitext(name)[1] or name}")
+        stem, extension = os.path.splitext(name)
+        fd, path = tempfile.mkstemp(suffix=extension, prefix=f"{stem}_", dir=self.upload_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = stream.read(min(self.UPLOAD_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ServiceError(400, "请求体不完整")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    def resolve_path(self, path):
+        """检查按路径提交的音频，返回其绝对路径；不在path_root目录下的文件返回403"""
+        if self.path_root is None:
+            raise ServiceError(403, "服务未配置允许按路径提交的目录")
+        # 解析符号链接和..，避免借此访问目录外的文件
+        real_path = os.path.realpath(path if os.path.isabs(path) else os.path.join(self.path_root, path))
+        if os.path.commonpath([real_path, self.path_root]) != self.path_root:
+            raise ServiceError(403, f"不允许访问该路径: {path}")
+        if not os.path.isfile(real_path):
+            raise ServiceError(400, f"文件不存在: {path}")
+        if not AudioProcessor.is_supported_format(real_path):
+            raise ServiceError(400, f"不支持的音频格式: {os.path.splitext(real_path)[1]}")
+        return real_path
+
+    def _output_path(self, input_file):
+        stem = os.path.splitext(os.path.basename(input_file))[0]
+        fd, path = tempfile.mkstemp(suffix="_transcript.txt", prefix=f"{stem}_", dir=self.output_dir)
+        os.close(fd)
+        return path
+
+    def parse_options(self, values):
+        """把查询参数或JSON字段转换为识别参数，未知参数返回400"""
+        options = {}
+        for key, value in values.items():
+            name = self.OPTION_ALIASES.get(key, key)
+            kind = self.OPTIONS.get(name)
+            if kind is None:
+                raise ServiceError(400, f"未知参数: {key}")
+            try:
+                if kind is bool and isinstance(value, str):
+                    value = value.strip().lower() in ("1", "true", "yes", "on")
+                options[name] = kind(value)
+            except (TypeError, ValueError):
+                raise ServiceError(400, f"参数格式错误: {key}")
+        return options
+
+    def get_job(self, job_id):
+        job = self.manager.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"任务不存在: {job_id}")
+        return job
+
+    def wait(self, job, timeout):
+        """等待任务结束，超时返回False"""
+        with self._changed:
+            return self._changed.wait_for(lambda: job.finished, min(timeout, self.MAX_WAIT))
+
+    def describe(self, job):
+        return {
+            "job_id": job.job_id,
+            "state": job.state,
+            "state_name": job.state_name,
+            "progress": round(job.progress, 4),
+            "message": job.message,
+            "error": job.error,
+            "input": os.path.basename(job.input_file),
+            "submitted_at": job.submitted_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at
+        }
+
+    def get_result(self, job):
+        if not job.finished:
+            raise ServiceError(409, f"任务尚未完成: {job.state_name}")
+        if job.state != Job.DONE:
+            raise ServiceError(409, f"任务{job.state_name}: {job.error or ''}".rstrip(": "))
+        try:
+            with open(job.output_file, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as e:
+            raise ServiceError(410, f"识别结果已删除: {e}")
+        return {"job_id": job.job_id, "text": text}
+
+    def get_stats(self):
+        jobs = self.manager.get_jobs()
+        states = {state: 0 for state in Job.STATE_NAMES}
+        for job in jobs:
+            states[job.state] += 1
+        stats = {
+            "uptime": round(time.time() - self.started_at, 3),
+            "parallelism": self.manager.parallelism,
+            "jobs": states
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        try:
+            from tencent_cloud_api import get_shared_api
+            tencent_api = get_shared_api()
+            stats["poller"] = tencent_api.get_poller().get_metrics()
+            stats["rate_limits"] = tencent_api.rate_limiter.get_metrics()
+        except Exception as e:
+            logger.warning("获取客户端统计失败: %s", e)
+        return stats
+
+    def _on_update(self, job):
+        if job.finished:
+            with self._changed:
+                upload = self._uploads.pop(job.job_id, None)
+            if upload is not None:
+                # 识别结果已保存，上传的音频不再需要
+                try:
+                    os.remove(upload)
+                except OSError:
+                    pass
+        with self._changed:
+            self._changed.notify_all()
+
+    def prune(self):
+        """删除结束超过retention秒的任务及其识别结果，返回删除的任务"""
+        removed = self.manager.remove_finished(older_than=self.retention)
+        for job in removed:
+            for path in (job.output_file, f"{job.output_file}.journal"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return removed
+
+    def _prune_loop(self):
+        """定期清理结束的任务"""
+        while not self._stop.wait(min(60, max(1, self.retention))):
+            self.prune()
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    JOB_PATH = re.compile(r'^/jobs/(\d+)(/result|/cancel)?$')
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            status, response = self._route(method, url.path, query)
+        except ServiceError as e:
+            status, response = e.status, {"error": str(e)}
+            # 请求体可能没有读完，不再复用该连接
+            self.close_connection = True
+        except Exception as e:
+            logger.error("处理请求失败 %s %s: %s", method, self.path, e)
+            status, response = 500, {"error": str(e)}
+        self.send_json(status, response)
+
+    def _route(self, method, path, query):
+        service = self.service
+        if path == "/jobs" and method == "POST":
+            return self._submit(query)
+        if path == "/jobs" and method == "GET":
+            return 200, {"jobs": [service.describe(job) for job in service.manager.get_jobs()]}
+        if path == "/stats" and method == "GET":
+            return 200, service.get_stats()
+        match = self.JOB_PATH.match(path)
+        if match is None:
+            raise ServiceError(404, f"未知接口: {method} {path}")
+        job = service.get_job(int(match.group(1)))
+        action = match.group(2)
+        if action is None and method == "GET":
+            if "wait" in query:
+                try:
+                    service.wait(job, float(query["wait"]))
+                except ValueError:
+                    raise ServiceError(400, "参数格式错误: wait")
+            return 200, service.describe(job)
+        if action == "/result" and method == "GET":
+            return 200, service.get_result(job)
+        if action == "/cancel" and method == "POST":
+            service.manager.cancel(job.job_id)
+            return 200, service.describe(job)
+        raise ServiceError(405, f"不支持的请求方法: {method} {path}")
+
+    def _submit(self, query):
+        service = self.service
+        length = int(self.headers.get('Content-Length') or 0)
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        filename = query.pop("filename", None)
+        if content_type == "application/json":
+            try:
+                body = json.loads(self.rfile.read(length).decode('utf-8') or "{}")
+            except ValueError:
+                raise ServiceError(400, "请求体不是有效的JSON")
+            path = body.pop("path", None)
+            if not path:
+                raise ServiceError(400, "缺少参数: path")
+            path = service.resolve_path(path)
+            options = service.parse_options({**query, **body})
+            job = service.submit(path, options)
+        else:
+            options = service.parse_options(query)
+            job = service.submit(service.save_upload(self.rfile, length, filename), options, upload=True)
+        return 202, service.describe(job)
+
+    def send_json(self, status, data):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class TranscriptCache:
+    """基于内容哈希的识别结果磁盘缓存
+
+    缓存键由音频内容的SHA256和识别参数（引擎模型、时间戳设置、说话人分离设置）共同决定，
+    同一音频出现在不同目录或重复处理时直接返回已有结果，不再上传和识别。
+    每个条目保存为一个JSON文件，写入时先写临时文件再原子替换；总大小超过上限时
+    按最近访问时间（文件mtime）淘汰最久未使用的条目。
+    """
+
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 默认缓存上限512MB
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认使用VOICE2TEXT_CACHE_DIR环境变量或 ~/.cache/voice2text
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = cache_dir or self.default_cache_dir()
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._hash_memo = {}
+        # 索引：键 -> [大小, 最近访问时间]
+        self._index = {}
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def default_cache_dir():
+        return os.getenv('VOICE2TEXT_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'voice2text')
+
+    def _load_index(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                self._index[name[:-5]] = [st.st_size, st.st_mtime]
+                self._total_bytes += st.st_size
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def hash_file(self, file_path):
+        """计算音频文件内容的SHA256，同一进程内按路径、大小和修改时间缓存"""
+        st = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.HASH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    def make_key(self, file_path, engine_model_type, remove_timestamp=True, speaker_diarization=False, speaker_count=2, trim_silence=False, api_settings=None):
+        """根据音频内容和识别参数生成缓存键
+
+        api_settings为客户端的cache_settings()，包含服务地址和预处理设置，
+        避免本地模拟服务器的结果或不同预处理下的结果互相命中。
+        裁剪静音后的识别结果与原音频不同（句子切分、时间戳），trim_silence也参与计算。
+        """
+        params = json.dumps({
+            "api": api_settings,
+            "audio": self.hash_file(file_path),
+            "engine_model_type": engine_model_type,
+            "remove_timestamp": bool(remove_timestamp),
+            "speaker_diarization": bool(speaker_diarization),
+            "speaker_count": speaker_count if speaker_diarization else None,
+            "trim_silence": bool(trim_silence)
+        }, sort_keys=True)
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """读取缓存条目，未命中返回None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            entry = self._index.get(key)
+            if entry:
+                entry[1] = time.time()
+        return value
+
+    def put(self, key, value):
+        """原子写入缓存条目，并在超过大小上限时淘汰旧条目"""
+        path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            st = os.stat(path)
+        except Exception as e:
+            logger.warning("写入识别结果缓存失败: %s", e)
+            return
+
+        with self._lock:
+            old = self._index.get(key)
+            if old:
+                self._total_bytes -= old[0]
+            self._index[key] = [st.st_size, st.st_mtime]
+            self._total_bytes += st.st_size
+            self._evict_locked(keep=key)
+
+    def _evict_locked(self, keep=None):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            del self._index[key]
+            self._total_bytes -= size
+
+    def get_stats(self):
+        """返回命中/未命中次数和缓存占用"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._index),
+                "bytes": self._total_bytes
+            }
+
+# 进程级默认缓存
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """获取进程内共享的默认缓存实例"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TranscriptCache()
+        return _default_cache
@@ -0,0 +1,154 @@
+import re
+from audio_processor import AudioProcessor
+from result_sink import get_output_path
+import metrics
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 识别结果中的时间戳，例如 [0:1.020,0:3.500]
+TIMESTAMP_PATTERN = re.compile(r'\[(\d+(?::\d+)*(?:\.\d+)?),(\d+(?::\d+)*(?:\.\d+)?)\]')
+
+def parse_timestamp(value):
+    """把 分:秒 格式的时间戳转换为秒"""
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def format_timestamp(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:.3f}"
+
+def remap_result_timestamps(result_response, offset_map):
+    """把裁剪静音后识别结果中的时间戳换算回原始音频的时间"""
+    def remap(match):
+        start = AudioProcessor.map_trimmed_time(offset_map, parse_timestamp(match.group(1)))
+        end = AudioProcessor.map_trimmed_time(offset_map, parse_timestamp(match.group(2)))
+        return f"[{format_timestamp(start)},{format_timestamp(end)}]"
+    
+    if result_response.get("Result"):
+        result_response["Result"] = TIMESTAMP_PATTERN.sub(remap, result_response["Result"])
+    for item in result_response.get("ResultDetail") or []:
+        for key in ("StartMs", "EndMs"):
+            if isinstance(item.get(key), (int, float)):
+                item[key] = int(round(AudioProcessor.map_trimmed_time(offset_map, item[key] / 1000) * 1000))
+    return result_response
+
+def extract_result_text(result_response, remove_timestamp=True):
+    """从任务状态结果中提取识别文本"""
+    text = ""
+    if "Result" in result_response:
+        text = result_response["Result"]
+        # 移除时间戳
+        if remove_timestamp:
+            lines = text.split('\n')
+            clean_lines = []
+            for line in lines:
+                # 移除类似 [0:0.000,0:1.489] 这样的时间戳
+                if '[' in line and ':' in line and ',' in line and ']' in line:
+                    # 找到最后一个 ] 的位置
+                    bracket_pos = line.rfind(']')
+                    if bracket_pos > -1 and bracket_pos + 1 < len(line):
+                        clean_lines.append(line[bracket_pos + 1:].strip())
+                    else:
+                        clean_lines.append(line)
+                else:
+                    clean_lines.append(line)
+            text = '\n'.join(clean_lines)
+    elif "ResultDetail" in result_response:
+        # 处理详细结果
+        for item in result_response["ResultDetail"]:
+            if "Text" in item:
+                text += item["Text"] + "\n"
+    return text
+
+def lookup_cache(cache, audio_file_path, engine_model_type, remove_timestamp=True, speaker_diarization=False, speaker_count=2, trim_silence=False, api=None):
+    """在识别前查询结果缓存
+    
+    api为执行识别的客户端，其服务地址和预处理设置参与缓存键的计算。
+    
+    Returns:
+        tuple: (缓存键, 缓存的结果)，未启用缓存时缓存键为None，未命中时结果为None
+    """
+    if cache is None:
+        return None, None
+    try:
+        api_settings = api.cache_settings() if api is not None else None
+        key = cache.make_key(audio_file_path, engine_model_type, remove_timestamp, speaker_diarization, speaker_count, trim_silence, api_settings)
+    except Exception as e:
+        logger.warning("计算缓存键失败: %s", e)
+        return None, None
+    cached = cache.get(key)
+    if cached:
+        logger.info("命中识别结果缓存: %s", audio_file_path)
+    return key, cached
+
+# 一句话识别结果按这些标点切分为句子
+SENTENCE_END_PATTERN = re.compile(r'[^。！？!?；;]*[。！？!?；;]+|[^。！？!?；;]+$')
+
+def _count_word_chars(text):
+    """统计文本中除空白和标点外的字符数，用于把句子与WordList中的词对齐"""
+    return sum(1 for c in text if c.isalnum())
+
+def _sentence_lines(text, words):
+    """按词级时间戳把一句话识别的文本切分为带时间戳的句子
+    
+    Returns:
+        list: 每句一行的结果文本；WordList与文本对不上时返回None
+    """
+    lines = []
+    pending = ""
+    index = 0
+    for sentence in SENTENCE_END_PATTERN.findall(text):
+        needed = _count_word_chars(sentence)
+        if needed == 0:
+            # 只有标点的片段并入相邻的句子
+            if lines:
+                lines[-1][2] += sentence.strip()
+            else:
+                pending += sentence.strip()
+            continue
+        first = index
+        matched = 0
+        while index < len(words) and matched < needed:
+            matched += _count_word_chars(words[index].get("Word") or "")
+            index += 1
+        if matched != needed:
+            return None
+        lines.append([words[first].get("StartTime") or 0, words[index - 1].get("EndTime") or 0, pending + sentence.strip()])
+        pending = ""
+    return [f"[{format_timestamp(start / 1000)},{format_timestamp(end / 1000)}]  {sentence}\n" for start, end, sentence in lines]
+
+def sentence_result_response(response):
+    """把一句话识别的响应转换为与录音文件识别结果相同的结构
+    
+    请求时开启了WordInfo，按WordList中的词级时间戳把文本切分为句子，每句一行；
+    没有词级时间戳时时间戳取整段音频的起止时间。
+    """
+    text = response.get("Result") or ""
+    duration = (response.get("AudioDuration") or 0) / 1000
+    lines = _sentence_lines(text, response.get("WordList") or []) if text else []
+    if lines is None:
+        lines = [f"[{format_timestamp(0)},{format_timestamp(duration)}]  {text}\n"]
+    return {
+        "Status": 2,
+        "Result": "".join(lines),
+        "AudioDuration": duration,
+        "RequestId": response.get("RequestId")
+    }
+
+def save_result(text, detailed_results, audio_file_path, output_file=None):
+    """保存识别结果"""
+    # 如果没有指定输出文件，自动生成
+    output_file = get_output_path(audio_file_path, output_file)
+    
+    # 保存文本结果
+    try:
+        with metrics.stage("save"):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        logger.info("识别结果已保存到: %s", output_file)
+        
+    except Exception as e:
+        logger.error("保存结果时出错: %s", e)
@@ -0,0 +1,382 @@
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+import collections
+import metrics
+from audio_processor import AudioProcessor
+from job_control import CancelToken
+from job_journal import get_journal_path
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class ProcessedLedger:
+    """监控目录的已处理文件记录
+
+    以JSON Lines格式只追加写入监控目录下的隐藏文件，按相对路径记录文件大小、修改时间和处理结果，
+    每条记录写入后立即fsync。重启后大小和修改时间都没有变化的文件不再处理；文件被覆盖或修改后重新处理。
+    最后一行可能因崩溃而不完整，加载时忽略无法解析的行。
+    """
+
+    FILE_NAME = ".voice2text_watch.jsonl"
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") in ("done", "failed"):
+                self._entries[record.get("name")] = record
+        if self._entries:
+            logger.info("已从处理记录加载 %s 个文件的状态: %s", len(self._entries), self.path)
+
+    def get(self, name, signature):
+        """返回大小和修改时间与signature一致的处理记录，没有时返回None"""
+        record = self._entries.get(name)
+        if record is None or (record.get("size"), record.get("mtime_ns")) != tuple(signature):
+            return None
+        return record
+
+    def record(self, name, signature, status, output=None, error=None):
+        record = {"name": name, "size": signature[0], "mtime_ns": signature[1], "status": status,
+                  "output": output, "error": error, "time": time.time()}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if status in ("done", "failed"):
+                self._entries[name] = record
+            if self._file is None:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                logger.error("写入处理记录失败: %s", e)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class FolderWatcher:
+    """监控目录，自动转写新写入完成的音频文件
+
+    定期扫描监控目录，文件的大小和修改时间连续settle_time秒没有变化才视为写入完成，
+    随后交给常驻的工作线程处理，所有文件共用同一个腾讯云客户端、轮询调度器和识别结果缓存。
+    处理结果记录在每个监控目录的ProcessedLedger中，重启后不会重复处理；处理中途退出的文件
+    在重启后通过任务日志恢复，已提交的识别任务继续轮询，不重新上传。
+    指定done_dir/failed_dir时，处理完成的文件（以及保存在其旁边的识别结果）移动到对应目录。
+    """
+
+    # 统计拾取延迟和吞吐量时保留的最近记录数
+    STATS_WINDOW = 1000
+
+    def __init__(self, directories, workers=4, output_dir=None, engine_model_type="16k_zh", remove_timestamp=True, jobs=1, process_func=None, cache=None, trim_silence=False, split_channels=False, done_dir=None, failed_dir=None, interval=1.0, settle_time=2.0, recursive=False, report_interval=60, **api_kwargs):
+        """
+        Args:
+            directories: 监控目录列表
+            workers: 同时处理的文件数（常驻工作线程数）
+            output_dir: 结果输出目录，None则将结果保存在每个音频文件旁
+            engine_model_type: 引擎模型类型
+            remove_timestamp: 是否移除时间戳
+            jobs: 单个长音频分割后片段的并发数
+            process_func: 处理单个文件的函数，默认使用main.process_audio_to_text
+            cache: TranscriptCache实例，所有工作线程共享
+            trim_silence: 上传前是否裁剪长静音
+            split_channels: 多声道WAV是否按声道分别识别
+            done_dir: 处理成功的文件移动到的目录，None则保留在原处
+            failed_dir: 处理失败的文件移动到的目录，None则保留在原处（文件修改前不再重试）
+            interval: 扫描间隔（秒）
+            settle_time: 大小和修改时间保持不变多久后视为写入完成（秒）
+            recursive: 是否监控子目录
+            report_interval: 输出统计信息的间隔（秒），0表示只在停止时输出
+            api_kwargs: 传给process_func的腾讯云API密钥参数
+        """
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.workers = max(1, workers)
+        self.output_dir = output_dir
+        self.engine_model_type = engine_model_type
+        self.remove_timestamp = remove_timestamp
+        self.jobs = jobs
+        self.cache = cache
+        self.trim_silence = trim_silence
+        self.split_channels = split_channels
+        self.done_dir = done_dir
+        self.failed_dir = failed_dir
+        self.interval = interval
+        self.settle_time = settle_time
+        self.recursive = recursive
+        self.report_interval = report_interval
+        self.api_kwargs = api_kwargs
+        if process_func is None:
+            from main import process_audio_to_text
+            process_func = process_audio_to_text
+        self.process_func = process_func
+
+        # 递归监控时不进入输出和归档目录
+        self._excluded = {os.path.abspath(path) for path in (output_dir, done_dir, failed_dir) if path}
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._cancel_token = CancelToken()
+        self._threads = []
+        self._ledgers = {}
+        # 文件路径 -> [(大小, 修改时间), 首次观察到该状态的时间, 是否已处理或已排队]
+        self._candidates = {}
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started_at = None
+        self._succeeded = 0
+        self._failed = 0
+        self._audio_seconds = 0.0
+        self._pickups = collections.deque(maxlen=self.STATS_WINDOW)
+        self._finished = collections.deque(maxlen=self.STATS_WINDOW)
+
+    def start(self):
+        """打开处理记录、预先创建客户端并启动工作线程"""
+        for directory in self.directories:
+            os.makedirs(directory, exist_ok=True)
+            try:
+                self._ledgers[directory] = ProcessedLedger(directory)
+            except Exception as e:
+                logger.warning("打开处理记录失败，重启后可能重复处理 %s: %s", directory, e)
+        try:
+            from tencent_cloud_api import get_shared_api
+            get_shared_api(**self.api_kwargs)
+        except Exception as e:
+            logger.warning("初始化腾讯云API失败: %s", e)
+        self._started_at = time.monotonic()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"watch-{index + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("开始监控 %s，工作线程数: %s", "、".join(self.directories), self.workers)
+        return self
+
+    def run(self):
+        """持续扫描直到stop()被调用"""
+        if self._started_at is None:
+            self.start()
+        last_report = time.monotonic()
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error("扫描监控目录失败: %s", e)
+            if self.report_interval and time.monotonic() - last_report >= self.report_interval:
+                last_report = time.monotonic()
+                self.log_stats()
+            if self._stop.wait(self.interval):
+                break
+
+    def stop(self, cancel=True, timeout=None):
+        """停止扫描并结束工作线程
+
+        Args:
+            cancel: 是否取消正在处理的文件（已提交的任务保留在任务日志中，重启后继续），
+                False则等待正在处理和已排队的文件完成
+        """
+        self._stop.set()
+        if cancel:
+            self._cancel_token.cancel()
+            # 已排队但尚未开始的文件下次启动时重新发现
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        for ledger in self._ledgers.values():
+            ledger.close()
+        self.log_stats()
+
+    def scan(self):
+        """扫描一次监控目录，把写入完成且未处理过的文件加入处理队列，返回加入的文件数"""
+        now = time.monotonic()
+        seen = set()
+        queued = 0
+        for directory in self.directories:
+            for path in self._list_files(directory):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                signature = (st.st_size, st.st_mtime_ns)
+                candidate = self._candidates.get(path)
+                if candidate is None or candidate[0] != signature:
+                    # 新文件或仍在写入
+                    self._candidates[path] = [signature, now, False]
+                    continue
+                if candidate[2] or st.st_size == 0 or now - candidate[1] < self.settle_time:
+                    continue
+                candidate[2] = True
+                ledger = self._ledgers.get(directory)
+                name = os.path.relpath(path, directory)
+                record = ledger.get(name, signature) if ledger is not None else None
+                if record is not None:
+                    # 重启前已处理，只补做移动
+                    self._archive(directory, path, record.get("output"), record.get("status") == "done")
+                    continue
+                self._queue.put((directory, path, signature, candidate[1]))
+                queued += 1
+        for path in list(self._candidates):
+            if path not in seen:
+                del self._candidates[path]
+        return queued
+
+    def _list_files(self, directory):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning("读取监控目录失败 %s: %s", directory, e)
+            return
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive and os.path.abspath(entry.path) not in self._excluded:
+                    yield from self._list_files(entry.path)
+            elif entry.is_file() and AudioProcessor.is_supported_format(entry.name):
+                yield os.path.abspath(entry.path)
+
+    def get_output_path(self, directory, audio_file_path):
+        """计算输出文件路径，指定输出目录时保留相对于监控目录的子目录结构"""
+        if self.output_dir is None:
+            return f"{os.path.splitext(audio_file_path)[0]}_transcript.txt"
+        relative = os.path.relpath(audio_file_path, directory)
+        return os.path.join(self.output_dir, f"{os.path.splitext(relative)[0]}_transcript.txt")
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            directory, path, signature, detected_at = item
+            pickup = time.monotonic() - detected_at
+            registry = metrics.get_metrics()
+            if registry is not None:
+                registry.observe("pickup", pickup, path)
+            with self._lock:
+                self._active += 1
+                self._pickups.append(pickup)
+            output_file = self.get_output_path(directory, path)
+            duration = AudioProcessor.get_audio_info(path).get('duration') or 0.0
+            name = os.path.relpath(path, directory)
+            ledger = self._ledgers.get(directory)
+            if ledger is not None:
+                ledger.record(name, signature, "started", output_file)
+            logger.info("开始处理 %s（拾取延迟 %.2f秒）", path, pickup, extra={"file": path, "pickup": pickup})
+
+            error = None
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+                success = self.process_func(path, output_file,
+                                            engine_model_type=self.engine_model_type,
+                                            remove_timestamp=self.remove_timestamp,
+                                            jobs=self.jobs, cache=self.cache,
+                                            trim_silence=self.trim_silence, resume=True,
+                                            split_channels=self.split_channels,
+                                            cancel_token=self._cancel_token,
+                                            **self.api_kwargs)
+            except Exception as e:
+                success = False
+                error = str(e)
+
+            with self._lock:
+                self._active -= 1
+            if self._cancel_token.cancelled:
+                # 未记录结果，重启后从任务日志恢复
+                logger.info("已停止处理 %s，重启后继续", path)
+                continue
+            if ledger is not None:
+                ledger.record(name, signature, "done" if success else "failed", output_file, error or (None if success else "转换失败"))
+            with self._lock:
+                if success:
+                    self._succeeded += 1
+                    self._audio_seconds += duration
+                else:
+                    self._failed += 1
+                self._finished.append(time.monotonic())
+            logger.info("%s: %s", '成功' if success else '失败', path, extra={"file": path, "success": success})
+            self._archive(directory, path, output_file, success)
+
+    def _archive(self, directory, path, output_file, success):
+        """把处理完成的文件移动到done_dir或failed_dir，结果保存在音频旁时一起移动
+
+        成功时同时删除任务日志，避免它留在监控目录中。
+        """
+        target_dir = self.done_dir if success else self.failed_dir
+        if not target_dir:
+            return
+        if success and output_file:
+            try:
+                os.remove(get_journal_path(output_file))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error("删除任务日志失败 %s: %s", output_file, e)
+        relative = os.path.relpath(path, directory)
+        moves = [(path, os.path.join(target_dir, relative))]
+        if output_file and self.output_dir is None:
+            moves.append((output_file, os.path.join(target_dir, os.path.relpath(output_file, directory))))
+        for source, target in moves:
+            if not os.path.exists(source):
+                continue
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(source, target)
+            except Exception as e:
+                logger.error("移动文件失败 %s: %s", source, e)
+
+    def get_stats(self):
+        """返回处理统计：文件数、吞吐量（文件/分钟、音频分钟/分钟）和拾取延迟"""
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._started_at if self._started_at is not None else 0.0
+            pickups = sorted(self._pickups)
+            recent = sum(1 for finished in self._finished if now - finished <= 60)
+            stats = {
+                "succeeded": self._succeeded,
+                "failed": self._failed,
+                "active": self._active,
+                "queued": self._queue.qsize(),
+                "elapsed": round(elapsed, 3),
+                "files_per_minute": round((self._succeeded + self._failed) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                "recent_files_per_minute": recent,
+                "audio_minutes_per_minute": round(self._audio_seconds / elapsed, 2) if elapsed > 0 else 0.0
+            }
+        if pickups:
+            stats.update(pickup_p50=round(pickups[len(pickups) // 2], 3),
+                         pickup_p95=round(pickups[min(len(pickups) - 1, int(len(pickups) * 0.95))], 3),
+                         pickup_max=round(pickups[-1], 3))
+        return stats
+
+    def log_stats(self):
+        stats = self.get_stats()
+        message = (f"监控统计: 成功 {stats['succeeded']}，失败 {stats['failed']}，处理中 {stats['active']}，"
+                   f"排队 {stats['queued']}；吞吐量 {stats['files_per_minute']:.1f} 文件/分钟"
+                   f"（最近1分钟 {stats['recent_files_per_minute']}），{stats['audio_minutes_per_minute']:.1f} 音频分钟/分钟")
+        if "pickup_p50" in stats:
+            message += f"；拾取延迟 p50 {stats['pickup_p50']:.2f}秒，p95 {stats['pickup_p95']:.2f}秒"
+        logger.info("%s", message, extra=stats)